@@ -147,6 +147,31 @@ CREATE TABLE patients (
 
 CREATE INDEX idx_patients_lastname ON patients(last_name);
 
+-- Búsqueda de pacientes: trigramas + texto completo, sin acentos
+-- (ss1-backend-python/migrations/0001_patient_search.sql)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+CREATE OR REPLACE FUNCTION immutable_unaccent(text)
+  RETURNS text
+  LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+
+ALTER TABLE patients
+  ADD COLUMN search_document TEXT GENERATED ALWAYS AS (
+    immutable_unaccent(lower(
+      first_name || ' ' || last_name
+      || ' ' || coalesce(email, '')
+      || ' ' || coalesce(phone, '')
+    ))
+  ) STORED,
+  ADD COLUMN search_vector TSVECTOR GENERATED ALWAYS AS (
+    to_tsvector('simple', immutable_unaccent(lower(first_name || ' ' || last_name)))
+  ) STORED;
+
+CREATE INDEX idx_patients_search_trgm ON patients USING GIN (search_document gin_trgm_ops);
+CREATE INDEX idx_patients_search_vector ON patients USING GIN (search_vector);
+
 -- =============================
 -- 6) Historia Clínica (según plantilla)
 -- =============================
@@ -174,7 +199,7 @@ CREATE TABLE clinical_records (
     CONSTRAINT chk_clinical_record_status CHECK (status IN ('ACTIVE', 'CLOSED'))
 );
 
-CREATE INDEX idx_clinical_records_patient ON clinical_records(patient_id);
+CREATE INDEX idx_clinical_records_patient_created ON clinical_records(patient_id, created_at);
 
 -- Antecedentes
 CREATE TABLE clinical_backgrounds (
@@ -314,7 +339,7 @@ CREATE TABLE sessions (
     updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
 );
 
-CREATE INDEX idx_sessions_record ON sessions(clinical_record_id);
+CREATE INDEX idx_sessions_record_datetime ON sessions(clinical_record_id, session_datetime);
 
 CREATE INDEX idx_sessions_professional ON sessions(professional_id);
 
@@ -454,12 +479,23 @@ CREATE TABLE appointments (
     CONSTRAINT chk_appt_time CHECK (end_datetime > start_datetime)
 );
 
-CREATE INDEX idx_appointments_patient ON appointments(patient_id);
+CREATE INDEX idx_appointments_patient_start ON appointments(patient_id, start_datetime);
 
-CREATE INDEX idx_appointments_professional ON appointments(professional_id);
+CREATE INDEX idx_appointments_professional_start ON appointments(professional_id, start_datetime, status);
 
 CREATE INDEX idx_appointments_start ON appointments(start_datetime);
 
+-- Sin traslapes de citas activas por profesional
+-- (ss1-backend-python/migrations/0003_appointments_no_overlap.sql)
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+ALTER TABLE appointments
+  ADD CONSTRAINT excl_appointments_professional_overlap
+  EXCLUDE USING gist (
+    professional_id WITH =,
+    tstzrange(start_datetime, end_datetime) WITH &&
+  ) WHERE (status IN ('SCHEDULED', 'COMPLETED'));
+
 -- (opcional) vínculo de una sesión con una cita: lo manejas en app,
 -- o si lo quieres estricto: agrega appointment_id en sessions.
 ALTER TABLE
@@ -518,6 +554,8 @@ CREATE INDEX idx_invoices_patient ON invoices(patient_id);
 
 CREATE INDEX idx_invoices_status ON invoices(status);
 
+CREATE INDEX idx_invoices_date_currency_status ON invoices(invoice_date, currency, status);
+
 -- Inventario/Productos se define antes de invoice_items para FK opcionales
 -- =============================
 -- 9) Inventario
@@ -592,6 +630,190 @@ CREATE TABLE payments (
 
 CREATE INDEX idx_payments_invoice ON payments(invoice_id);
 
+CREATE INDEX idx_payments_paid_at ON payments(paid_at);
+
+-- Acumulados mensuales para /reports/revenue y /reports/sales (se leen cuando el
+-- rango son meses completos). Los mantienen los triggers de invoices,
+-- invoice_items y payments; el BEFORE DELETE de invoices descuenta la factura
+-- con sus items y pagos antes del borrado en cascada.
+CREATE TABLE invoice_monthly_rollups (
+  month DATE NOT NULL,
+  currency VARCHAR(10) NOT NULL,
+  status VARCHAR(20) NOT NULL,
+  invoices_count INTEGER NOT NULL DEFAULT 0,
+  invoiced_amount NUMERIC(14, 2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (month, currency, status)
+);
+
+CREATE TABLE payment_monthly_rollups (
+  month DATE NOT NULL,
+  currency VARCHAR(10) NOT NULL,
+  payments_count INTEGER NOT NULL DEFAULT 0,
+  paid_amount NUMERIC(14, 2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (month, currency)
+);
+
+CREATE TABLE invoice_item_monthly_rollups (
+  month DATE NOT NULL,
+  item_type VARCHAR(10) NOT NULL,
+  item_id INTEGER NOT NULL,
+  items_count INTEGER NOT NULL DEFAULT 0,
+  quantity NUMERIC(14, 2) NOT NULL DEFAULT 0,
+  items_amount NUMERIC(14, 2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (month, item_type, item_id)
+);
+
+-- Sumar (sign = 1) o restar (sign = -1) una factura en invoice_monthly_rollups
+CREATE OR REPLACE FUNCTION report_rollup_invoice(inv invoices, sign INTEGER) RETURNS void AS $$
+BEGIN
+  INSERT INTO invoice_monthly_rollups AS r (month, currency, status, invoices_count, invoiced_amount)
+  VALUES (date_trunc('month', inv.invoice_date)::date, inv.currency, inv.status, sign, sign * inv.total_amount)
+  ON CONFLICT (month, currency, status) DO UPDATE
+    SET invoices_count = r.invoices_count + EXCLUDED.invoices_count,
+        invoiced_amount = r.invoiced_amount + EXCLUDED.invoiced_amount;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Sumar o restar los items de una factura (con el mes de esa factura)
+CREATE OR REPLACE FUNCTION report_rollup_invoice_items(inv invoices, sign INTEGER) RETURNS void AS $$
+BEGIN
+  INSERT INTO invoice_item_monthly_rollups AS r (month, item_type, item_id, items_count, quantity, items_amount)
+  SELECT date_trunc('month', inv.invoice_date)::date,
+         CASE WHEN i.service_id IS NOT NULL THEN 'SERVICE' ELSE 'PRODUCT' END,
+         COALESCE(i.service_id, i.product_id),
+         sign * count(*), sign * sum(i.quantity), sign * sum(i.total_amount)
+  FROM invoice_items i
+  WHERE i.invoice_id = inv.id
+  GROUP BY 2, 3
+  ON CONFLICT (month, item_type, item_id) DO UPDATE
+    SET items_count = r.items_count + EXCLUDED.items_count,
+        quantity = r.quantity + EXCLUDED.quantity,
+        items_amount = r.items_amount + EXCLUDED.items_amount;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Sumar o restar los pagos de una factura (con la moneda de esa factura)
+CREATE OR REPLACE FUNCTION report_rollup_invoice_payments(inv invoices, sign INTEGER) RETURNS void AS $$
+BEGIN
+  INSERT INTO payment_monthly_rollups AS r (month, currency, payments_count, paid_amount)
+  SELECT date_trunc('month', p.paid_at AT TIME ZONE 'UTC')::date, inv.currency, sign * count(*), sign * sum(p.amount)
+  FROM payments p
+  WHERE p.invoice_id = inv.id
+  GROUP BY 1
+  ON CONFLICT (month, currency) DO UPDATE
+    SET payments_count = r.payments_count + EXCLUDED.payments_count,
+        paid_amount = r.paid_amount + EXCLUDED.paid_amount;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION report_rollup_invoices_trigger() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    -- BEFORE DELETE: la factura todavía tiene sus items y pagos
+    PERFORM report_rollup_invoice(OLD, -1);
+    PERFORM report_rollup_invoice_items(OLD, -1);
+    PERFORM report_rollup_invoice_payments(OLD, -1);
+    RETURN OLD;
+  END IF;
+
+  IF TG_OP = 'INSERT' THEN
+    PERFORM report_rollup_invoice(NEW, 1);
+    RETURN NULL;
+  END IF;
+
+  IF (OLD.invoice_date, OLD.currency, OLD.status, OLD.total_amount)
+     IS DISTINCT FROM (NEW.invoice_date, NEW.currency, NEW.status, NEW.total_amount) THEN
+    PERFORM report_rollup_invoice(OLD, -1);
+    PERFORM report_rollup_invoice(NEW, 1);
+  END IF;
+  IF date_trunc('month', OLD.invoice_date) IS DISTINCT FROM date_trunc('month', NEW.invoice_date) THEN
+    PERFORM report_rollup_invoice_items(OLD, -1);
+    PERFORM report_rollup_invoice_items(NEW, 1);
+  END IF;
+  IF OLD.currency IS DISTINCT FROM NEW.currency THEN
+    PERFORM report_rollup_invoice_payments(OLD, -1);
+    PERFORM report_rollup_invoice_payments(NEW, 1);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION report_rollup_invoice_items_trigger() RETURNS trigger AS $$
+DECLARE
+  item_month DATE;
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    SELECT date_trunc('month', invoice_date)::date INTO item_month FROM invoices WHERE id = OLD.invoice_id;
+    -- Sin factura: borrado en cascada, ya descontado por report_rollup_invoices_trigger
+    IF FOUND THEN
+      INSERT INTO invoice_item_monthly_rollups AS r (month, item_type, item_id, items_count, quantity, items_amount)
+      VALUES (item_month, CASE WHEN OLD.service_id IS NOT NULL THEN 'SERVICE' ELSE 'PRODUCT' END,
+              COALESCE(OLD.service_id, OLD.product_id), -1, -OLD.quantity, -OLD.total_amount)
+      ON CONFLICT (month, item_type, item_id) DO UPDATE
+        SET items_count = r.items_count + EXCLUDED.items_count,
+            quantity = r.quantity + EXCLUDED.quantity,
+            items_amount = r.items_amount + EXCLUDED.items_amount;
+    END IF;
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    SELECT date_trunc('month', invoice_date)::date INTO item_month FROM invoices WHERE id = NEW.invoice_id;
+    INSERT INTO invoice_item_monthly_rollups AS r (month, item_type, item_id, items_count, quantity, items_amount)
+    VALUES (item_month, CASE WHEN NEW.service_id IS NOT NULL THEN 'SERVICE' ELSE 'PRODUCT' END,
+            COALESCE(NEW.service_id, NEW.product_id), 1, NEW.quantity, NEW.total_amount)
+    ON CONFLICT (month, item_type, item_id) DO UPDATE
+      SET items_count = r.items_count + EXCLUDED.items_count,
+          quantity = r.quantity + EXCLUDED.quantity,
+          items_amount = r.items_amount + EXCLUDED.items_amount;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION report_rollup_payments_trigger() RETURNS trigger AS $$
+DECLARE
+  invoice_currency VARCHAR(10);
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    SELECT currency INTO invoice_currency FROM invoices WHERE id = OLD.invoice_id;
+    -- Sin factura: borrado en cascada, ya descontado por report_rollup_invoices_trigger
+    IF FOUND THEN
+      INSERT INTO payment_monthly_rollups AS r (month, currency, payments_count, paid_amount)
+      VALUES (date_trunc('month', OLD.paid_at AT TIME ZONE 'UTC')::date, invoice_currency, -1, -OLD.amount)
+      ON CONFLICT (month, currency) DO UPDATE
+        SET payments_count = r.payments_count + EXCLUDED.payments_count,
+            paid_amount = r.paid_amount + EXCLUDED.paid_amount;
+    END IF;
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    SELECT currency INTO invoice_currency FROM invoices WHERE id = NEW.invoice_id;
+    INSERT INTO payment_monthly_rollups AS r (month, currency, payments_count, paid_amount)
+    VALUES (date_trunc('month', NEW.paid_at AT TIME ZONE 'UTC')::date, invoice_currency, 1, NEW.amount)
+    ON CONFLICT (month, currency) DO UPDATE
+      SET payments_count = r.payments_count + EXCLUDED.payments_count,
+          paid_amount = r.paid_amount + EXCLUDED.paid_amount;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_invoices_report_rollup
+  AFTER INSERT OR UPDATE ON invoices
+  FOR EACH ROW EXECUTE FUNCTION report_rollup_invoices_trigger();
+
+CREATE TRIGGER trg_invoices_report_rollup_delete
+  BEFORE DELETE ON invoices
+  FOR EACH ROW EXECUTE FUNCTION report_rollup_invoices_trigger();
+
+CREATE TRIGGER trg_invoice_items_report_rollup
+  AFTER INSERT OR UPDATE OR DELETE ON invoice_items
+  FOR EACH ROW EXECUTE FUNCTION report_rollup_invoice_items_trigger();
+
+CREATE TRIGGER trg_payments_report_rollup
+  AFTER INSERT OR UPDATE OR DELETE ON payments
+  FOR EACH ROW EXECUTE FUNCTION report_rollup_payments_trigger();
+
 -- Movimientos de inventario
 CREATE TABLE inventory_movements (
   id SERIAL PRIMARY KEY,
@@ -685,7 +907,7 @@ CREATE TABLE payroll_records (
   paid_at TIMESTAMPTZ,
   created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
   updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
-  CONSTRAINT uq_payroll_employee_period UNIQUE (employee_id, period_id)
+  CONSTRAINT uq_payroll_period_employee UNIQUE (period_id, employee_id)
 );
 
 CREATE INDEX idx_payroll_records_employee ON payroll_records(employee_id);
@@ -724,6 +946,31 @@ CREATE INDEX idx_audit_logs_user ON audit_logs(user_id);
 
 CREATE INDEX idx_audit_logs_entity ON audit_logs(entity, entity_id);
 
+-- =============================
+-- Outbox de correos (ss1-backend-python/migrations/0002_email_outbox.sql)
+-- =============================
+CREATE TABLE email_outbox (
+  id BIGSERIAL PRIMARY KEY,
+  to_email VARCHAR(255) NOT NULL,
+  subject VARCHAR(255) NOT NULL,
+  body_text TEXT,
+  -- se limpia al enviarse (puede contener contraseñas temporales o códigos 2FA)
+  category VARCHAR(50) NOT NULL DEFAULT 'GENERAL',
+  status VARCHAR(20) NOT NULL DEFAULT 'PENDING',
+  -- PENDING, SENDING, SENT, FAILED
+  attempts INTEGER NOT NULL DEFAULT 0,
+  next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  last_error TEXT,
+  sent_at TIMESTAMPTZ,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  CONSTRAINT chk_email_outbox_status CHECK (status IN ('PENDING', 'SENDING', 'SENT', 'FAILED'))
+);
+
+CREATE INDEX idx_email_outbox_due ON email_outbox(next_attempt_at)
+WHERE
+  status IN ('PENDING', 'SENDING');
+
 -- =============================
 -- Agenda por especialidad (mínimo)
 -- Disponibilidad semanal del profesional
@@ -751,7 +998,7 @@ CREATE TABLE employee_availability (
 
 CREATE INDEX idx_employee_availability_employee ON employee_availability(employee_id);
 CREATE INDEX idx_employee_availability_specialty ON employee_availability(specialty_id);
-CREATE INDEX idx_employee_availability_day ON employee_availability(day_of_week);
+CREATE INDEX idx_employee_availability_day_active ON employee_availability(day_of_week, is_active, specialty_id);
 
 
 
@@ -0,0 +1,23 @@
+"""Punto de partida: esquema de creation.sql con migrations/0001-0003 aplicadas
+
+Las bases existentes se marcan con `alembic stamp 0003` (no ejecuta nada).
+Las revisiones siguientes reemplazan a los scripts de migrations/.
+
+Revision ID: 0003
+Revises:
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+revision: str = "0003"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    pass
+
+
+def downgrade() -> None:
+    pass
@@ -0,0 +1,79 @@
+"""Índices compuestos según las consultas de los repositorios
+
+Cada índice sigue la forma de una consulta frecuente: columnas de igualdad
+primero, luego el rango u orden. Los índices de una sola columna que quedan
+como prefijo de uno compuesto se eliminan (el compuesto los cubre).
+
+Todo se construye CONCURRENTLY (app.db.migration_ops): se puede aplicar con
+la clínica en operación sin bloquear las escrituras de appointments.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from app.db.migration_ops import (
+    add_unique_constraint_using_index,
+    create_index_concurrently,
+    drop_constraint,
+    drop_index_concurrently,
+)
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nuevo índice, tabla, columnas, índice de una columna que reemplaza, su columna)
+COMPOSITE_INDEXES = [
+    # Agenda del profesional: conflictos, disponibilidad, "mis citas" (ORDER BY start_datetime)
+    ("idx_appointments_professional_start", "appointments", ["professional_id", "start_datetime", "status"],
+     "idx_appointments_professional", "professional_id"),
+    # Citas de un paciente ordenadas por fecha
+    ("idx_appointments_patient_start", "appointments", ["patient_id", "start_datetime"],
+     "idx_appointments_patient", "patient_id"),
+    # Horarios activos por día de la semana y especialidad
+    ("idx_employee_availability_day_active", "employee_availability", ["day_of_week", "is_active", "specialty_id"],
+     "idx_employee_availability_day", "day_of_week"),
+    # Expedientes de un paciente ordenados por fecha de creación
+    ("idx_clinical_records_patient_created", "clinical_records", ["patient_id", "created_at"],
+     "idx_clinical_records_patient", "patient_id"),
+    # Sesiones de un expediente ordenadas por fecha
+    ("idx_sessions_record_datetime", "sessions", ["clinical_record_id", "session_datetime"],
+     "idx_sessions_record", "clinical_record_id"),
+]
+
+REPORT_INDEXES = [
+    # Reportes de ingresos/ventas: rango de fechas + moneda + estado
+    ("idx_invoices_date_currency_status", "invoices", ["invoice_date", "currency", "status"]),
+    # Reportes de cobros por rango de fecha de pago
+    ("idx_payments_paid_at", "payments", ["paid_at"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns, replaced, _ in COMPOSITE_INDEXES:
+        create_index_concurrently(name, table, columns)
+        drop_index_concurrently(replaced)
+
+    for name, table, columns in REPORT_INDEXES:
+        create_index_concurrently(name, table, columns)
+
+    # Nómina de un período (cálculo, listados): period_id primero.
+    # ON CONFLICT (employee_id, period_id) sigue resolviendo contra esta restricción;
+    # las búsquedas por empleado usan idx_payroll_records_employee.
+    add_unique_constraint_using_index("payroll_records", "uq_payroll_period_employee", ["period_id", "employee_id"])
+    drop_constraint("payroll_records", "uq_payroll_employee_period")
+
+
+def downgrade() -> None:
+    add_unique_constraint_using_index("payroll_records", "uq_payroll_employee_period", ["employee_id", "period_id"])
+    drop_constraint("payroll_records", "uq_payroll_period_employee")
+
+    for name, _, _ in REPORT_INDEXES:
+        drop_index_concurrently(name)
+
+    for name, table, _, replaced, column in COMPOSITE_INDEXES:
+        create_index_concurrently(replaced, table, [column])
+        drop_index_concurrently(name)
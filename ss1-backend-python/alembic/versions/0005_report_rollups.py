@@ -0,0 +1,283 @@
+"""Acumulados mensuales para /reports/revenue y /reports/sales
+
+Tres tablas pequeñas (una fila por mes y clave) que los reportes leen cuando el
+rango pedido son meses completos, en lugar de recorrer invoices, invoice_items
+y payments:
+
+- invoice_monthly_rollups (mes, moneda, estado): facturas y monto facturado
+- payment_monthly_rollups (mes UTC de paid_at, moneda de la factura): pagos y monto
+- invoice_item_monthly_rollups (mes de la factura, SERVICE/PRODUCT, id): items,
+  cantidad y monto
+
+Se mantienen con triggers por fila que suman o restan la diferencia
+(INSERT ... ON CONFLICT DO UPDATE), así que también reflejan las escrituras de
+ss1-backend-node. Al borrar una factura, el trigger BEFORE DELETE descuenta la
+factura con sus items y pagos; los borrados en cascada de esos items y pagos
+ya no encuentran la factura y no vuelven a descontarse.
+
+Durante la carga inicial las escrituras de facturación (invoices, invoice_items,
+payments) esperan; las lecturas y la agenda no se bloquean. Para
+reconstruirlos después: app.services.reports.report_rollups.rebuild_report_rollups.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.core.config import settings
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = """
+CREATE TABLE IF NOT EXISTS invoice_monthly_rollups (
+  month DATE NOT NULL,
+  currency VARCHAR(10) NOT NULL,
+  status VARCHAR(20) NOT NULL,
+  invoices_count INTEGER NOT NULL DEFAULT 0,
+  invoiced_amount NUMERIC(14, 2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (month, currency, status)
+);
+
+CREATE TABLE IF NOT EXISTS payment_monthly_rollups (
+  month DATE NOT NULL,
+  currency VARCHAR(10) NOT NULL,
+  payments_count INTEGER NOT NULL DEFAULT 0,
+  paid_amount NUMERIC(14, 2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (month, currency)
+);
+
+CREATE TABLE IF NOT EXISTS invoice_item_monthly_rollups (
+  month DATE NOT NULL,
+  item_type VARCHAR(10) NOT NULL,
+  item_id INTEGER NOT NULL,
+  items_count INTEGER NOT NULL DEFAULT 0,
+  quantity NUMERIC(14, 2) NOT NULL DEFAULT 0,
+  items_amount NUMERIC(14, 2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (month, item_type, item_id)
+);
+"""
+
+FUNCTIONS = """
+-- Sumar (sign = 1) o restar (sign = -1) una factura en invoice_monthly_rollups
+CREATE OR REPLACE FUNCTION report_rollup_invoice(inv invoices, sign INTEGER) RETURNS void AS $$
+BEGIN
+  INSERT INTO invoice_monthly_rollups AS r (month, currency, status, invoices_count, invoiced_amount)
+  VALUES (date_trunc('month', inv.invoice_date)::date, inv.currency, inv.status, sign, sign * inv.total_amount)
+  ON CONFLICT (month, currency, status) DO UPDATE
+    SET invoices_count = r.invoices_count + EXCLUDED.invoices_count,
+        invoiced_amount = r.invoiced_amount + EXCLUDED.invoiced_amount;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Sumar o restar los items de una factura (con el mes de esa factura)
+CREATE OR REPLACE FUNCTION report_rollup_invoice_items(inv invoices, sign INTEGER) RETURNS void AS $$
+BEGIN
+  INSERT INTO invoice_item_monthly_rollups AS r (month, item_type, item_id, items_count, quantity, items_amount)
+  SELECT date_trunc('month', inv.invoice_date)::date,
+         CASE WHEN i.service_id IS NOT NULL THEN 'SERVICE' ELSE 'PRODUCT' END,
+         COALESCE(i.service_id, i.product_id),
+         sign * count(*), sign * sum(i.quantity), sign * sum(i.total_amount)
+  FROM invoice_items i
+  WHERE i.invoice_id = inv.id
+  GROUP BY 2, 3
+  ON CONFLICT (month, item_type, item_id) DO UPDATE
+    SET items_count = r.items_count + EXCLUDED.items_count,
+        quantity = r.quantity + EXCLUDED.quantity,
+        items_amount = r.items_amount + EXCLUDED.items_amount;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Sumar o restar los pagos de una factura (con la moneda de esa factura)
+CREATE OR REPLACE FUNCTION report_rollup_invoice_payments(inv invoices, sign INTEGER) RETURNS void AS $$
+BEGIN
+  INSERT INTO payment_monthly_rollups AS r (month, currency, payments_count, paid_amount)
+  SELECT date_trunc('month', p.paid_at AT TIME ZONE 'UTC')::date, inv.currency, sign * count(*), sign * sum(p.amount)
+  FROM payments p
+  WHERE p.invoice_id = inv.id
+  GROUP BY 1
+  ON CONFLICT (month, currency) DO UPDATE
+    SET payments_count = r.payments_count + EXCLUDED.payments_count,
+        paid_amount = r.paid_amount + EXCLUDED.paid_amount;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION report_rollup_invoices_trigger() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    -- BEFORE DELETE: la factura todavía tiene sus items y pagos
+    PERFORM report_rollup_invoice(OLD, -1);
+    PERFORM report_rollup_invoice_items(OLD, -1);
+    PERFORM report_rollup_invoice_payments(OLD, -1);
+    RETURN OLD;
+  END IF;
+
+  IF TG_OP = 'INSERT' THEN
+    PERFORM report_rollup_invoice(NEW, 1);
+    RETURN NULL;
+  END IF;
+
+  IF (OLD.invoice_date, OLD.currency, OLD.status, OLD.total_amount)
+     IS DISTINCT FROM (NEW.invoice_date, NEW.currency, NEW.status, NEW.total_amount) THEN
+    PERFORM report_rollup_invoice(OLD, -1);
+    PERFORM report_rollup_invoice(NEW, 1);
+  END IF;
+  IF date_trunc('month', OLD.invoice_date) IS DISTINCT FROM date_trunc('month', NEW.invoice_date) THEN
+    PERFORM report_rollup_invoice_items(OLD, -1);
+    PERFORM report_rollup_invoice_items(NEW, 1);
+  END IF;
+  IF OLD.currency IS DISTINCT FROM NEW.currency THEN
+    PERFORM report_rollup_invoice_payments(OLD, -1);
+    PERFORM report_rollup_invoice_payments(NEW, 1);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION report_rollup_invoice_items_trigger() RETURNS trigger AS $$
+DECLARE
+  item_month DATE;
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    SELECT date_trunc('month', invoice_date)::date INTO item_month FROM invoices WHERE id = OLD.invoice_id;
+    -- Sin factura: borrado en cascada, ya descontado por report_rollup_invoices_trigger
+    IF FOUND THEN
+      INSERT INTO invoice_item_monthly_rollups AS r (month, item_type, item_id, items_count, quantity, items_amount)
+      VALUES (item_month, CASE WHEN OLD.service_id IS NOT NULL THEN 'SERVICE' ELSE 'PRODUCT' END,
+              COALESCE(OLD.service_id, OLD.product_id), -1, -OLD.quantity, -OLD.total_amount)
+      ON CONFLICT (month, item_type, item_id) DO UPDATE
+        SET items_count = r.items_count + EXCLUDED.items_count,
+            quantity = r.quantity + EXCLUDED.quantity,
+            items_amount = r.items_amount + EXCLUDED.items_amount;
+    END IF;
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    SELECT date_trunc('month', invoice_date)::date INTO item_month FROM invoices WHERE id = NEW.invoice_id;
+    INSERT INTO invoice_item_monthly_rollups AS r (month, item_type, item_id, items_count, quantity, items_amount)
+    VALUES (item_month, CASE WHEN NEW.service_id IS NOT NULL THEN 'SERVICE' ELSE 'PRODUCT' END,
+            COALESCE(NEW.service_id, NEW.product_id), 1, NEW.quantity, NEW.total_amount)
+    ON CONFLICT (month, item_type, item_id) DO UPDATE
+      SET items_count = r.items_count + EXCLUDED.items_count,
+          quantity = r.quantity + EXCLUDED.quantity,
+          items_amount = r.items_amount + EXCLUDED.items_amount;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION report_rollup_payments_trigger() RETURNS trigger AS $$
+DECLARE
+  invoice_currency VARCHAR(10);
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    SELECT currency INTO invoice_currency FROM invoices WHERE id = OLD.invoice_id;
+    -- Sin factura: borrado en cascada, ya descontado por report_rollup_invoices_trigger
+    IF FOUND THEN
+      INSERT INTO payment_monthly_rollups AS r (month, currency, payments_count, paid_amount)
+      VALUES (date_trunc('month', OLD.paid_at AT TIME ZONE 'UTC')::date, invoice_currency, -1, -OLD.amount)
+      ON CONFLICT (month, currency) DO UPDATE
+        SET payments_count = r.payments_count + EXCLUDED.payments_count,
+            paid_amount = r.paid_amount + EXCLUDED.paid_amount;
+    END IF;
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    SELECT currency INTO invoice_currency FROM invoices WHERE id = NEW.invoice_id;
+    INSERT INTO payment_monthly_rollups AS r (month, currency, payments_count, paid_amount)
+    VALUES (date_trunc('month', NEW.paid_at AT TIME ZONE 'UTC')::date, invoice_currency, 1, NEW.amount)
+    ON CONFLICT (month, currency) DO UPDATE
+      SET payments_count = r.payments_count + EXCLUDED.payments_count,
+          paid_amount = r.paid_amount + EXCLUDED.paid_amount;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+TRIGGERS = """
+DROP TRIGGER IF EXISTS trg_invoices_report_rollup ON invoices;
+CREATE TRIGGER trg_invoices_report_rollup
+  AFTER INSERT OR UPDATE ON invoices
+  FOR EACH ROW EXECUTE FUNCTION report_rollup_invoices_trigger();
+
+DROP TRIGGER IF EXISTS trg_invoices_report_rollup_delete ON invoices;
+CREATE TRIGGER trg_invoices_report_rollup_delete
+  BEFORE DELETE ON invoices
+  FOR EACH ROW EXECUTE FUNCTION report_rollup_invoices_trigger();
+
+DROP TRIGGER IF EXISTS trg_invoice_items_report_rollup ON invoice_items;
+CREATE TRIGGER trg_invoice_items_report_rollup
+  AFTER INSERT OR UPDATE OR DELETE ON invoice_items
+  FOR EACH ROW EXECUTE FUNCTION report_rollup_invoice_items_trigger();
+
+DROP TRIGGER IF EXISTS trg_payments_report_rollup ON payments;
+CREATE TRIGGER trg_payments_report_rollup
+  AFTER INSERT OR UPDATE OR DELETE ON payments
+  FOR EACH ROW EXECUTE FUNCTION report_rollup_payments_trigger();
+"""
+
+
+def upgrade() -> None:
+    op.execute(TABLES)
+    op.execute(FUNCTIONS)
+
+    # Carga inicial y triggers en la misma transacción: las escrituras de facturación
+    # esperan al bloqueo (SHARE) y las suman los triggers, sin perderse ni contarse dos veces
+    op.execute(f"SET LOCAL lock_timeout = '{settings.MIGRATION_LOCK_TIMEOUT}'")
+    op.execute("LOCK TABLE invoices, invoice_items, payments IN SHARE MODE")
+    op.execute("DELETE FROM invoice_monthly_rollups")
+    op.execute("DELETE FROM payment_monthly_rollups")
+    op.execute("DELETE FROM invoice_item_monthly_rollups")
+    op.execute(
+        """
+        INSERT INTO invoice_monthly_rollups (month, currency, status, invoices_count, invoiced_amount)
+        SELECT date_trunc('month', invoice_date)::date, currency, status, count(*), sum(total_amount)
+        FROM invoices
+        GROUP BY 1, 2, 3
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO payment_monthly_rollups (month, currency, payments_count, paid_amount)
+        SELECT date_trunc('month', p.paid_at AT TIME ZONE 'UTC')::date, inv.currency, count(*), sum(p.amount)
+        FROM payments p
+        JOIN invoices inv ON inv.id = p.invoice_id
+        GROUP BY 1, 2
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO invoice_item_monthly_rollups (month, item_type, item_id, items_count, quantity, items_amount)
+        SELECT date_trunc('month', inv.invoice_date)::date,
+               CASE WHEN i.service_id IS NOT NULL THEN 'SERVICE' ELSE 'PRODUCT' END,
+               COALESCE(i.service_id, i.product_id),
+               count(*), sum(i.quantity), sum(i.total_amount)
+        FROM invoice_items i
+        JOIN invoices inv ON inv.id = i.invoice_id
+        GROUP BY 1, 2, 3
+        """
+    )
+    op.execute(TRIGGERS)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_payments_report_rollup ON payments")
+    op.execute("DROP TRIGGER IF EXISTS trg_invoice_items_report_rollup ON invoice_items")
+    op.execute("DROP TRIGGER IF EXISTS trg_invoices_report_rollup_delete ON invoices")
+    op.execute("DROP TRIGGER IF EXISTS trg_invoices_report_rollup ON invoices")
+    op.execute("DROP FUNCTION IF EXISTS report_rollup_payments_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS report_rollup_invoice_items_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS report_rollup_invoices_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS report_rollup_invoice_payments(invoices, INTEGER)")
+    op.execute("DROP FUNCTION IF EXISTS report_rollup_invoice_items(invoices, INTEGER)")
+    op.execute("DROP FUNCTION IF EXISTS report_rollup_invoice(invoices, INTEGER)")
+    op.execute("DROP TABLE IF EXISTS invoice_item_monthly_rollups")
+    op.execute("DROP TABLE IF EXISTS payment_monthly_rollups")
+    op.execute("DROP TABLE IF EXISTS invoice_monthly_rollups")
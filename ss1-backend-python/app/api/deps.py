@@ -1,13 +1,17 @@
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from typing import Callable
 
 from app.core.config import settings
 from app.core.security import decode_token
-from app.core.permissions import Permission
-from app.db.session import get_db
+from app.core.permissions import Permission, permissions_mask, role_permissions_mask
+from app.db.session import READ_AFTER_WRITE_COOKIE, ReadSessionLocal, SessionLocal, get_db, reads_own_writes
 from app.db.repositories.users_repo import UsersRepo
+from app.services.auth.auth_service import AuthService
+from app.services.auth.principal_cache import principal_cache
+from app.services.container import ServiceContainer
+from app.services.mail_outbox import OutboxMailer
 
 bearer = HTTPBearer(auto_error=False)
 
@@ -22,19 +26,47 @@ async def get_current_user(
     if not payload or "sub" not in payload:
         raise HTTPException(status_code=401, detail="Token inválido")
 
-    users = UsersRepo(db)
     # sub puede ser int o string, asegurar que sea int
     user_id = payload["sub"] if isinstance(payload["sub"], int) else int(payload["sub"])
+
+    # Reutilizar el usuario en caché para evitar el join de rol/permisos/empleado/paciente
+    user = principal_cache.get(user_id)
+    if user is not None:
+        return user
+
+    users = UsersRepo(db)
     user = await users.find_by_id(user_id)
     if not user or not user.is_active:
         raise HTTPException(status_code=401, detail="Token inválido")
 
     # Agregar lista de permisos como atributo
     user.permissions = [p.code for p in user.role.permissions] if user.role and user.role.permissions else []
+    # Máscara de bits para require_permissions, calculada una vez por entrada de la caché
+    user.permissions_mask = role_permissions_mask(user.role)
 
+    principal_cache.set(user_id, user)
     return user
 
 
+def get_read_session_factory(request: Request) -> async_sessionmaker[AsyncSession]:
+    """
+    Fábrica de sesiones para consultas de solo lectura: la réplica
+    (READ_DATABASE_URL) salvo que el cliente haya escrito hace poco (cookie de
+    read-your-writes, ver ReadYourWritesMiddleware), en cuyo caso la primaria.
+    """
+    if reads_own_writes(request.cookies.get(READ_AFTER_WRITE_COOKIE)):
+        return SessionLocal
+    return ReadSessionLocal
+
+
+async def get_read_db(
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_read_session_factory),
+) -> AsyncSession:
+    """Sesión para consultas de solo lectura (ver get_read_session_factory)"""
+    async with session_factory() as session:
+        yield session
+
+
 def require_permissions(*required_permissions: Permission) -> Callable:
     """
     Dependencia para verificar que el usuario tenga los permisos requeridos.
@@ -43,21 +75,36 @@ def require_permissions(*required_permissions: Permission) -> Callable:
         async def get_patients(user = Depends(require_permissions(Permission.VIEW_PATIENTS))):
             ...
     """
+    # Compilar una sola vez los permisos requeridos por la ruta
+    required_mask = permissions_mask(required_permissions)
+
     async def permission_checker(user = Depends(get_current_user)):
-        # SUPER_ADMIN tiene acceso a todo
-        if user.role and user.role.name == 'SUPER_ADMIN':
-            return user
-        
-        user_permissions = getattr(user, 'permissions', [])
-        
-        for perm in required_permissions:
-            if perm.value not in user_permissions:
-                raise HTTPException(
-                    status_code=403,
-                    detail="No tienes permisos suficientes para realizar esta acción."
-                )
-        
+        # SUPER_ADMIN tiene todos los bits encendidos, así que pasa siempre
+        if user.permissions_mask & required_mask != required_mask:
+            raise HTTPException(
+                status_code=403,
+                detail="No tienes permisos suficientes para realizar esta acción."
+            )
+
         return user
-    
+
     return permission_checker
 
+
+def get_services(request: Request) -> ServiceContainer:
+    """Contenedor de servicios creado en el lifespan de la aplicación"""
+    return request.app.state.services
+
+
+def get_mailer(
+    db: AsyncSession = Depends(get_db),
+    services: ServiceContainer = Depends(get_services),
+) -> OutboxMailer:
+    return services.mailer(db)
+
+
+def get_auth_service(
+    db: AsyncSession = Depends(get_db),
+    services: ServiceContainer = Depends(get_services),
+) -> AuthService:
+    return services.auth_service(db)
@@ -0,0 +1,42 @@
+"""
+Serialización de respuestas.
+
+- ORJSONResponse es la clase de respuesta por defecto de la aplicación:
+  orjson serializa datetime/date/UUID de forma nativa y Decimal como número.
+- model_response() serializa directamente a bytes un resultado (ORM o dict)
+  con el serializador precompilado de su modelo de respuesta. Al devolver una
+  Response, FastAPI omite la segunda validación de response_model y el paso
+  por jsonable_encoder; response_model se conserva en la ruta para OpenAPI.
+"""
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse as _ORJSONResponse
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+
+def _orjson_default(value: Any):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Tipo no serializable a JSON: {type(value).__name__}")
+
+
+class ORJSONResponse(_ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+@lru_cache(maxsize=None)
+def _adapter(model) -> TypeAdapter:
+    # Un TypeAdapter por modelo: el validador/serializador se compila una sola vez
+    return TypeAdapter(model)
+
+
+def model_response(model, content: Any, status_code: int = 200) -> Response:
+    """Validar `content` (atributos ORM incluidos) contra `model` y serializarlo a JSON en un paso"""
+    adapter = _adapter(model)
+    value = adapter.validate_python(content, from_attributes=True)
+    return Response(adapter.dump_json(value, by_alias=True), status_code=status_code, media_type="application/json")
@@ -1,62 +1,141 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-from datetime import date
+from datetime import date, datetime, timezone
 
 from app.db.session import get_db
-from app.api.deps import require_permissions, get_current_user
+from app.api.deps import require_permissions, get_current_user, get_read_db
+from app.api.responses import model_response
 from app.core.permissions import Permission
 from app.db.repositories.appointments_repo import AppointmentsRepository
 from app.api.routes.appointments_schemas import (
     CheckAvailabilityRequest,
     AvailabilityResponse,
+    AvailabilityRangeResponse,
+    NextAvailableResponse,
     AppointmentCreate,
+    AppointmentBulkCreate,
+    AppointmentBulkResponse,
     AppointmentUpdate,
     AppointmentResponse,
     AppointmentListResponse,
+    MAX_BULK_APPOINTMENTS,
 )
 
 router = APIRouter(prefix="/appointments", tags=["appointments"])
 
+# Máximo de días que se pueden consultar en una sola petición de disponibilidad
+MAX_AVAILABILITY_RANGE_DAYS = 31
+
+# Horizonte máximo (días) de la búsqueda del próximo slot libre
+MAX_NEXT_AVAILABLE_DAYS = 90
+
 
 # ============================================
 # A) Consultar disponibilidad
 # ============================================
-@router.get("/availability", response_model=AvailabilityResponse)
+@router.get("/availability", response_model=AvailabilityResponse | AvailabilityRangeResponse)
 async def check_availability(
-    date_str: str = Query(..., alias="date", description="Fecha en formato YYYY-MM-DD"),
+    date_str: Optional[str] = Query(None, alias="date", description="Fecha en formato YYYY-MM-DD"),
+    from_date: Optional[str] = Query(None, alias="from", description="Fecha inicio YYYY-MM-DD"),
+    to_date: Optional[str] = Query(None, alias="to", description="Fecha fin YYYY-MM-DD"),
     specialtyId: Optional[int] = Query(None, alias="specialtyId"),
     professionalId: Optional[int] = Query(None, alias="professionalId"),
-    db: AsyncSession = Depends(get_db),
+    slotMinutes: int = Query(60, alias="slotMinutes", ge=15, le=480, description="Duración de cada slot en minutos"),
+    db: AsyncSession = Depends(get_read_db),
     _current_user=Depends(require_permissions(Permission.VIEW_SCHEDULED_APPOINTMENTS)),
 ):
     """
-    Consultar disponibilidad de citas en una fecha específica.
+    Consultar disponibilidad de citas en una fecha específica (`date`)
+    o en un rango de fechas (`from` / `to`, máximo 31 días).
     
     Requiere permiso: VIEW_SCHEDULED_APPOINTMENTS
     Roles permitidos: ADMIN_STAFF, PSYCHOLOGIST, PSYCHIATRIST, SUPER_ADMIN
     """
+    if date_str is None and from_date is None:
+        raise HTTPException(status_code=400, detail="Debe indicar 'date' o el rango 'from' / 'to'")
+
     try:
-        target_date = date.fromisoformat(date_str)
+        if date_str is not None:
+            start = end = date.fromisoformat(date_str)
+        else:
+            start = date.fromisoformat(from_date)
+            end = date.fromisoformat(to_date) if to_date else start
     except ValueError:
         raise HTTPException(status_code=400, detail="Formato de fecha inválido. Use YYYY-MM-DD")
-    
-    result = await AppointmentsRepository.check_availability(
+
+    if end < start:
+        raise HTTPException(status_code=400, detail="La fecha 'to' debe ser mayor o igual a 'from'")
+
+    if (end - start).days + 1 > MAX_AVAILABILITY_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El rango no puede exceder {MAX_AVAILABILITY_RANGE_DAYS} días",
+        )
+
+    if date_str is not None:
+        return await AppointmentsRepository.check_availability(
+            db=db,
+            target_date=start,
+            specialty_id=specialtyId,
+            professional_id=professionalId,
+            slot_minutes=slotMinutes,
+        )
+
+    result = await AppointmentsRepository.check_availability_range(
         db=db,
-        target_date=target_date,
+        from_date=start,
+        to_date=end,
         specialty_id=specialtyId,
         professional_id=professionalId,
+        slot_minutes=slotMinutes,
     )
     
     return result
 
 
+@router.get("/next-available", response_model=NextAvailableResponse)
+async def next_available(
+    specialtyId: Optional[int] = Query(None, alias="specialtyId"),
+    areaId: Optional[int] = Query(None, alias="areaId"),
+    professionalId: Optional[int] = Query(None, alias="professionalId"),
+    after: Optional[str] = Query(None, description="Fecha (YYYY-MM-DD) o fecha y hora ISO 8601; por defecto, ahora"),
+    days: int = Query(30, ge=1, le=MAX_NEXT_AVAILABLE_DAYS, description="Días hacia adelante a revisar"),
+    limit: int = Query(5, ge=1, le=50),
+    slotMinutes: int = Query(60, alias="slotMinutes", ge=15, le=480, description="Duración de cada slot en minutos"),
+    db: AsyncSession = Depends(get_read_db),
+    _current_user=Depends(require_permissions(Permission.VIEW_SCHEDULED_APPOINTMENTS)),
+):
+    """
+    Próximos slots libres (los `limit` más tempranos) entre todos los profesionales
+    que cumplen los filtros, a partir de `after` y hasta `days` días después.
+    
+    Requiere permiso: VIEW_SCHEDULED_APPOINTMENTS
+    Roles permitidos: ADMIN_STAFF, PSYCHOLOGIST, PSYCHIATRIST, SUPER_ADMIN
+    """
+    try:
+        start = datetime.fromisoformat(after.replace('Z', '+00:00')) if after else datetime.now(timezone.utc)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Formato de fecha inválido. Use YYYY-MM-DD o ISO 8601")
+
+    return await AppointmentsRepository.find_next_available(
+        db=db,
+        after=start,
+        horizon_days=days,
+        limit=limit,
+        specialty_id=specialtyId,
+        area_id=areaId,
+        professional_id=professionalId,
+        slot_minutes=slotMinutes,
+    )
+
+
 # ============================================
 # G) Mis citas (para pacientes)
 # ============================================
 @router.get("/my-appointments", response_model=list[AppointmentResponse])
 async def get_my_appointments(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user=Depends(get_current_user),
 ):
     """
@@ -76,7 +155,7 @@ async def get_my_appointments(
         patient_id=current_user.patient.id
     )
     
-    return appointments
+    return model_response(list[AppointmentResponse], appointments)
 
 
 # ============================================
@@ -84,7 +163,7 @@ async def get_my_appointments(
 # ============================================
 @router.get("/my-professional-appointments", response_model=list[AppointmentResponse])
 async def get_my_professional_appointments(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user=Depends(get_current_user),
 ):
     """
@@ -104,7 +183,7 @@ async def get_my_professional_appointments(
         professional_id=current_user.employee.id
     )
     
-    return appointments
+    return model_response(list[AppointmentResponse], appointments)
 
 
 # ============================================
@@ -132,6 +211,37 @@ async def create_appointment(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/bulk", response_model=AppointmentBulkResponse, status_code=201)
+async def create_appointments_bulk(
+    bulk: AppointmentBulkCreate,
+    db: AsyncSession = Depends(get_db),
+    _current_user=Depends(require_permissions(Permission.CREATE_APPOINTMENTS)),
+):
+    """
+    Crear varias citas de un paciente con un profesional en una sola petición:
+    una recurrencia (WEEKLY / BIWEEKLY con `count` o `until`) a partir de la
+    primera sesión, o una lista explícita de `slots` (máximo 52 citas).
+    
+    Cada horario se valida contra las citas existentes y el horario del profesional;
+    `conflicts` indica el motivo por elemento. Sin `skip_conflicts` no se crea
+    ninguna cita si alguna choca y la respuesta es 409.
+    
+    Requiere permiso: CREATE_APPOINTMENTS
+    Roles permitidos: ADMIN_STAFF, SUPER_ADMIN
+    """
+    try:
+        result = await AppointmentsRepository.create_bulk(
+            db=db,
+            bulk_data=bulk.model_dump(),
+            max_items=MAX_BULK_APPOINTMENTS,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    status_code = 201 if result["created"] else 409
+    return model_response(AppointmentBulkResponse, result, status_code=status_code)
+
+
 # ============================================
 # C) Listar citas
 # ============================================
@@ -144,11 +254,15 @@ async def list_appointments(
     status: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Cursor de paginación (vacío para la primera página)"),
+    include_total: bool = Query(False, description="Incluir el total en modo cursor"),
+    db: AsyncSession = Depends(get_read_db),
     _current_user=Depends(require_permissions(Permission.VIEW_SCHEDULED_APPOINTMENTS)),
 ):
     """
     Listar citas con filtros y paginación.
+    Con `cursor` se usa paginación por cursor: la respuesta trae meta.next_cursor
+    y el total solo se calcula con include_total=true.
     
     Requiere permiso: VIEW_SCHEDULED_APPOINTMENTS
     Roles permitidos: ADMIN_STAFF, PSYCHOLOGIST, PSYCHIATRIST, SUPER_ADMIN
@@ -156,18 +270,23 @@ async def list_appointments(
     Nota: Si deseas que los profesionales solo vean sus propias citas,
     implementa lógica adicional basada en el rol del usuario.
     """
-    result = await AppointmentsRepository.find_all(
-        db=db,
-        from_date=from_date,
-        to_date=to_date,
-        professional_id=professionalId,
-        patient_id=patientId,
-        status=status,
-        page=page,
-        limit=limit,
-    )
+    try:
+        result = await AppointmentsRepository.find_all(
+            db=db,
+            from_date=from_date,
+            to_date=to_date,
+            professional_id=professionalId,
+            patient_id=patientId,
+            status=status,
+            page=page,
+            limit=limit,
+            cursor=cursor,
+            include_total=include_total,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return result
+    return model_response(AppointmentListResponse, result)
 
 
 # ============================================
@@ -1,6 +1,9 @@
-from pydantic import BaseModel, Field, field_validator
-from datetime import datetime
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
+from datetime import date, datetime
+from typing import Literal, Optional
+
+# Máximo de citas por solicitud de creación masiva
+MAX_BULK_APPOINTMENTS = 52
 
 
 # ============================================
@@ -32,6 +35,29 @@ class AvailabilityResponse(BaseModel):
     professionals: list[ProfessionalAvailability]
 
 
+class AvailabilityRangeResponse(BaseModel):
+    from_date: str
+    to_date: str
+    slot_minutes: int
+    days: list[AvailabilityResponse]
+
+
+class NextAvailableSlot(BaseModel):
+    start: str  # ISO 8601 datetime
+    end: str    # ISO 8601 datetime
+    employee_id: int
+    employee_name: str
+    specialty_id: Optional[int]
+    specialty_name: Optional[str]
+
+
+class NextAvailableResponse(BaseModel):
+    after: str
+    until: str
+    slot_minutes: int
+    slots: list[NextAvailableSlot]
+
+
 # ============================================
 # Schemas para Appointments
 # ============================================
@@ -104,6 +130,78 @@ class AppointmentUpdate(BaseModel):
             raise ValueError("Formato de fecha inválido. Use formato ISO 8601")
 
 
+class AppointmentSlot(BaseModel):
+    start_datetime: str  # ISO 8601 datetime string
+    end_datetime: str    # ISO 8601 datetime string
+
+    @field_validator("start_datetime", "end_datetime")
+    @classmethod
+    def validate_datetime(cls, v: str) -> str:
+        """Validar que sea un datetime válido en formato ISO"""
+        try:
+            datetime.fromisoformat(v.replace('Z', '+00:00'))
+            return v
+        except ValueError:
+            raise ValueError("Formato de fecha inválido. Use formato ISO 8601")
+
+
+class AppointmentRecurrence(BaseModel):
+    frequency: Literal["WEEKLY", "BIWEEKLY"]
+    count: Optional[int] = Field(None, ge=1, le=MAX_BULK_APPOINTMENTS)
+    until: Optional[date] = None
+
+    @model_validator(mode="after")
+    def validate_end(self):
+        """Exactamente uno de count / until"""
+        if (self.count is None) == (self.until is None):
+            raise ValueError("La recurrencia debe indicar 'count' o 'until' (solo uno)")
+        return self
+
+
+class AppointmentBulkCreate(BaseModel):
+    """
+    Varias citas del mismo paciente con el mismo profesional.
+    - recurrence: la primera sesión es start_datetime / end_datetime
+    - slots: lista explícita de horarios
+    Con skip_conflicts=false (por defecto) no se crea ninguna si alguna choca.
+    """
+    patient_id: int = Field(..., ge=1)
+    professional_id: int = Field(..., ge=1)
+    specialty_id: Optional[int] = Field(None, ge=1)
+    appointment_type: Optional[str] = Field(None, max_length=50)
+    notes: Optional[str] = None
+    start_datetime: Optional[str] = None
+    end_datetime: Optional[str] = None
+    recurrence: Optional[AppointmentRecurrence] = None
+    slots: Optional[list[AppointmentSlot]] = Field(None, min_length=1, max_length=MAX_BULK_APPOINTMENTS)
+    skip_conflicts: bool = False
+
+    @field_validator("start_datetime", "end_datetime")
+    @classmethod
+    def validate_datetime(cls, v: Optional[str]) -> Optional[str]:
+        """Validar que sea un datetime válido en formato ISO"""
+        if v is None:
+            return v
+        try:
+            datetime.fromisoformat(v.replace('Z', '+00:00'))
+            return v
+        except ValueError:
+            raise ValueError("Formato de fecha inválido. Use formato ISO 8601")
+
+    @model_validator(mode="after")
+    def validate_source(self):
+        """Exactamente uno de recurrence / slots; la recurrencia requiere la primera sesión"""
+        if (self.recurrence is None) == (self.slots is None):
+            raise ValueError("Debe indicar 'recurrence' o 'slots' (solo uno)")
+        if self.recurrence is not None and (self.start_datetime is None or self.end_datetime is None):
+            raise ValueError("La recurrencia requiere start_datetime y end_datetime de la primera sesión")
+        if self.recurrence is not None and self.recurrence.until is not None:
+            first_session = datetime.fromisoformat(self.start_datetime.replace('Z', '+00:00')).date()
+            if self.recurrence.until < first_session:
+                raise ValueError("'until' no puede ser anterior a la primera sesión")
+        return self
+
+
 class AppointmentResponse(BaseModel):
     id: int
     patient_id: int
@@ -129,3 +227,16 @@ class AppointmentResponse(BaseModel):
 class AppointmentListResponse(BaseModel):
     data: list[AppointmentResponse]
     meta: dict
+
+
+class AppointmentBulkConflict(BaseModel):
+    index: int
+    start_datetime: datetime
+    end_datetime: datetime
+    reason: Literal["OUTSIDE_AVAILABILITY", "OVERLAP", "DUPLICATE"]
+    conflicting_appointment_id: Optional[int] = None
+
+
+class AppointmentBulkResponse(BaseModel):
+    created: list[AppointmentResponse]
+    conflicts: list[AppointmentBulkConflict]
@@ -1,13 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field, EmailStr
-from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from app.db.session import get_db
-from app.db.repositories.users_repo import UsersRepo
-from app.services.mail_mailtrap import MailService
 from app.services.auth.auth_service import AuthService
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_auth_service
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -52,10 +48,7 @@ async def health_check():
     return {"status": "ok"}
 
 @router.post("/login")
-async def login(body: LoginBody, db: AsyncSession = Depends(get_db)):
-    users = UsersRepo(db)
-    auth = AuthService(users, MailService())
-
+async def login(body: LoginBody, auth: AuthService = Depends(get_auth_service)):
     user = await auth.authenticate_user(body.emailOrUsername, body.password)
     if not user:
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
@@ -69,10 +62,7 @@ async def login(body: LoginBody, db: AsyncSession = Depends(get_db)):
     return {"twoFaRequired": True, "challengeId": challengeId}
 
 @router.post("/2fa/verify")
-async def verify_twofa(body: TwoFaVerifyBody, db: AsyncSession = Depends(get_db)):
-    users = UsersRepo(db)
-    auth = AuthService(users, MailService())
-
+async def verify_twofa(body: TwoFaVerifyBody, auth: AuthService = Depends(get_auth_service)):
     result = await auth.verify_twofa_login(body.challengeId, body.code)
     if not result["ok"]:
         raise HTTPException(status_code=401, detail=result["reason"])
@@ -83,88 +73,61 @@ async def verify_twofa(body: TwoFaVerifyBody, db: AsyncSession = Depends(get_db)
     return {"accessToken": token, "user": auth.public_user(user)}
 
 @router.get("/me")
-async def me(current_user=Depends(get_current_user), db: AsyncSession = Depends(get_db)):
-    users = UsersRepo(db)
-    auth = AuthService(users, MailService())
-    
+async def me(current_user=Depends(get_current_user), auth: AuthService = Depends(get_auth_service)):
     return {
         "user": auth.public_user(current_user)
     }
 
 @router.patch("/me")
-async def update_profile(body: UpdateProfileBody, current_user=Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+async def update_profile(body: UpdateProfileBody, current_user=Depends(get_current_user), auth: AuthService = Depends(get_auth_service)):
     """
     Actualizar datos personales del perfil del usuario autenticado.
     Permite actualizar username y datos personales (solo para pacientes).
     No permite actualizar nombres (first_name, last_name).
     """
-    users = UsersRepo(db)
-    auth = AuthService(users, MailService())
-    
     updated_user = await auth.update_profile(current_user.id, body.model_dump(exclude_unset=True))
     return {
         "user": auth.public_user(updated_user)
     }
 
 @router.post("/2fa/enable/request")
-async def request_enable_2fa(current_user=Depends(get_current_user), db: AsyncSession = Depends(get_db)):
-    users = UsersRepo(db)
-    auth = AuthService(users, MailService())
-
+async def request_enable_2fa(current_user=Depends(get_current_user), auth: AuthService = Depends(get_auth_service)):
     challenge_id = await auth.start_twofa(current_user.id, "enable")
     return {"challengeId": challenge_id}
 
 @router.post("/2fa/enable/confirm")
-async def confirm_enable_2fa(body: TwoFaVerifyBody, current_user=Depends(get_current_user), db: AsyncSession = Depends(get_db)):
-    users = UsersRepo(db)
-    auth = AuthService(users, MailService())
-
+async def confirm_enable_2fa(body: TwoFaVerifyBody, current_user=Depends(get_current_user), auth: AuthService = Depends(get_auth_service)):
     result = await auth.confirm_twofa_toggle(current_user.id, body.challengeId, body.code, "enable")
     if not result["ok"]:
         raise HTTPException(status_code=401, detail=result["reason"])
     return {"twoFaEnabled": True}
 
 @router.post("/2fa/disable/request")
-async def request_disable_2fa(current_user=Depends(get_current_user), db: AsyncSession = Depends(get_db)):
-    users = UsersRepo(db)
-    auth = AuthService(users, MailService())
-
+async def request_disable_2fa(current_user=Depends(get_current_user), auth: AuthService = Depends(get_auth_service)):
     challenge_id = await auth.start_twofa(current_user.id, "disable")
     return {"challengeId": challenge_id}
 
 @router.post("/2fa/disable/confirm")
-async def confirm_disable_2fa(body: TwoFaVerifyBody, current_user=Depends(get_current_user), db: AsyncSession = Depends(get_db)):
-    users = UsersRepo(db)
-    auth = AuthService(users, MailService())
-
+async def confirm_disable_2fa(body: TwoFaVerifyBody, current_user=Depends(get_current_user), auth: AuthService = Depends(get_auth_service)):
     result = await auth.confirm_twofa_toggle(current_user.id, body.challengeId, body.code, "disable")
     if not result["ok"]:
         raise HTTPException(status_code=401, detail=result["reason"])
     return {"twoFaEnabled": False}
 
 @router.post("/forgot-password")
-async def forgot_password(body: ForgotPasswordBody, db: AsyncSession = Depends(get_db)):
-    users = UsersRepo(db)
-    auth = AuthService(users, MailService())
-
+async def forgot_password(body: ForgotPasswordBody, auth: AuthService = Depends(get_auth_service)):
     await auth.request_password_reset(body.email)
     return {"message": "Si el correo existe, recibirás un código de recuperación"}
 
 @router.post("/reset-password")
-async def reset_password(body: ResetPasswordBody, db: AsyncSession = Depends(get_db)):
-    users = UsersRepo(db)
-    auth = AuthService(users, MailService())
-
+async def reset_password(body: ResetPasswordBody, auth: AuthService = Depends(get_auth_service)):
     result = await auth.reset_password(body.email, body.code, body.newPassword)
     if not result["ok"]:
         raise HTTPException(status_code=401, detail=result["reason"])
     return {"message": "Contraseña actualizada exitosamente"}
 
 @router.post("/change-password")
-async def change_password(body: ChangePasswordBody, current_user=Depends(get_current_user), db: AsyncSession = Depends(get_db)):
-    users = UsersRepo(db)
-    auth = AuthService(users, MailService())
-
+async def change_password(body: ChangePasswordBody, current_user=Depends(get_current_user), auth: AuthService = Depends(get_auth_service)):
     result = await auth.change_password(current_user.id, body.currentPassword, body.newPassword)
     if not result["ok"]:
         raise HTTPException(status_code=401, detail=result["reason"])
@@ -3,9 +3,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from typing import Optional
 
-from app.api.deps import get_db, require_permissions, get_current_user
+from app.api.deps import get_db, get_read_db, require_permissions, get_current_user
+from app.api.responses import model_response
 from app.core.permissions import Permission
 from app.db.models import ClinicalRecord, Patient, Employee
+from app.db.loader_profiles import loader_profile, reload_with_profile
+from app.db.pagination import paginate_by_cursor
 from app.api.routes.clinical_records_schemas import (
     ClinicalRecordCreate,
     ClinicalRecordUpdate,
@@ -95,9 +98,8 @@ async def create_clinical_record(
     
     db.add(new_record)
     await db.commit()
-    await db.refresh(new_record)
     
-    return new_record
+    return await reload_with_profile(db, ClinicalRecord, new_record.id)
 
 
 @router.get("", response_model=ClinicalRecordListResponse)
@@ -107,17 +109,25 @@ async def list_clinical_records(
     status: Optional[str] = Query(None, description="Filtrar por estado (ACTIVE, CLOSED)"),
     page: int = Query(1, ge=1, description="Número de página"),
     limit: int = Query(10, ge=1, le=100, description="Elementos por página"),
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Cursor de paginación (vacío para la primera página)"),
+    include_total: bool = Query(False, description="Incluir el total en modo cursor"),
+    db: AsyncSession = Depends(get_read_db),
     current_user=Depends(require_permissions(Permission.VIEW_PATIENT_CLINICAL_RECORDS)),
 ):
     """
     Listar historias clínicas con filtros.
+    Con `cursor` se usa paginación por cursor: la respuesta trae meta.next_cursor
+    y el total solo se calcula con include_total=true.
     Requiere permiso: VIEW_PATIENT_CLINICAL_RECORDS
     Roles: PSYCHOLOGIST, PSYCHIATRIST, ADMIN
     """
     
     # Construir query base
-    query = select(ClinicalRecord).order_by(ClinicalRecord.created_at.desc())
+    query = (
+        select(ClinicalRecord)
+        .options(*loader_profile(ClinicalRecord, "list"))
+        .order_by(ClinicalRecord.created_at.desc())
+    )
     
     # Aplicar filtros
     if patient_id:
@@ -135,6 +145,15 @@ async def list_clinical_records(
     # if current_user.role.name == "PSYCHOLOGIST":
     #     query = query.where(ClinicalRecord.responsible_employee_id == current_user.employee.id)
     
+    if cursor is not None:
+        try:
+            result = await paginate_by_cursor(
+                db, query, ClinicalRecord.created_at, ClinicalRecord.id, cursor, limit, include_total
+            )
+            return model_response(ClinicalRecordListResponse, result)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     # Contar total
     count_query = select(func.count()).select_from(query.subquery())
     total_result = await db.execute(count_query)
@@ -148,7 +167,7 @@ async def list_clinical_records(
     result = await db.execute(query)
     records = result.unique().scalars().all()
     
-    return {
+    return model_response(ClinicalRecordListResponse, {
         "data": records,
         "meta": {
             "total": total,
@@ -156,12 +175,12 @@ async def list_clinical_records(
             "limit": limit,
             "totalPages": (total + limit - 1) // limit if total > 0 else 0,
         },
-    }
+    })
 
 
 @router.get("/me", response_model=list[ClinicalRecordResponse])
 async def get_my_clinical_records(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user=Depends(get_current_user),  # Solo requiere estar autenticado
 ):
     """
@@ -181,6 +200,7 @@ async def get_my_clinical_records(
     # Obtener historias clínicas del paciente
     result = await db.execute(
         select(ClinicalRecord)
+        .options(*loader_profile(ClinicalRecord, "list"))
         .where(ClinicalRecord.patient_id == patient_id)
         .order_by(ClinicalRecord.created_at.desc())
     )
@@ -202,7 +222,9 @@ async def get_clinical_record(
     """
     
     result = await db.execute(
-        select(ClinicalRecord).where(ClinicalRecord.id == record_id)
+        select(ClinicalRecord)
+        .options(*loader_profile(ClinicalRecord, "detail"))
+        .where(ClinicalRecord.id == record_id)
     )
     record = result.unique().scalar_one_or_none()
     
@@ -297,6 +319,5 @@ async def update_clinical_record(
         setattr(record, field, value)
     
     await db.commit()
-    await db.refresh(record)
     
-    return record
+    return await reload_with_profile(db, ClinicalRecord, record.id)
@@ -100,7 +100,14 @@ class PaginationMeta(BaseModel):
     totalPages: int
 
 
+class CursorPaginationMeta(BaseModel):
+    """Schema para metadatos de paginación por cursor"""
+    limit: int
+    next_cursor: Optional[str]
+    total: Optional[int] = None
+
+
 class ClinicalRecordListResponse(BaseModel):
     """Schema para lista paginada de historias clínicas"""
     data: list[ClinicalRecordResponse]
-    meta: PaginationMeta
+    meta: PaginationMeta | CursorPaginationMeta
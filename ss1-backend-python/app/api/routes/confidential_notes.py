@@ -5,6 +5,7 @@ from sqlalchemy import select
 from app.api.deps import get_db, require_permissions
 from app.core.permissions import Permission
 from app.db.models import ConfidentialNote, ClinicalRecord
+from app.db.loader_profiles import loader_profile, reload_with_profile
 from app.api.routes.confidential_notes_schemas import (
     ConfidentialNoteCreate,
     ConfidentialNoteResponse,
@@ -58,9 +59,8 @@ async def create_confidential_note(
     
     db.add(new_note)
     await db.commit()
-    await db.refresh(new_note)
     
-    return new_note
+    return await reload_with_profile(db, ConfidentialNote, new_note.id)
 
 
 @router.get("/{clinical_record_id}/confidential-notes", response_model=list[ConfidentialNoteResponse])
@@ -90,6 +90,7 @@ async def list_confidential_notes(
     # Obtener notas confidenciales
     result = await db.execute(
         select(ConfidentialNote)
+        .options(*loader_profile(ConfidentialNote, "list"))
         .where(ConfidentialNote.clinical_record_id == clinical_record_id)
         .order_by(ConfidentialNote.created_at.desc())
     )
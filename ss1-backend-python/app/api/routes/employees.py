@@ -6,12 +6,13 @@ from datetime import time
 from sqlalchemy import text
 from typing import List
 
-from app.api.deps import get_db, require_permissions
+from app.api.deps import get_db, get_read_db, get_mailer, require_permissions
 from app.core.permissions import Permission
-from app.core.security import hash_value
+from app.core.security import hash_value_async
 from app.db.repositories.employees_repo import EmployeesRepo
 from app.db.repositories.users_repo import UsersRepo
-from app.services.mail_mailtrap import MailService
+from app.services.availability.schedule_grid import schedule_grid
+from app.services.mail_outbox import OutboxMailer
 from app.api.routes.employees_schemas import EmployeeCreate, EmployeeResponse
 from app.api.routes.employees_update_schemas import EmployeeUpdate
 from app.db.models import EmployeeAvailability
@@ -27,22 +28,31 @@ async def get_employees(
     status: str | None = None,
     role_id: int | None = None,
     search: str | None = None,
-    db: AsyncSession = Depends(get_db),
+    cursor: str | None = None,
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_read_db),
     current_user=Depends(require_permissions(Permission.VIEW_EMPLOYEES)),
 ):
     """
     Obtener todos los empleados con paginación.
+    Con `cursor` (vacío para la primera página) se usa paginación por cursor:
+    la respuesta trae meta.next_cursor y el total solo con include_total=true.
     Requiere permiso: VIEW_EMPLOYEES
     """
     employees_repo = EmployeesRepo(db)
-    result = await employees_repo.get_all(
-        page=page,
-        limit=limit,
-        area_id=area_id,
-        status=status,
-        role_id=role_id,
-        search=search,
-    )
+    try:
+        result = await employees_repo.get_all(
+            page=page,
+            limit=limit,
+            area_id=area_id,
+            status=status,
+            role_id=role_id,
+            search=search,
+            cursor=cursor,
+            include_total=include_total,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return result
 
 
@@ -69,6 +79,7 @@ async def get_employee(
 async def create_employee(
     employee_data: EmployeeCreate,
     db: AsyncSession = Depends(get_db),
+    mailer: OutboxMailer = Depends(get_mailer),
     current_user=Depends(require_permissions(Permission.CREATE_EMPLOYEES)),
 ):
     """
@@ -91,7 +102,7 @@ async def create_employee(
 
     # Generar contraseña aleatoria
     generated_password = generate_password()
-    hashed_password = hash_value(generated_password)
+    hashed_password = await hash_value_async(generated_password)
 
     try:
         # Crear usuario
@@ -202,15 +213,16 @@ async def create_employee(
                 db.add(availability)
             
             await db.commit()
-            await db.refresh(employee)
+            schedule_grid.invalidate_windows()
+
+        # Recargar con relaciones (usuario, área, especialidades, disponibilidad)
+        employee = await employees_repo.find_by_id(employee.id)
 
-        # Enviar correo con credenciales
-        try:
-            mail_service = MailService()
-            mail_service.send_text_email(
-                to=employee_data.email,
-                subject="Bienvenido a PsiFirm - Credenciales de Acceso",
-                text=f"""Hola {employee_data.first_name},
+        # Encolar correo con credenciales y confirmar (incluye especialidades sin disponibilidad)
+        mailer.send_text_email(
+            to=employee_data.email,
+            subject="Bienvenido a PsiFirm - Credenciales de Acceso",
+            text=f"""Hola {employee_data.first_name},
 
 Tu cuenta de empleado ha sido creada exitosamente en PsiFirm.
 
@@ -222,9 +234,9 @@ Por favor, cambia tu contraseña después de iniciar sesión por primera vez.
 
 Saludos,
 Equipo PsiFirm""",
-            )
-        except Exception as e:
-            print(f"Error al enviar correo: {e}")
+            category="WELCOME",
+        )
+        await db.commit()
 
         return employee
 
@@ -410,9 +422,10 @@ async def update_employee(
                     db.add(availability)
 
         await db.commit()
-        await db.refresh(employee)
+        # Horarios y nombre del profesional que muestra GET /appointments/availability
+        schedule_grid.invalidate_windows()
 
-        return employee
+        return await employees_repo.find_by_id(employee_id)
 
     except HTTPException:
         await db.rollback()
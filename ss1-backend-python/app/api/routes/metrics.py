@@ -0,0 +1,31 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import (
+    render_hashing_pool_metrics,
+    render_metrics,
+    render_pool_metrics,
+    render_request_metrics,
+)
+from app.core.security import hashing_pool
+from app.db.session import engine, read_engine
+
+router = APIRouter(tags=["metrics"])
+
+# Content-Type del formato de texto de Prometheus
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métricas del proceso en formato Prometheus (requests por ruta, pools de conexiones y de bcrypt)"""
+    pools = {"primary": engine.pool}
+    if read_engine is not engine:
+        pools["replica"] = read_engine.pool
+
+    body = render_metrics(
+        render_request_metrics(),
+        render_pool_metrics(pools),
+        render_hashing_pool_metrics(hashing_pool.stats()),
+    )
+    return PlainTextResponse(body, media_type=PROMETHEUS_CONTENT_TYPE)
@@ -5,6 +5,7 @@ from sqlalchemy import select
 from app.api.deps import get_db, require_permissions, get_current_user
 from app.core.permissions import Permission
 from app.db.models import PatientTask, Patient, ClinicalRecord
+from app.db.loader_profiles import loader_profile, reload_with_profile
 from app.api.routes.patient_tasks_schemas import (
     PatientTaskCreate,
     PatientTaskUpdate,
@@ -80,9 +81,8 @@ async def create_patient_task(
     
     db.add(new_task)
     await db.commit()
-    await db.refresh(new_task)
     
-    return new_task
+    return await reload_with_profile(db, PatientTask, new_task.id)
 
 
 @router.get("/me/tasks", response_model=list[PatientTaskResponse])
@@ -107,6 +107,7 @@ async def list_my_tasks(
     # Obtener tareas del paciente
     result = await db.execute(
         select(PatientTask)
+        .options(*loader_profile(PatientTask, "list"))
         .where(PatientTask.patient_id == patient_id)
         .order_by(PatientTask.created_at.desc())
     )
@@ -138,6 +139,7 @@ async def list_patient_tasks(
     # Obtener tareas
     result = await db.execute(
         select(PatientTask)
+        .options(*loader_profile(PatientTask, "list"))
         .where(PatientTask.patient_id == patient_id)
         .order_by(PatientTask.created_at.desc())
     )
@@ -187,6 +189,5 @@ async def update_patient_task(
         setattr(task, field, value)
     
     await db.commit()
-    await db.refresh(task)
     
-    return task
+    return await reload_with_profile(db, PatientTask, task.id)
@@ -6,13 +6,14 @@ import string
 import math
 from typing import Optional
 
-from app.api.deps import get_db, require_permissions
+from app.api.deps import get_db, get_read_db, get_mailer, require_permissions
+from app.api.responses import model_response
 from app.core.permissions import Permission
-from app.core.security import hash_value
+from app.core.security import hash_value_async
 from app.db.repositories.patients_repo import PatientsRepo
 from app.db.repositories.users_repo import UsersRepo
 from app.db.models import Role
-from app.services.mail_mailtrap import MailService
+from app.services.mail_outbox import OutboxMailer
 from app.api.routes.patients_schemas import (
     PatientCreate,
     PatientResponse,
@@ -27,6 +28,7 @@ router = APIRouter(prefix="/patients", tags=["patients"])
 async def create_patient(
     patient_data: PatientCreate,
     db: AsyncSession = Depends(get_db),
+    mailer: OutboxMailer = Depends(get_mailer),
     current_user=Depends(require_permissions(Permission.CREATE_PATIENTS)),
 ):
     """
@@ -60,7 +62,7 @@ async def create_patient(
 
         # Generar contraseña aleatoria
         generated_password = generate_password()
-        hashed_password = hash_value(generated_password)
+        hashed_password = await hash_value_async(generated_password)
 
         try:
             # Crear usuario
@@ -71,16 +73,11 @@ async def create_patient(
                 "role_id": patient_role.id,
                 "is_active": True,
             }
-            user = await users_repo.create(user_dict)
-            user_id = user.id
-
-            # Enviar correo con credenciales
-            try:
-                mail_service = MailService()
-                mail_service.send_text_email(
-                    to=patient_data.email,
-                    subject="Bienvenido a PsiFirm - Portal de Pacientes",
-                    text=f"""Hola {patient_data.first_name},
+            # Encolar correo con credenciales (se envía tras el commit del usuario)
+            mailer.send_text_email(
+                to=patient_data.email,
+                subject="Bienvenido a PsiFirm - Portal de Pacientes",
+                text=f"""Hola {patient_data.first_name},
 
 Tu cuenta de paciente ha sido creada exitosamente en PsiFirm.
 
@@ -94,9 +91,11 @@ Por favor, cambia tu contraseña después de iniciar sesión por primera vez.
 
 Saludos,
 Equipo PsiFirm""",
-                )
-            except Exception as e:
-                print(f"Error al enviar correo: {e}")
+                category="WELCOME",
+            )
+
+            user = await users_repo.create(user_dict)
+            user_id = user.id
 
         except HTTPException:
             # Re-lanzar HTTPExceptions para que mantengan su código de estado
@@ -153,14 +152,31 @@ async def get_patients(
     limit: int = Query(10, ge=1, le=100),
     search: Optional[str] = None,
     status: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Cursor de paginación (vacío para la primera página)"),
+    include_total: bool = Query(False, description="Incluir el total en modo cursor"),
+    db: AsyncSession = Depends(get_read_db),
     current_user=Depends(require_permissions(Permission.VIEW_PATIENTS)),
 ):
     """
     Listar y buscar pacientes con paginación.
+    Con `cursor` se usa paginación por cursor: la respuesta trae meta.next_cursor
+    y el total solo se calcula con include_total=true.
     Requiere permiso: VIEW_PATIENTS
     """
     patients_repo = PatientsRepo(db)
+
+    if cursor is not None:
+        try:
+            result = await patients_repo.find_all_by_cursor(
+                cursor=cursor,
+                limit=limit,
+                include_total=include_total,
+                search=search,
+                status=status,
+            )
+            return model_response(PatientListResponse, result)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     
     patients, total = await patients_repo.find_all(
         search=search,
@@ -169,7 +185,7 @@ async def get_patients(
         limit=limit,
     )
 
-    return {
+    return model_response(PatientListResponse, {
         "data": patients,
         "meta": {
             "total": total,
@@ -177,7 +193,29 @@ async def get_patients(
             "limit": limit,
             "totalPages": math.ceil(total / limit) if total > 0 else 0,
         },
-    }
+    })
+
+
+@router.get("/search", response_model=list[PatientResponse])
+async def search_patients(
+    q: str = Query(..., min_length=2, max_length=100, description="Nombre, apellido, email o teléfono"),
+    limit: int = Query(20, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_db),
+    current_user=Depends(require_permissions(Permission.VIEW_PATIENTS)),
+):
+    """
+    Buscar pacientes ordenados por relevancia.
+    Acepta prefijos ("jos per") y no distingue acentos ("jose perez" -> "José Pérez").
+    Requiere permiso: VIEW_PATIENTS
+    """
+    patients_repo = PatientsRepo(db)
+
+    try:
+        patients = await patients_repo.search(q, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return model_response(list[PatientResponse], patients)
 
 
 @router.get("/{patient_id}", response_model=PatientResponse)
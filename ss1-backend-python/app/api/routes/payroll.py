@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload, noload
 from typing import List
@@ -87,46 +88,55 @@ async def calculate_payroll(
             detail="Period status must be OPEN to calculate",
         )
 
-    # Obtener todos los empleados activos
-    result = await db.execute(select(Employee).where(Employee.status == "ACTIVE"))
-    employees = result.unique().scalars().all()
-
-    employees_processed = 0
+    # Una sola consulta: empleados activos + sesiones completadas del período
+    # (agrupadas por profesional) + ajustes manuales del registro existente
+    sessions_subquery = (
+        select(
+            Appointment.professional_id.label("employee_id"),
+            func.count(Appointment.id).label("sessions_count"),
+        )
+        .where(Appointment.status == "COMPLETED")
+        .where(Appointment.start_datetime >= period.period_start)
+        .where(Appointment.start_datetime <= period.period_end)
+        .group_by(Appointment.professional_id)
+        .subquery()
+    )
 
-    for employee in employees:
-        # A) Base salary
-        base_salary_amount = float(employee.base_salary or 0)
-
-        # B) Contar sesiones completadas en el período
-        sessions_result = await db.execute(
-            select(func.count(Appointment.id))
-            .where(Appointment.professional_id == employee.id)
-            .where(Appointment.status == "COMPLETED")
-            .where(Appointment.start_datetime >= period.period_start)
-            .where(Appointment.start_datetime <= period.period_end)
+    result = await db.execute(
+        select(
+            Employee.id,
+            Employee.base_salary,
+            Employee.session_rate,
+            Employee.igss_percentage,
+            func.coalesce(sessions_subquery.c.sessions_count, 0),
+            PayrollRecord.bonuses_amount,
+            PayrollRecord.other_deductions,
+        )
+        .outerjoin(sessions_subquery, sessions_subquery.c.employee_id == Employee.id)
+        .outerjoin(
+            PayrollRecord,
+            (PayrollRecord.employee_id == Employee.id) & (PayrollRecord.period_id == period_id),
         )
-        sessions_count = sessions_result.scalar() or 0
+        .where(Employee.status == "ACTIVE")
+    )
+    rows = result.all()
 
-        # C) Calcular pago por sesiones
-        session_rate = float(employee.session_rate or 0)
-        sessions_amount = sessions_count * session_rate
+    records = []
 
-        # Obtener el registro existente si hay uno
-        existing_record_result = await db.execute(
-            select(PayrollRecord)
-            .where(PayrollRecord.employee_id == employee.id)
-            .where(PayrollRecord.period_id == period_id)
-        )
-        existing_record = existing_record_result.scalar_one_or_none()
+    for employee_id, base_salary, session_rate, igss_percentage, sessions_count, bonuses, deductions in rows:
+        # A) Base salary
+        base_salary_amount = float(base_salary or 0)
+
+        # B) y C) Pago por sesiones completadas en el período
+        sessions_amount = sessions_count * float(session_rate or 0)
 
         # Mantener bonuses y other_deductions si ya existen
-        bonuses_amount = float(existing_record.bonuses_amount) if existing_record else 0
-        other_deductions = float(existing_record.other_deductions) if existing_record else 0
+        bonuses_amount = float(bonuses or 0)
+        other_deductions = float(deductions or 0)
 
         # D) Calcular IGSS
-        igss_percentage = float(employee.igss_percentage or 0)
         igss_deduction = (
-            (base_salary_amount + sessions_amount + bonuses_amount) * (igss_percentage / 100)
+            (base_salary_amount + sessions_amount + bonuses_amount) * (float(igss_percentage or 0) / 100)
         )
 
         # E) Calcular total
@@ -138,37 +148,40 @@ async def calculate_payroll(
             - other_deductions
         )
 
-        # F) UPSERT
-        if existing_record:
-            # UPDATE
-            existing_record.base_salary_amount = base_salary_amount
-            existing_record.sessions_count = sessions_count
-            existing_record.sessions_amount = sessions_amount
-            existing_record.igss_deduction = igss_deduction
-            existing_record.total_pay = total_pay
-            # No modificamos bonuses_amount ni other_deductions (ajustes manuales)
-        else:
-            # INSERT
-            new_record = PayrollRecord(
-                employee_id=employee.id,
-                period_id=period_id,
-                base_salary_amount=base_salary_amount,
-                sessions_count=sessions_count,
-                sessions_amount=sessions_amount,
-                bonuses_amount=bonuses_amount,
-                igss_deduction=igss_deduction,
-                other_deductions=other_deductions,
-                total_pay=total_pay,
-            )
-            db.add(new_record)
-
-        employees_processed += 1
+        records.append({
+            "employee_id": employee_id,
+            "period_id": period_id,
+            "base_salary_amount": base_salary_amount,
+            "sessions_count": sessions_count,
+            "sessions_amount": sessions_amount,
+            "bonuses_amount": bonuses_amount,
+            "igss_deduction": igss_deduction,
+            "other_deductions": other_deductions,
+            "total_pay": total_pay,
+        })
+
+    # F) UPSERT masivo (uq_payroll_period_employee)
+    if records:
+        stmt = pg_insert(PayrollRecord)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PayrollRecord.employee_id, PayrollRecord.period_id],
+            set_={
+                "base_salary_amount": stmt.excluded.base_salary_amount,
+                "sessions_count": stmt.excluded.sessions_count,
+                "sessions_amount": stmt.excluded.sessions_amount,
+                "igss_deduction": stmt.excluded.igss_deduction,
+                "total_pay": stmt.excluded.total_pay,
+                "updated_at": func.now(),
+                # No modificamos bonuses_amount ni other_deductions (ajustes manuales)
+            },
+        )
+        await db.execute(stmt, records)
 
     await db.commit()
 
     return {
         "message": "Payroll calculated successfully",
-        "employees_processed": employees_processed,
+        "employees_processed": len(records),
     }
 
 
@@ -201,7 +214,7 @@ async def get_period_records(
         select(PayrollRecord)
         .options(
             selectinload(PayrollRecord.employee).options(
-                selectinload(Employee.user),
+                selectinload(Employee.user).selectinload(User.role),
                 noload(Employee.payroll_records)
             ),
             noload(PayrollRecord.period)
@@ -416,7 +429,7 @@ async def get_employee_payroll_history(
     result = await db.execute(
         select(Employee)
         .options(
-            selectinload(Employee.user),
+            selectinload(Employee.user).selectinload(User.role),
             noload(Employee.payroll_records)
         )
         .where(Employee.id == employee_id)
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_
-from datetime import date
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy import DateTime, String, case, literal, select, func, and_, or_
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
 from typing import Optional
-from app.api.deps import get_db
+import math
+from app.api.deps import get_read_db, get_read_session_factory
+from app.api.responses import ORJSONResponse
 from app.db.models import (
     Invoice,
     InvoiceItem,
@@ -19,128 +22,281 @@ from app.db.models import (
     Specialty,
     Area,
 )
+from app.db.loader_profiles import loader_profile
+from app.services.reports.report_export import EXPORT_FORMATS, export_response
+from app.services.reports.report_rollups import invoiced_by_month, paid_by_month, sales_summary, whole_months
 from collections import defaultdict
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
 
+def _page_meta(total: int, page: int, limit: int) -> dict:
+    return {
+        "total": total,
+        "page": page,
+        "limit": limit,
+        "totalPages": math.ceil(total / limit) if total > 0 else 0,
+    }
+
+
 @router.get("/revenue")
 async def get_revenue_report(
     start_date: date = Query(...),
     end_date: date = Query(...),
     currency: str = Query("GTQ"),
-    db: AsyncSession = Depends(get_db),
+    include: Optional[str] = Query(None, description="Use 'details' para incluir facturas y pagos paginados"),
+    page: int = Query(1, ge=1),
+    limit: int = Query(50, ge=1, le=500),
+    export_format: str = Query("json", alias="format", pattern="^(json|csv|ndjson)$"),
+    db: AsyncSession = Depends(get_read_db),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_read_session_factory),
 ):
     """
     Reporte de ingresos por período
-    Obtiene el total de ingresos basados en facturas y pagos realizados
+    Obtiene el total de ingresos basados en facturas y pagos realizados.
+    Los totales y la agrupación por mes se calculan en la base de datos;
+    el detalle de facturas y pagos solo se incluye con include=details.
+    Con format=csv|ndjson se exporta en streaming el detalle completo
+    (una fila por factura y por pago).
+    Si el rango son meses completos, los totales salen de los acumulados
+    mensuales (invoice_monthly_rollups, payment_monthly_rollups).
     """
-    # Obtener facturas en el período
-    invoices_result = await db.execute(
-        select(Invoice)
-        .filter(
-            Invoice.invoice_date.between(start_date, end_date),
-            Invoice.currency == currency,
-            Invoice.status.in_(["ISSUED", "PAID"]),
-        )
+    invoice_statuses = ["ISSUED", "PAID"]
+    invoice_filters = (
+        Invoice.invoice_date.between(start_date, end_date),
+        Invoice.currency == currency,
+        Invoice.status.in_(invoice_statuses),
+    )
+    # paid_at es timestamptz: días completos en UTC, igual que la agrupación por mes
+    payment_filters = (
+        Payment.paid_at >= datetime.combine(start_date, time.min, tzinfo=timezone.utc),
+        Payment.paid_at < datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=timezone.utc),
+        Invoice.currency == currency,
     )
-    invoices = invoices_result.scalars().unique().all()
 
-    # Obtener pagos realizados en el período
-    payments_result = await db.execute(
-        select(Payment)
-        .join(Invoice)
-        .filter(
-            Payment.paid_at.between(start_date, end_date),
-            Invoice.currency == currency,
+    if export_format in EXPORT_FORMATS:
+        patient_name = (Patient.first_name + " " + Patient.last_name).label("patient")
+        return export_response(
+            session_factory,
+            export_format,
+            f"revenue_{start_date}_{end_date}",
+            select(
+                literal("invoice").label("type"),
+                Invoice.id,
+                Invoice.invoice_date.label("date"),
+                Invoice.invoice_number,
+                patient_name,
+                Invoice.total_amount.label("amount"),
+                Invoice.status,
+                literal(None, String).label("payment_method"),
+            )
+            .outerjoin(Patient, Patient.id == Invoice.patient_id)
+            .filter(*invoice_filters)
+            .order_by(Invoice.invoice_date, Invoice.id),
+            select(
+                literal("payment").label("type"),
+                Payment.id,
+                Payment.paid_at.label("date"),
+                Invoice.invoice_number,
+                patient_name,
+                Payment.amount.label("amount"),
+                literal(None, String).label("status"),
+                PaymentMethod.name.label("payment_method"),
+            )
+            .join(Invoice, Invoice.id == Payment.invoice_id)
+            .outerjoin(Patient, Patient.id == Invoice.patient_id)
+            .outerjoin(PaymentMethod, PaymentMethod.id == Payment.payment_method_id)
+            .filter(*payment_filters)
+            .order_by(Payment.paid_at, Payment.id),
         )
-    )
-    payments = payments_result.scalars().unique().all()
 
-    # Calcular totales
-    total_invoiced = sum(float(inv.total_amount) for inv in invoices)
-    total_paid = sum(float(pay.amount) for pay in payments)
+    months = whole_months(start_date, end_date)
+
+    if months:
+        invoices_by_month = await invoiced_by_month(db, *months, currency, invoice_statuses)
+        payments_by_month = await paid_by_month(db, *months, currency)
+    else:
+        # Facturado por mes
+        invoice_month = func.date_trunc("month", Invoice.invoice_date, type_=DateTime)
+        invoices_by_month = (
+            await db.execute(
+                select(invoice_month, func.sum(Invoice.total_amount), func.count(Invoice.id))
+                .filter(*invoice_filters)
+                .group_by(invoice_month)
+            )
+        ).all()
+
+        # Pagado por mes (paid_at es timestamptz: se agrupa en UTC)
+        payment_month = func.date_trunc("month", func.timezone("UTC", Payment.paid_at), type_=DateTime)
+        payments_by_month = (
+            await db.execute(
+                select(payment_month, func.sum(Payment.amount), func.count(Payment.id))
+                .join(Invoice)
+                .filter(*payment_filters)
+                .group_by(payment_month)
+            )
+        ).all()
 
     # Agrupar por mes
-    by_month = defaultdict(lambda: {"invoiced": 0, "paid": 0, "count": 0})
-
-    for invoice in invoices:
-        month = invoice.invoice_date.strftime("%Y-%m")
-        by_month[month]["invoiced"] += float(invoice.total_amount)
-        by_month[month]["count"] += 1
-
-    for payment in payments:
-        month = payment.paid_at.strftime("%Y-%m")
-        if month in by_month:
-            by_month[month]["paid"] += float(payment.amount)
-
-    return {
+    by_month = {}
+    total_invoiced = Decimal(0)
+    invoices_count = 0
+
+    for month, invoiced, count in invoices_by_month:
+        by_month[month.strftime("%Y-%m")] = {"invoiced": invoiced, "paid": Decimal(0), "count": count}
+        total_invoiced += invoiced
+        invoices_count += count
+
+    total_paid = Decimal(0)
+    payments_count = 0
+
+    for month, paid, count in payments_by_month:
+        key = month.strftime("%Y-%m")
+        if key in by_month:
+            by_month[key]["paid"] += paid
+        total_paid += paid
+        payments_count += count
+
+    report = {
         "period": {"start_date": start_date, "end_date": end_date},
         "currency": currency,
         "summary": {
-            "total_invoiced": total_invoiced,
-            "total_paid": total_paid,
-            "pending": total_invoiced - total_paid,
-            "invoices_count": len(invoices),
-            "payments_count": len(payments),
+            "total_invoiced": float(total_invoiced),
+            "total_paid": float(total_paid),
+            "pending": float(total_invoiced - total_paid),
+            "invoices_count": invoices_count,
+            "payments_count": payments_count,
         },
         "by_month": [
-            {"month": month, **data} for month, data in sorted(by_month.items())
-        ],
-        "invoices": [
-            {
-                "id": inv.id,
-                "invoice_number": inv.invoice_number,
-                "invoice_date": inv.invoice_date,
-                "patient": (
-                    f"{inv.patient.first_name} {inv.patient.last_name}"
-                    if inv.patient
-                    else None
-                ),
-                "total_amount": float(inv.total_amount),
-                "status": inv.status,
-            }
-            for inv in invoices
-        ],
-        "payments": [
             {
-                "id": pay.id,
-                "paid_at": pay.paid_at,
-                "amount": float(pay.amount),
-                "payment_method": pay.payment_method.name if pay.payment_method else None,
-                "invoice_number": pay.invoice.invoice_number if pay.invoice else None,
-                "patient": (
-                    f"{pay.invoice.patient.first_name} {pay.invoice.patient.last_name}"
-                    if pay.invoice and pay.invoice.patient
-                    else None
-                ),
+                "month": month,
+                "invoiced": float(data["invoiced"]),
+                "paid": float(data["paid"]),
+                "count": data["count"],
             }
-            for pay in payments
+            for month, data in sorted(by_month.items())
         ],
     }
 
+    if include != "details":
+        return ORJSONResponse(report)
+
+    offset = (page - 1) * limit
+
+    # Detalle paginado de facturas
+    invoices_result = await db.execute(
+        select(Invoice)
+        .options(*loader_profile(Invoice, "summary"))
+        .filter(*invoice_filters)
+        .order_by(Invoice.invoice_date, Invoice.id)
+        .limit(limit)
+        .offset(offset)
+    )
+    invoices = invoices_result.scalars().unique().all()
+
+    # Detalle paginado de pagos
+    payments_result = await db.execute(
+        select(Payment)
+        .options(*loader_profile(Payment, "report"))
+        .join(Invoice)
+        .filter(*payment_filters)
+        .order_by(Payment.paid_at, Payment.id)
+        .limit(limit)
+        .offset(offset)
+    )
+    payments = payments_result.scalars().unique().all()
+
+    report["invoices"] = [
+        {
+            "id": inv.id,
+            "invoice_number": inv.invoice_number,
+            "invoice_date": inv.invoice_date,
+            "patient": (
+                f"{inv.patient.first_name} {inv.patient.last_name}"
+                if inv.patient
+                else None
+            ),
+            "total_amount": float(inv.total_amount),
+            "status": inv.status,
+        }
+        for inv in invoices
+    ]
+    report["invoices_meta"] = _page_meta(invoices_count, page, limit)
+    report["payments"] = [
+        {
+            "id": pay.id,
+            "paid_at": pay.paid_at,
+            "amount": float(pay.amount),
+            "payment_method": pay.payment_method.name if pay.payment_method else None,
+            "invoice_number": pay.invoice.invoice_number if pay.invoice else None,
+            "patient": (
+                f"{pay.invoice.patient.first_name} {pay.invoice.patient.last_name}"
+                if pay.invoice and pay.invoice.patient
+                else None
+            ),
+        }
+        for pay in payments
+    ]
+    report["payments_meta"] = _page_meta(payments_count, page, limit)
+
+    return ORJSONResponse(report)
+
 
 @router.get("/payroll")
 async def get_payroll_report(
     start_date: date = Query(...),
     end_date: date = Query(...),
     employee_id: Optional[int] = Query(None),
-    db: AsyncSession = Depends(get_db),
+    export_format: str = Query("json", alias="format", pattern="^(json|csv|ndjson)$"),
+    db: AsyncSession = Depends(get_read_db),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_read_session_factory),
 ):
     """
     Reporte de pagos realizados a empleados
     Obtiene los pagos de nómina a empleados en un período
     """
+    period_filter = or_(
+        PayrollPeriod.period_start.between(start_date, end_date),
+        PayrollPeriod.period_end.between(start_date, end_date),
+    )
+
+    if export_format in EXPORT_FORMATS:
+        query = (
+            select(
+                PayrollRecord.id,
+                PayrollRecord.employee_id,
+                (Employee.first_name + " " + Employee.last_name).label("employee_name"),
+                Area.name.label("area"),
+                PayrollPeriod.period_start,
+                PayrollPeriod.period_end,
+                PayrollPeriod.status.label("period_status"),
+                PayrollRecord.base_salary_amount,
+                PayrollRecord.sessions_count,
+                PayrollRecord.sessions_amount,
+                PayrollRecord.bonuses_amount,
+                PayrollRecord.igss_deduction,
+                PayrollRecord.other_deductions,
+                PayrollRecord.total_pay,
+                PayrollRecord.paid_at,
+            )
+            .join(PayrollPeriod, PayrollPeriod.id == PayrollRecord.period_id)
+            .join(Employee, Employee.id == PayrollRecord.employee_id)
+            .outerjoin(Area, Area.id == Employee.area_id)
+            .filter(period_filter)
+            .order_by(PayrollPeriod.period_start, PayrollRecord.id)
+        )
+
+        if employee_id:
+            query = query.filter(PayrollRecord.employee_id == employee_id)
+
+        return export_response(session_factory, export_format, f"payroll_{start_date}_{end_date}", query)
+
     # Obtener registros de nómina en el período
     query = (
         select(PayrollRecord)
+        .options(*loader_profile(PayrollRecord, "report"))
         .join(PayrollPeriod)
-        .filter(
-            or_(
-                PayrollPeriod.period_start.between(start_date, end_date),
-                PayrollPeriod.period_end.between(start_date, end_date),
-            )
-        )
+        .filter(period_filter)
     )
 
     if employee_id:
@@ -170,7 +326,7 @@ async def get_payroll_report(
         summary["total_paid"] += float(record.total_pay)
         summary["total_sessions"] += record.sessions_count
 
-    return {
+    return ORJSONResponse({
         "period": {"start_date": start_date, "end_date": end_date},
         "summary": summary,
         "records": [
@@ -203,7 +359,7 @@ async def get_payroll_report(
             }
             for record in records
         ],
-    }
+    })
 
 
 @router.get("/sales")
@@ -211,15 +367,68 @@ async def get_sales_history(
     start_date: date = Query(...),
     end_date: date = Query(...),
     patient_id: Optional[int] = Query(None),
-    db: AsyncSession = Depends(get_db),
+    summary_only: bool = Query(False, description="Solo el resumen, sin el detalle de ventas"),
+    export_format: str = Query("json", alias="format", pattern="^(json|csv|ndjson)$"),
+    db: AsyncSession = Depends(get_read_db),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_read_session_factory),
 ):
     """
     Historial de ventas
-    Obtiene el detalle de todas las ventas (facturas con sus items)
+    Obtiene el detalle de todas las ventas (facturas con sus items).
+    Con format=csv|ndjson se exporta en streaming una fila por item.
+    Con summary_only=true y un rango de meses completos (sin patient_id) el
+    resumen sale de los acumulados mensuales, sin leer las facturas.
     """
+    if export_format in EXPORT_FORMATS:
+        query = (
+            select(
+                Invoice.id.label("invoice_id"),
+                Invoice.invoice_number,
+                Invoice.invoice_date,
+                Invoice.patient_id,
+                (Patient.first_name + " " + Patient.last_name).label("patient"),
+                Patient.email.label("patient_email"),
+                (Employee.first_name + " " + Employee.last_name).label("created_by"),
+                Invoice.status,
+                Invoice.currency,
+                Invoice.total_amount.label("invoice_total"),
+                InvoiceItem.id.label("item_id"),
+                case(
+                    (InvoiceItem.service_id.isnot(None), "service"),
+                    (InvoiceItem.product_id.isnot(None), "product"),
+                ).label("item_type"),
+                func.coalesce(Service.name, Product.name).label("item_name"),
+                InvoiceItem.description.label("item_description"),
+                InvoiceItem.quantity,
+                InvoiceItem.unit_price,
+                InvoiceItem.total_amount.label("item_total"),
+            )
+            .outerjoin(Patient, Patient.id == Invoice.patient_id)
+            .outerjoin(Employee, Employee.id == Invoice.created_by_employee_id)
+            .outerjoin(InvoiceItem, InvoiceItem.invoice_id == Invoice.id)
+            .outerjoin(Service, Service.id == InvoiceItem.service_id)
+            .outerjoin(Product, Product.id == InvoiceItem.product_id)
+            .filter(Invoice.invoice_date.between(start_date, end_date))
+            .order_by(Invoice.invoice_date.desc(), Invoice.id, InvoiceItem.id)
+        )
+
+        if patient_id:
+            query = query.filter(Invoice.patient_id == patient_id)
+
+        return export_response(session_factory, export_format, f"sales_{start_date}_{end_date}", query)
+
+    months = whole_months(start_date, end_date)
+    if summary_only and months and not patient_id:
+        return ORJSONResponse({
+            "period": {"start_date": start_date, "end_date": end_date},
+            "summary": await sales_summary(db, *months),
+        })
+
     # Obtener facturas en el período
-    query = select(Invoice).filter(
-        Invoice.invoice_date.between(start_date, end_date)
+    query = (
+        select(Invoice)
+        .options(*loader_profile(Invoice, "report"))
+        .filter(Invoice.invoice_date.between(start_date, end_date))
     )
 
     if patient_id:
@@ -250,13 +459,21 @@ async def get_sales_history(
                     items_stats["products_count"] += 1
                     items_stats["products_amount"] += float(item.total_amount)
 
-    return {
+    summary = {
+        "total_sales": total_sales,
+        "invoices_count": len(invoices),
+        **items_stats,
+    }
+
+    if summary_only:
+        return ORJSONResponse({
+            "period": {"start_date": start_date, "end_date": end_date},
+            "summary": summary,
+        })
+
+    return ORJSONResponse({
         "period": {"start_date": start_date, "end_date": end_date},
-        "summary": {
-            "total_sales": total_sales,
-            "invoices_count": len(invoices),
-            **items_stats,
-        },
+        "summary": summary,
         "sales": [
             {
                 "id": invoice.id,
@@ -296,7 +513,7 @@ async def get_sales_history(
             }
             for invoice in invoices
         ],
-    }
+    })
 
 
 @router.get("/patients-per-specialty")
@@ -305,16 +522,53 @@ async def get_patients_per_specialty(
     end_date: date = Query(...),
     specialty_id: Optional[int] = Query(None),
     area_id: Optional[int] = Query(None),
-    db: AsyncSession = Depends(get_db),
+    export_format: str = Query("json", alias="format", pattern="^(json|csv|ndjson)$"),
+    db: AsyncSession = Depends(get_read_db),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_read_session_factory),
 ):
     """
     Pacientes atendidos por especialidad (área)
-    Obtiene estadísticas de pacientes atendidos agrupados por especialidad y área
+    Obtiene estadísticas de pacientes atendidos agrupados por especialidad y área.
+    Con format=csv|ndjson se exporta en streaming una fila por especialidad y área.
     """
+    if export_format in EXPORT_FORMATS:
+        specialty_name = func.coalesce(Specialty.name, "Sin especialidad")
+        area_name = func.coalesce(Area.name, "Sin área")
+        appointments_count = func.count(Appointment.id)
+        query = (
+            select(
+                specialty_name.label("specialty"),
+                area_name.label("area"),
+                appointments_count.label("appointments_count"),
+                func.count(func.distinct(Appointment.patient_id)).label("unique_patients_count"),
+            )
+            .outerjoin(Specialty, Specialty.id == Appointment.specialty_id)
+            .outerjoin(Employee, Employee.id == Appointment.professional_id)
+            .outerjoin(Area, Area.id == Employee.area_id)
+            .filter(
+                Appointment.start_datetime.between(start_date, end_date),
+                Appointment.status == "COMPLETED",
+            )
+            .group_by(specialty_name, area_name)
+            .order_by(appointments_count.desc())
+        )
+
+        if specialty_id:
+            query = query.filter(Appointment.specialty_id == specialty_id)
+
+        if area_id:
+            query = query.filter(Employee.area_id == area_id)
+
+        return export_response(session_factory, export_format, f"patients_per_specialty_{start_date}_{end_date}", query)
+
     # Obtener citas completadas en el período
-    query = select(Appointment).filter(
-        Appointment.start_datetime.between(start_date, end_date),
-        Appointment.status == "COMPLETED",
+    query = (
+        select(Appointment)
+        .options(*loader_profile(Appointment, "report"))
+        .filter(
+            Appointment.start_datetime.between(start_date, end_date),
+            Appointment.status == "COMPLETED",
+        )
     )
 
     if specialty_id:
@@ -380,7 +634,7 @@ async def get_patients_per_specialty(
     # Calcular total de pacientes únicos
     total_unique_patients = len(set(app.patient_id for app in appointments))
 
-    return {
+    return ORJSONResponse({
         "period": {"start_date": start_date, "end_date": end_date},
         "summary": {
             "total_appointments": len(appointments),
@@ -388,4 +642,4 @@ async def get_patients_per_specialty(
             "specialties_count": len(specialty_stats),
         },
         "by_specialty": specialty_stats,
-    }
+    })
@@ -5,6 +5,7 @@ from sqlalchemy import select
 from app.api.deps import get_db, require_permissions
 from app.core.permissions import Permission
 from app.db.models import Session, ClinicalRecord, Employee
+from app.db.loader_profiles import loader_profile, reload_with_profile
 from app.api.routes.sessions_schemas import (
     SessionCreate,
     SessionUpdate,
@@ -89,9 +90,8 @@ async def create_session(
     
     db.add(new_session)
     await db.commit()
-    await db.refresh(new_session)
     
-    return new_session
+    return await reload_with_profile(db, Session, new_session.id)
 
 
 @router.get("/clinical-records/{clinical_record_id}/sessions", response_model=list[SessionResponse])
@@ -120,6 +120,7 @@ async def list_sessions(
     # Obtener sesiones
     result = await db.execute(
         select(Session)
+        .options(*loader_profile(Session, "list"))
         .where(Session.clinical_record_id == clinical_record_id)
         .order_by(Session.session_datetime.desc())
     )
@@ -178,6 +179,5 @@ async def update_session(
         setattr(session, field, value)
     
     await db.commit()
-    await db.refresh(session)
     
-    return session
+    return await reload_with_profile(db, Session, session.id)
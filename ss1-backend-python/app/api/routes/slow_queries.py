@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, Query
+
+from app.api.deps import require_permissions
+from app.core.permissions import Permission
+from app.db.slow_queries import slow_query_log
+from app.api.routes.slow_queries_schemas import SlowQueryListResponse
+
+router = APIRouter(prefix="/admin/slow-queries", tags=["admin"])
+
+
+@router.get("", response_model=SlowQueryListResponse)
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=500),
+    current_user=Depends(require_permissions(Permission.VIEW_AUDIT_LOGS)),
+):
+    """
+    Consultas que superaron SLOW_QUERY_THRESHOLD_MS en este proceso,
+    las más recientes primero, con la ruta y el handler que las originó.
+    Requiere permiso: VIEW_AUDIT_LOGS
+    """
+    return {
+        "threshold_ms": slow_query_log.threshold_seconds * 1000,
+        "capacity": slow_query_log.capacity,
+        "data": slow_query_log.entries(limit),
+    }
+
+
+@router.delete("", status_code=204)
+async def clear_slow_queries(
+    current_user=Depends(require_permissions(Permission.VIEW_AUDIT_LOGS)),
+):
+    """
+    Vaciar el registro de consultas lentas de este proceso.
+    Requiere permiso: VIEW_AUDIT_LOGS
+    """
+    slow_query_log.clear()
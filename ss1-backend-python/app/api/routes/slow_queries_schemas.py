@@ -0,0 +1,19 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Optional
+
+
+class SlowQueryResponse(BaseModel):
+    executed_at: datetime
+    duration_ms: float
+    statement: str
+    parameters: Optional[str] = None
+    row_count: Optional[int] = None
+    route: Optional[str] = None
+    handler: Optional[str] = None
+
+
+class SlowQueryListResponse(BaseModel):
+    threshold_ms: float
+    capacity: int
+    data: list[SlowQueryResponse]
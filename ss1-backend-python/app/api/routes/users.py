@@ -5,11 +5,12 @@ import math
 import secrets
 import string
 
-from app.api.deps import get_db, require_permissions
+from app.api.deps import get_db, get_read_db, get_mailer, require_permissions
+from app.api.responses import model_response
 from app.core.permissions import Permission
-from app.core.security import hash_value
+from app.core.security import hash_value_async
 from app.db.repositories.users_repo import UsersRepo
-from app.services.mail_mailtrap import MailService
+from app.services.mail_outbox import OutboxMailer
 from app.api.routes.users_schemas import (
     UserCreate,
     UserUpdate,
@@ -28,14 +29,33 @@ async def get_users(
     role_id: Optional[int] = None,
     is_active: Optional[bool] = None,
     search: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Cursor de paginación (vacío para la primera página)"),
+    include_total: bool = Query(False, description="Incluir el total en modo cursor"),
+    db: AsyncSession = Depends(get_read_db),
     current_user=Depends(require_permissions(Permission.VIEW_USERS)),
 ):
     """
     Listar usuarios con paginación y filtros.
+    Con `cursor` se usa paginación por cursor: la respuesta trae meta.next_cursor
+    y el total solo se calcula con include_total=true.
     Requiere permiso: VIEW_USERS
     """
     users_repo = UsersRepo(db)
+
+    if cursor is not None:
+        try:
+            result = await users_repo.find_all_by_cursor(
+                cursor=cursor,
+                limit=limit,
+                include_total=include_total,
+                role_id=role_id,
+                is_active=is_active,
+                search=search,
+            )
+            return model_response(UserListResponse, result)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     users, total = await users_repo.find_all(
         page=page,
         limit=limit,
@@ -44,7 +64,7 @@ async def get_users(
         search=search,
     )
 
-    return {
+    return model_response(UserListResponse, {
         "data": users,
         "meta": {
             "total": total,
@@ -52,7 +72,7 @@ async def get_users(
             "limit": limit,
             "totalPages": math.ceil(total / limit) if total > 0 else 0,
         },
-    }
+    })
 
 
 @router.get("/{user_id}", response_model=UserResponse)
@@ -78,6 +98,7 @@ async def get_user(
 async def create_user(
     user_data: UserCreate,
     db: AsyncSession = Depends(get_db),
+    mailer: OutboxMailer = Depends(get_mailer),
     current_user=Depends(require_permissions(Permission.CREATE_USERS)),
 ):
     """
@@ -99,21 +120,17 @@ async def create_user(
 
     # Generar contraseña aleatoria si no se proporciona
     generated_password = user_data.password or generate_password()
-    hashed_password = hash_value(generated_password)
+    hashed_password = await hash_value_async(generated_password)
 
     # Crear usuario
     user_dict = user_data.model_dump(exclude={"password"})
     user_dict["password_hash"] = hashed_password
 
-    user = await users_repo.create(user_dict)
-
-    # Enviar correo con la contraseña generada
-    try:
-        mail_service = MailService()
-        mail_service.send_text_email(
-            to=user_data.email,
-            subject="Bienvenido a PsiFirm - Credenciales de Acceso",
-            text=f"""Hola,
+    # Encolar correo con la contraseña generada (se envía tras el commit del usuario)
+    mailer.send_text_email(
+        to=user_data.email,
+        subject="Bienvenido a PsiFirm - Credenciales de Acceso",
+        text=f"""Hola,
 
 Tu cuenta ha sido creada exitosamente en PsiFirm.
 
@@ -125,10 +142,10 @@ Por favor, cambia tu contraseña después de iniciar sesión por primera vez.
 
 Saludos,
 Equipo PsiFirm""",
-        )
-    except Exception as e:
-        print(f"Error al enviar correo: {e}")
-        # No fallar la creación del usuario si falla el envío del correo
+        category="WELCOME",
+    )
+
+    user = await users_repo.create(user_dict)
 
     return user
 
@@ -10,6 +10,28 @@ class Settings(BaseModel):
 
     DATABASE_URL: str = os.getenv("DATABASE_URL", "")
 
+    # Pool de conexiones (por proceso: con N workers de uvicorn el máximo
+    # de conexiones es N * (DB_POOL_SIZE + DB_MAX_OVERFLOW))
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+    # Réplica de lectura (opcional) para reportes, listados y disponibilidad
+    READ_DATABASE_URL: str = os.getenv("READ_DATABASE_URL", "")
+    # Tras escribir, las lecturas del mismo cliente van a la primaria durante este tiempo
+    READ_AFTER_WRITE_SECONDS: float = float(os.getenv("READ_AFTER_WRITE_SECONDS", "5"))
+
+    # Registro de consultas lentas (GET /admin/slow-queries); 0 lo desactiva
+    SLOW_QUERY_THRESHOLD_MS: float = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+    SLOW_QUERY_LOG_SIZE: int = int(os.getenv("SLOW_QUERY_LOG_SIZE", "200"))
+    # Parámetros de cada consulta lenta, con los textos ocultos (solo tipo y largo)
+    SLOW_QUERY_LOG_PARAMETERS: bool = os.getenv("SLOW_QUERY_LOG_PARAMETERS", "false").lower() == "true"
+
+    # Migraciones (alembic): espera máxima por el bloqueo de una tabla en los pasos de DDL
+    MIGRATION_LOCK_TIMEOUT: str = os.getenv("MIGRATION_LOCK_TIMEOUT", "5s")
+
     JWT_ACCESS_SECRET: str = os.getenv("JWT_ACCESS_SECRET", "change-me")
     JWT_ACCESS_EXPIRES_IN: str = os.getenv("JWT_ACCESS_EXPIRES_IN", "7d")
 
@@ -21,4 +43,30 @@ class Settings(BaseModel):
     MAIL_FROM: str = os.getenv("MAIL_FROM", "")
     MAIL_FROM_NAME: str = os.getenv("MAIL_FROM_NAME", "PsiFirm")
 
+    # Outbox de correos: transporte (mailtrap | smtp | file) y despachador
+    MAIL_TRANSPORT: str = os.getenv("MAIL_TRANSPORT", "mailtrap")
+    MAIL_SMTP_HOST: str = os.getenv("MAIL_SMTP_HOST", "localhost")
+    MAIL_SMTP_PORT: int = int(os.getenv("MAIL_SMTP_PORT", "1025"))
+    MAIL_FILE_DIR: str = os.getenv("MAIL_FILE_DIR", "var/mail")
+    MAIL_OUTBOX_ENABLED: bool = os.getenv("MAIL_OUTBOX_ENABLED", "true").lower() == "true"
+    MAIL_OUTBOX_BATCH_SIZE: int = int(os.getenv("MAIL_OUTBOX_BATCH_SIZE", "20"))
+    MAIL_OUTBOX_POLL_SECONDS: float = float(os.getenv("MAIL_OUTBOX_POLL_SECONDS", "2"))
+    MAIL_OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("MAIL_OUTBOX_MAX_ATTEMPTS", "5"))
+    MAIL_OUTBOX_RETRY_BASE_SECONDS: float = float(os.getenv("MAIL_OUTBOX_RETRY_BASE_SECONDS", "10"))
+
+    # Caché del usuario autenticado (get_current_user)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+    PRINCIPAL_CACHE_MAX_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "1024"))
+
+    # Agenda precalculada de disponibilidad (GET /appointments/availability); TTL 0 la desactiva
+    SCHEDULE_GRID_TTL_SECONDS: float = float(os.getenv("SCHEDULE_GRID_TTL_SECONDS", "60"))
+    SCHEDULE_GRID_MAX_DAYS: int = int(os.getenv("SCHEDULE_GRID_MAX_DAYS", "400"))
+
+    # Reportes de facturación: leer acumulados mensuales cuando el rango son meses completos
+    REPORT_ROLLUPS_ENABLED: bool = os.getenv("REPORT_ROLLUPS_ENABLED", "true").lower() == "true"
+
+    # Pool de hashing (bcrypt)
+    HASHING_POOL_MAX_WORKERS: int = int(os.getenv("HASHING_POOL_MAX_WORKERS", "4"))
+    HASHING_POOL_MAX_QUEUE: int = int(os.getenv("HASHING_POOL_MAX_QUEUE", "64"))
+
 settings = Settings()
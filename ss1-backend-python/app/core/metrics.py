@@ -0,0 +1,146 @@
+"""
+Métricas en formato de texto de Prometheus (GET /metrics), sin dependencias.
+
+Los valores son por proceso: con varios workers de uvicorn cada uno expone
+los suyos (el scraper debe apuntar a cada worker o agregarlos).
+"""
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    return "{" + pairs + "}"
+
+
+class Histogram:
+    """
+    Histograma acumulado por combinación de labels (buckets fijos).
+    Se actualiza desde el event loop, sin locks.
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        # labels -> [conteo por bucket..., suma, conteo total]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self._series.items()):
+            labels = dict(zip(self.label_names, label_values))
+            for index, bound in enumerate(self.buckets):
+                lines.append(f"{self.name}_bucket{_labels({**labels, 'le': bound})} {series[index]}")
+            lines.append(f"{self.name}_bucket{_labels({**labels, 'le': '+Inf'})} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {series[-2]}")
+            lines.append(f"{self.name}_count{_labels(labels)} {series[-1]}")
+        return lines
+
+
+# Métricas por ruta (plantilla de la ruta, no la URL, para acotar la cardinalidad)
+REQUEST_LABELS = ("method", "route", "status")
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route.",
+    REQUEST_LABELS,
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+http_request_db_statements = Histogram(
+    "http_request_db_statements",
+    "SQL statements executed per request by route.",
+    REQUEST_LABELS,
+    (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 500, 1000),
+)
+http_request_db_duration = Histogram(
+    "http_request_db_seconds",
+    "Time spent executing SQL per request by route.",
+    REQUEST_LABELS,
+    (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+
+def render_request_metrics() -> list[str]:
+    return [
+        *http_request_duration.render(),
+        *http_request_db_statements.render(),
+        *http_request_db_duration.render(),
+    ]
+
+
+def metric_family(name: str, metric_type: str, help_text: str, samples: list[tuple[dict, float]]) -> list[str]:
+    """Líneas de una familia de métricas: # HELP, # TYPE y una línea por muestra"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(labels)} {value}")
+    return lines
+
+
+def summary_family(name: str, help_text: str, samples: list[tuple[dict, float, int]]) -> list[str]:
+    """Resumen sin cuantiles: una línea _sum y una _count por muestra (labels, suma, conteo)"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} summary"]
+    for labels, total, count in samples:
+        lines.append(f"{name}_sum{_labels(labels)} {total}")
+        lines.append(f"{name}_count{_labels(labels)} {count}")
+    return lines
+
+
+def render_pool_metrics(pools: dict) -> list[str]:
+    """Métricas de los pools de conexiones, indexados por nombre ({"primary": engine.pool})"""
+    def samples(getter):
+        return [({"pool": name}, getter(pool)) for name, pool in pools.items()]
+
+    return [
+        *metric_family("db_pool_size", "gauge", "Configured pool size.",
+                       samples(lambda pool: pool.size())),
+        *metric_family("db_pool_max_overflow", "gauge", "Configured maximum overflow connections.",
+                       samples(lambda pool: pool._max_overflow)),
+        *metric_family("db_pool_checked_out", "gauge", "Connections currently checked out.",
+                       samples(lambda pool: pool.checkedout())),
+        *metric_family("db_pool_checked_in", "gauge", "Idle connections in the pool.",
+                       samples(lambda pool: pool.checkedin())),
+        *metric_family("db_pool_overflow", "gauge", "Overflow connections currently open.",
+                       samples(lambda pool: max(pool.overflow(), 0))),
+        *summary_family("db_pool_checkout_seconds", "Time to obtain a connection (wait, connect and pre-ping).",
+                        [({"pool": name}, pool.stats.checkout_seconds_sum, pool.stats.checkouts)
+                         for name, pool in pools.items()]),
+        *metric_family("db_pool_checkout_seconds_max", "gauge", "Slowest checkout since the process started.",
+                       samples(lambda pool: pool.stats.checkout_seconds_max)),
+        *metric_family("db_pool_timeouts_total", "counter", "Checkouts that failed with a pool timeout.",
+                       samples(lambda pool: pool.stats.timeouts)),
+    ]
+
+
+def render_hashing_pool_metrics(stats: dict) -> list[str]:
+    """Métricas del pool de hilos de bcrypt (HashingPool.stats())"""
+    return [
+        *metric_family("hashing_pool_max_workers", "gauge", "Configured bcrypt worker threads.",
+                       [({}, stats["max_workers"])]),
+        *metric_family("hashing_pool_max_queue", "gauge", "Configured maximum queued operations.",
+                       [({}, stats["max_queue"])]),
+        *metric_family("hashing_pool_in_flight", "gauge", "Operations currently running in a worker thread.",
+                       [({}, stats["in_flight"])]),
+        *metric_family("hashing_pool_queued", "gauge", "Operations waiting for a worker thread.",
+                       [({}, stats["queued"])]),
+        *metric_family("hashing_pool_completed_total", "counter", "Operations that finished successfully.",
+                       [({}, stats["completed"])]),
+        *metric_family("hashing_pool_rejected_total", "counter", "Operations rejected because the queue was full.",
+                       [({}, stats["rejected"])]),
+    ]
+
+
+def render_metrics(*families: list[str]) -> str:
+    return "\n".join(line for family in families for line in family) + "\n"
@@ -68,3 +68,38 @@ class Permission(str, Enum):
 
     # Audit
     VIEW_AUDIT_LOGS = "VIEW_AUDIT_LOGS"
+
+
+# ============================================
+# Máscaras de bits de permisos
+# ============================================
+# Cada permiso ocupa un bit según su orden en el enum, de modo que verificar
+# varios permisos se reduce a un AND entre enteros.
+PERMISSION_BITS: dict[str, int] = {perm.value: 1 << index for index, perm in enumerate(Permission)}
+
+ALL_PERMISSIONS_MASK: int = (1 << len(PERMISSION_BITS)) - 1
+
+SUPER_ADMIN_ROLE = "SUPER_ADMIN"
+
+
+def permissions_mask(codes) -> int:
+    """Convierte una colección de códigos (o Permission) en su máscara de bits"""
+    mask = 0
+    for code in codes:
+        value = code.value if isinstance(code, Permission) else code
+        # Los códigos que existen en BD pero no en el enum no participan en las verificaciones
+        mask |= PERMISSION_BITS.get(value, 0)
+    return mask
+
+
+def role_permissions_mask(role) -> int:
+    """
+    Máscara de permisos de un rol. SUPER_ADMIN siempre tiene todos los bits encendidos.
+    get_current_user la calcula al cargar el usuario y la guarda con él en
+    principal_cache, así que expira e invalida junto con esa entrada.
+    """
+    if role is None:
+        return 0
+    if role.name == SUPER_ADMIN_ROLE:
+        return ALL_PERMISSIONS_MASK
+    return permissions_mask(p.code for p in (role.permissions or []))
@@ -0,0 +1,46 @@
+import math
+
+from app.core.config import settings
+from app.db import session as db_session
+from app.db.session import READ_AFTER_WRITE_COOKIE, WriteMarker, request_write_marker
+
+
+class ReadYourWritesMiddleware:
+    """
+    Middleware ASGI de read-your-writes con réplica de lectura (READ_DATABASE_URL):
+    si el request hizo commit en la primaria, la respuesta fija la cookie
+    READ_AFTER_WRITE_COOKIE con la hora del commit, y get_read_db manda a la
+    primaria las lecturas que la traen durante READ_AFTER_WRITE_SECONDS.
+
+    La marca viaja con el cliente: el siguiente request puede atenderlo otro
+    worker u otra instancia de la API. Sin réplica no hace nada.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.cookie_max_age = math.ceil(settings.READ_AFTER_WRITE_SECONDS)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or db_session.read_engine is db_session.engine:
+            await self.app(scope, receive, send)
+            return
+
+        marker = WriteMarker()
+        token = request_write_marker.set(marker)
+
+        async def send_with_marker(message):
+            if message["type"] == "http.response.start" and marker.committed_at is not None:
+                # Milisegundos truncados: redondear hacia arriba daría una hora futura,
+                # que reads_own_writes descarta
+                committed_at = math.floor(marker.committed_at * 1000) / 1000
+                cookie = (
+                    f"{READ_AFTER_WRITE_COOKIE}={committed_at:.3f}; "
+                    f"Max-Age={self.cookie_max_age}; Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_marker)
+        finally:
+            request_write_marker.reset(token)
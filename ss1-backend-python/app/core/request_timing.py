@@ -0,0 +1,51 @@
+import time
+
+from app.core.metrics import http_request_db_duration, http_request_db_statements, http_request_duration
+from app.db.session import QueryStats, request_query_stats
+
+
+class RequestTimingMiddleware:
+    """
+    Middleware ASGI que mide cada request:
+    - latencia total y sentencias SQL / tiempo en base de datos, por ruta (GET /metrics),
+    - encabezado Server-Timing con los mismos datos (visible en las devtools del navegador).
+
+    Un número alto de sentencias por request en una ruta delata patrones N+1.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(scope)
+        token = request_query_stats.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                server_timing = (
+                    f'app;dur={elapsed_ms:.1f}, '
+                    f'db;dur={stats.seconds * 1000:.1f};desc="{stats.statements} statements"'
+                )
+                message["headers"] = [*message.get("headers", []), (b"server-timing", server_timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_query_stats.reset(token)
+            # Plantilla de la ruta (/patients/{patient_id}); sin ruta, un solo label
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", "unmatched"), str(status_code))
+
+            http_request_duration.observe(time.perf_counter() - start, *labels)
+            http_request_db_statements.observe(stats.statements, *labels)
+            http_request_db_duration.observe(stats.seconds, *labels)
@@ -1,9 +1,13 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from jose import jwt, JWTError
 from passlib.context import CryptContext
-from typing import Optional, Literal, Dict, Any
+from typing import Optional, Literal, Dict, Any, Callable
+import asyncio
 import re
 
+from app.core.config import settings
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 TwoFaPurpose = Literal["login", "enable", "disable"]
@@ -16,6 +20,74 @@ def verify_hash(value: str, hashed: str) -> bool:
         return False
     return pwd_context.verify(value, hashed)
 
+
+class HashingPoolBusyError(RuntimeError):
+    """Se lanza cuando la cola del pool de hashing está llena"""
+
+
+class HashingPool:
+    """
+    Pool de hilos dedicado y acotado para bcrypt.
+    bcrypt libera el GIL, así que ejecutarlo en hilos evita bloquear el event loop.
+    Si hay más de `max_workers + max_queue` operaciones pendientes se rechaza
+    la operación (back-pressure) en lugar de encolar sin límite.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        if self._pending >= self.max_workers + self.max_queue:
+            self._rejected += 1
+            raise HashingPoolBusyError("El servicio de autenticación está ocupado, intenta de nuevo")
+
+        loop = asyncio.get_running_loop()
+        self._pending += 1
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._pending -= 1
+            raise
+        # Se libera cuando termina el hilo, no quien espera: si se cancela la
+        # corrutina, bcrypt sigue ocupando el worker hasta terminar
+        future.add_done_callback(lambda _future: loop.call_soon_threadsafe(self._release))
+
+        result = await asyncio.wrap_future(future)
+        self._completed += 1
+        return result
+
+    def _release(self) -> None:
+        self._pending -= 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": min(self._pending, self.max_workers),
+            "queued": max(self._pending - self.max_workers, 0),
+            "completed": self._completed,
+            "rejected": self._rejected,
+        }
+
+
+hashing_pool = HashingPool(
+    max_workers=settings.HASHING_POOL_MAX_WORKERS,
+    max_queue=settings.HASHING_POOL_MAX_QUEUE,
+)
+
+async def hash_value_async(value: str) -> str:
+    return await hashing_pool.run(hash_value, value)
+
+async def verify_hash_async(value: str, hashed: str) -> bool:
+    if not hashed:
+        return False
+    return await hashing_pool.run(verify_hash, value, hashed)
+
 def _parse_expires(expires_in: str) -> timedelta:
     """
     Soporta: "10m", "7d", "12h"
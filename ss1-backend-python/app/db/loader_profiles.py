@@ -0,0 +1,158 @@
+"""
+Perfiles de carga de relaciones por consulta.
+
+Las relaciones en app/db/models.py usan lazy="raise": ninguna consulta trae
+relaciones implícitamente y acceder a una relación no cargada lanza un error
+en lugar de ejecutar SQL oculto. Cada consulta declara qué necesita usando
+uno de estos perfiles con nombre:
+
+- "list":   lo mínimo para los listados paginados
+- "detail": lo que necesita el response_model del detalle
+- "report": lo que recorren los reportes
+
+Las colecciones se cargan con selectinload (una consulta extra por colección,
+sin producto cartesiano) y las relaciones muchos-a-uno con joinedload.
+"""
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.db.models import (
+    Appointment,
+    ClinicalRecord,
+    ConfidentialNote,
+    Employee,
+    EmployeeAvailability,
+    Invoice,
+    InvoiceItem,
+    PatientTask,
+    Payment,
+    PayrollRecord,
+    Role,
+    Session,
+    User,
+)
+
+
+LOADER_PROFILES: dict[type, dict[str, tuple]] = {
+    User: {
+        # Usuario autenticado: rol con permisos, empleado y paciente (/auth/me, deps)
+        "principal": (
+            joinedload(User.role).selectinload(Role.permissions),
+            joinedload(User.employee).options(
+                joinedload(Employee.area),
+                selectinload(Employee.specialties),
+                selectinload(Employee.availability),
+            ),
+            joinedload(User.patient),
+        ),
+        "list": (
+            joinedload(User.role),
+            joinedload(User.employee),
+            joinedload(User.patient),
+        ),
+    },
+    Role: {
+        "detail": (selectinload(Role.permissions),),
+    },
+    Employee: {
+        "list": (
+            joinedload(Employee.user).joinedload(User.role),
+            joinedload(Employee.area),
+            selectinload(Employee.specialties),
+            selectinload(Employee.availability),
+        ),
+        "detail": (
+            joinedload(Employee.user).joinedload(User.role),
+            joinedload(Employee.area),
+            selectinload(Employee.specialties),
+            selectinload(Employee.availability),
+        ),
+    },
+    EmployeeAvailability: {
+        "detail": (
+            joinedload(EmployeeAvailability.employee),
+            joinedload(EmployeeAvailability.specialty),
+        ),
+    },
+    Appointment: {
+        "list": (
+            joinedload(Appointment.patient),
+            joinedload(Appointment.professional),
+            joinedload(Appointment.specialty),
+        ),
+        "detail": (
+            joinedload(Appointment.patient),
+            joinedload(Appointment.professional),
+            joinedload(Appointment.specialty),
+        ),
+        "report": (
+            joinedload(Appointment.specialty),
+            joinedload(Appointment.professional).joinedload(Employee.area),
+        ),
+    },
+    ClinicalRecord: {
+        "list": (
+            joinedload(ClinicalRecord.patient),
+            joinedload(ClinicalRecord.responsible_employee),
+        ),
+        "detail": (
+            joinedload(ClinicalRecord.patient),
+            joinedload(ClinicalRecord.responsible_employee),
+        ),
+    },
+    PatientTask: {
+        "list": (joinedload(PatientTask.assigned_by),),
+        "detail": (joinedload(PatientTask.assigned_by),),
+    },
+    ConfidentialNote: {
+        "list": (joinedload(ConfidentialNote.author),),
+        "detail": (joinedload(ConfidentialNote.author),),
+    },
+    Session: {
+        "list": (joinedload(Session.professional),),
+        "detail": (joinedload(Session.professional),),
+    },
+    Invoice: {
+        "summary": (joinedload(Invoice.patient),),
+        "report": (
+            joinedload(Invoice.patient),
+            joinedload(Invoice.created_by),
+            selectinload(Invoice.items).options(
+                joinedload(InvoiceItem.service),
+                joinedload(InvoiceItem.product),
+            ),
+        ),
+    },
+    Payment: {
+        "report": (
+            joinedload(Payment.payment_method),
+            joinedload(Payment.invoice).joinedload(Invoice.patient),
+        ),
+    },
+    PayrollRecord: {
+        "report": (
+            selectinload(PayrollRecord.employee).joinedload(Employee.area),
+            joinedload(PayrollRecord.period),
+        ),
+    },
+}
+
+
+def loader_profile(model: type, name: str) -> tuple:
+    """Obtener las opciones de carga del perfil `name` para `model`"""
+    return LOADER_PROFILES[model][name]
+
+
+async def reload_with_profile(db: AsyncSession, model: type, pk: int, name: str = "detail"):
+    """
+    Volver a cargar una entidad con su perfil después de un commit.
+    Sustituye a db.refresh(), que no carga relaciones con lazy="raise".
+    """
+    result = await db.execute(
+        select(model)
+        .where(model.id == pk)
+        .options(*loader_profile(model, name))
+        .execution_options(populate_existing=True)
+    )
+    return result.unique().scalar_one_or_none()
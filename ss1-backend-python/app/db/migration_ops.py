@@ -0,0 +1,136 @@
+"""
+Operaciones de esquema en línea para las migraciones de Alembic (alembic/versions).
+
+La base de datos se usa todo el día (agenda, recepción) y la comparte
+ss1-backend-node. Un CREATE INDEX normal bloquea las escrituras de la tabla
+mientras la recorre, y un ALTER TABLE ... ADD CONSTRAINT que valida filas
+existentes mantiene un bloqueo fuerte durante toda la validación. Estas
+funciones producen el mismo esquema sin bloqueos largos:
+
+- create_index_concurrently / drop_index_concurrently: CREATE / DROP INDEX
+  CONCURRENTLY, fuera de transacción. Un índice que quedó INVALID por una
+  ejecución interrumpida se elimina y se vuelve a construir.
+- add_constraint_not_valid + validate_constraint (add_constraint_online):
+  la restricción (CHECK o FOREIGN KEY) se agrega NOT VALID, con un bloqueo
+  breve que no revisa filas existentes, y se valida después con un bloqueo
+  que no impide lecturas ni escrituras.
+- add_unique_constraint_using_index: UNIQUE a partir de un índice construido
+  CONCURRENTLY.
+
+Todas son idempotentes (IF [NOT] EXISTS o comprobando el catálogo) para poder
+reintentar una migración que falló a medias y para bases creadas con
+creation.sql, que ya trae el esquema completo.
+
+Los pasos que sí toman un bloqueo fuerte (aunque breve) usan lock_timeout
+(MIGRATION_LOCK_TIMEOUT): si una transacción larga tiene la tabla, fallan
+rápido en lugar de dejar encoladas detrás a todas las consultas de la app.
+
+Las restricciones EXCLUDE no admiten NOT VALID ni USING INDEX: crearlas
+requiere una ventana de mantenimiento.
+"""
+from typing import Optional, Sequence
+
+from alembic import op
+from sqlalchemy import text
+
+from app.core.config import settings
+
+
+def _online() -> bool:
+    """False en modo --sql (offline): no hay conexión para consultar el catálogo"""
+    return not op.get_context().as_sql
+
+
+def _index_state(name: str) -> Optional[bool]:
+    """True (válido), False (INVALID) o None si el índice no existe"""
+    return op.get_bind().execute(
+        text(
+            "SELECT i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND pg_catalog.pg_table_is_visible(c.oid)"
+        ),
+        {"name": name},
+    ).scalar()
+
+
+def _constraint_exists(table: str, name: str) -> bool:
+    return op.get_bind().execute(
+        text(
+            "SELECT 1 FROM pg_constraint "
+            "WHERE conname = :name AND conrelid = CAST(:table AS regclass)"
+        ),
+        {"name": name, "table": table},
+    ).scalar() is not None
+
+
+def _execute_with_lock_timeout(statement: str) -> None:
+    op.execute(f"SET lock_timeout = '{settings.MIGRATION_LOCK_TIMEOUT}'")
+    try:
+        op.execute(statement)
+    finally:
+        op.execute("RESET lock_timeout")
+
+
+def create_index_concurrently(
+    name: str,
+    table: str,
+    columns: Sequence[str],
+    unique: bool = False,
+    using: Optional[str] = None,
+    where: Optional[str] = None,
+) -> None:
+    """CREATE [UNIQUE] INDEX CONCURRENTLY IF NOT EXISTS, reconstruyendo un índice INVALID"""
+    statement = (
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY IF NOT EXISTS {name} "
+        f"ON {table}{f' USING {using}' if using else ''} ({', '.join(columns)})"
+    )
+    if where:
+        statement += f" WHERE {where}"
+
+    with op.get_context().autocommit_block():
+        if _online() and _index_state(name) is False:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        op.execute(statement)
+
+
+def drop_index_concurrently(name: str) -> None:
+    with op.get_context().autocommit_block():
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def add_constraint_not_valid(table: str, name: str, definition: str) -> None:
+    """
+    Agregar una restricción CHECK o FOREIGN KEY sin revisar las filas existentes
+    (las nuevas filas sí se verifican desde ese momento).
+    `definition` es el cuerpo de la restricción, p. ej. "CHECK (amount >= 0)".
+    """
+    with op.get_context().autocommit_block():
+        if _online() and _constraint_exists(table, name):
+            return
+        _execute_with_lock_timeout(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition} NOT VALID")
+
+
+def validate_constraint(table: str, name: str) -> None:
+    """Validar las filas existentes (SHARE UPDATE EXCLUSIVE: no bloquea lecturas ni escrituras)"""
+    with op.get_context().autocommit_block():
+        op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}")
+
+
+def add_constraint_online(table: str, name: str, definition: str) -> None:
+    """add_constraint_not_valid + validate_constraint, cada paso en su propia transacción"""
+    add_constraint_not_valid(table, name, definition)
+    validate_constraint(table, name)
+
+
+def add_unique_constraint_using_index(table: str, name: str, columns: Sequence[str]) -> None:
+    """Restricción UNIQUE respaldada por un índice construido CONCURRENTLY con el mismo nombre"""
+    if _online() and _constraint_exists(table, name):
+        return
+    create_index_concurrently(name, table, columns, unique=True)
+    with op.get_context().autocommit_block():
+        _execute_with_lock_timeout(f"ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name}")
+
+
+def drop_constraint(table: str, name: str) -> None:
+    with op.get_context().autocommit_block():
+        _execute_with_lock_timeout(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}")
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy import BigInteger, String, Boolean, TIMESTAMP, ForeignKey, func, Integer, Text, Table, Column, Numeric, Date, SmallInteger, Time
+from sqlalchemy import BigInteger, String, Boolean, TIMESTAMP, ForeignKey, func, Integer, Text, Table, Column, Numeric, Date, SmallInteger, Time, UniqueConstraint, Index
 
 class Base(DeclarativeBase):
     pass
@@ -36,7 +36,7 @@ class Role(Base):
     permissions: Mapped[list["Permission"]] = relationship(
         "Permission",
         secondary=role_permissions,
-        lazy="joined"
+        lazy="raise"
     )
 
 class Area(Base):
@@ -83,22 +83,22 @@ class Employee(Base):
     updated_at: Mapped[object] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     # Relación con User
-    user: Mapped["User"] = relationship("User", lazy="joined", foreign_keys=[user_id])
+    user: Mapped["User"] = relationship("User", lazy="raise", foreign_keys=[user_id])
     
     # Relación con Area
-    area: Mapped["Area"] = relationship("Area", lazy="joined", foreign_keys=[area_id])
+    area: Mapped["Area"] = relationship("Area", lazy="raise", foreign_keys=[area_id])
     
     # Relación con Specialties (many-to-many)
     specialties: Mapped[list["Specialty"]] = relationship(
         "Specialty",
         secondary=employee_specialties,
-        lazy="joined"
+        lazy="raise"
     )
     
     # Relación con Availability (one-to-many)
     availability: Mapped[list["EmployeeAvailability"]] = relationship(
         "EmployeeAvailability",
-        lazy="joined",
+        lazy="raise",
         foreign_keys="EmployeeAvailability.employee_id",
         overlaps="employee"
     )
@@ -133,6 +133,9 @@ class Patient(Base):
 
 class ClinicalRecord(Base):
     __tablename__ = "clinical_records"
+    __table_args__ = (
+        Index("idx_clinical_records_patient_created", "patient_id", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
     patient_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("patients.id", ondelete="CASCADE"), nullable=False)
@@ -149,8 +152,8 @@ class ClinicalRecord(Base):
     updated_at: Mapped[object] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     # Relaciones
-    patient: Mapped["Patient"] = relationship("Patient", lazy="joined")
-    responsible_employee: Mapped["Employee"] = relationship("Employee", lazy="joined", foreign_keys=[responsible_employee_id])
+    patient: Mapped["Patient"] = relationship("Patient", lazy="raise")
+    responsible_employee: Mapped["Employee"] = relationship("Employee", lazy="raise", foreign_keys=[responsible_employee_id])
 
 class Service(Base):
     __tablename__ = "services"
@@ -167,6 +170,9 @@ class Service(Base):
 
 class EmployeeAvailability(Base):
     __tablename__ = "employee_availability"
+    __table_args__ = (
+        Index("idx_employee_availability_day_active", "day_of_week", "is_active", "specialty_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     employee_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("employees.id", ondelete="CASCADE"), nullable=False)
@@ -179,11 +185,15 @@ class EmployeeAvailability(Base):
     updated_at: Mapped[object] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     # Relaciones
-    employee: Mapped["Employee"] = relationship("Employee", lazy="joined")
-    specialty: Mapped["Specialty"] = relationship("Specialty", lazy="joined")
+    employee: Mapped["Employee"] = relationship("Employee", lazy="raise")
+    specialty: Mapped["Specialty"] = relationship("Specialty", lazy="raise")
 
 class Appointment(Base):
     __tablename__ = "appointments"
+    __table_args__ = (
+        Index("idx_appointments_professional_start", "professional_id", "start_datetime", "status"),
+        Index("idx_appointments_patient_start", "patient_id", "start_datetime"),
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
     patient_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("patients.id", ondelete="CASCADE"), nullable=False)
@@ -198,9 +208,9 @@ class Appointment(Base):
     updated_at: Mapped[object] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     # Relaciones
-    patient: Mapped["Patient"] = relationship("Patient", lazy="joined")
-    professional: Mapped["Employee"] = relationship("Employee", lazy="joined", foreign_keys=[professional_id])
-    specialty: Mapped["Specialty"] = relationship("Specialty", lazy="joined")
+    patient: Mapped["Patient"] = relationship("Patient", lazy="raise")
+    professional: Mapped["Employee"] = relationship("Employee", lazy="raise", foreign_keys=[professional_id])
+    specialty: Mapped["Specialty"] = relationship("Specialty", lazy="raise")
 
 class User(Base):
     __tablename__ = "users"
@@ -214,9 +224,9 @@ class User(Base):
     role_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("roles.id"), nullable=False)
 
     # Relaciones
-    role: Mapped["Role"] = relationship("Role", lazy="joined")
-    employee: Mapped["Employee"] = relationship("Employee", uselist=False, lazy="joined", overlaps="user")
-    patient: Mapped["Patient"] = relationship("Patient", uselist=False, lazy="joined")
+    role: Mapped["Role"] = relationship("Role", lazy="raise")
+    employee: Mapped["Employee"] = relationship("Employee", uselist=False, lazy="raise", overlaps="user")
+    patient: Mapped["Patient"] = relationship("Patient", uselist=False, lazy="raise")
 
     is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
 
@@ -249,9 +259,9 @@ class PatientTask(Base):
     updated_at: Mapped[object] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     # Relaciones
-    patient: Mapped["Patient"] = relationship("Patient", lazy="joined")
-    clinical_record: Mapped["ClinicalRecord"] = relationship("ClinicalRecord", lazy="joined")
-    assigned_by: Mapped["Employee"] = relationship("Employee", lazy="joined", foreign_keys=[assigned_by_employee_id])
+    patient: Mapped["Patient"] = relationship("Patient", lazy="raise")
+    clinical_record: Mapped["ClinicalRecord"] = relationship("ClinicalRecord", lazy="raise")
+    assigned_by: Mapped["Employee"] = relationship("Employee", lazy="raise", foreign_keys=[assigned_by_employee_id])
 
 
 class ConfidentialNote(Base):
@@ -265,13 +275,16 @@ class ConfidentialNote(Base):
     created_at: Mapped[object] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
 
     # Relaciones
-    patient: Mapped["Patient"] = relationship("Patient", lazy="joined")
-    clinical_record: Mapped["ClinicalRecord"] = relationship("ClinicalRecord", lazy="joined")
-    author: Mapped["Employee"] = relationship("Employee", lazy="joined", foreign_keys=[author_employee_id])
+    patient: Mapped["Patient"] = relationship("Patient", lazy="raise")
+    clinical_record: Mapped["ClinicalRecord"] = relationship("ClinicalRecord", lazy="raise")
+    author: Mapped["Employee"] = relationship("Employee", lazy="raise", foreign_keys=[author_employee_id])
 
 
 class Session(Base):
     __tablename__ = "sessions"
+    __table_args__ = (
+        Index("idx_sessions_record_datetime", "clinical_record_id", "session_datetime"),
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
     clinical_record_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("clinical_records.id", ondelete="CASCADE"), nullable=False)
@@ -292,8 +305,8 @@ class Session(Base):
     updated_at: Mapped[object] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     # Relaciones
-    clinical_record: Mapped["ClinicalRecord"] = relationship("ClinicalRecord", lazy="joined")
-    professional: Mapped["Employee"] = relationship("Employee", lazy="joined", foreign_keys=[professional_id])
+    clinical_record: Mapped["ClinicalRecord"] = relationship("ClinicalRecord", lazy="raise")
+    professional: Mapped["Employee"] = relationship("Employee", lazy="raise", foreign_keys=[professional_id])
 
 
 class Product(Base):
@@ -324,6 +337,9 @@ class PaymentMethod(Base):
 
 class Invoice(Base):
     __tablename__ = "invoices"
+    __table_args__ = (
+        Index("idx_invoices_date_currency_status", "invoice_date", "currency", "status"),
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
     invoice_number: Mapped[str] = mapped_column(String(60), unique=True, nullable=False)
@@ -339,10 +355,10 @@ class Invoice(Base):
     updated_at: Mapped[object] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     # Relaciones
-    patient: Mapped["Patient"] = relationship("Patient", lazy="joined")
-    created_by: Mapped["Employee"] = relationship("Employee", lazy="joined", foreign_keys=[created_by_employee_id])
-    items: Mapped[list["InvoiceItem"]] = relationship("InvoiceItem", lazy="joined", foreign_keys="InvoiceItem.invoice_id")
-    payments: Mapped[list["Payment"]] = relationship("Payment", lazy="joined", foreign_keys="Payment.invoice_id")
+    patient: Mapped["Patient"] = relationship("Patient", lazy="raise")
+    created_by: Mapped["Employee"] = relationship("Employee", lazy="raise", foreign_keys=[created_by_employee_id])
+    items: Mapped[list["InvoiceItem"]] = relationship("InvoiceItem", lazy="raise", foreign_keys="InvoiceItem.invoice_id")
+    payments: Mapped[list["Payment"]] = relationship("Payment", lazy="raise", foreign_keys="Payment.invoice_id")
 
 
 class InvoiceItem(Base):
@@ -359,13 +375,16 @@ class InvoiceItem(Base):
     created_at: Mapped[object] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
 
     # Relaciones
-    invoice: Mapped["Invoice"] = relationship("Invoice", lazy="joined", overlaps="items")
-    service: Mapped["Service"] = relationship("Service", lazy="joined")
-    product: Mapped["Product"] = relationship("Product", lazy="joined")
+    invoice: Mapped["Invoice"] = relationship("Invoice", lazy="raise", overlaps="items")
+    service: Mapped["Service"] = relationship("Service", lazy="raise")
+    product: Mapped["Product"] = relationship("Product", lazy="raise")
 
 
 class Payment(Base):
     __tablename__ = "payments"
+    __table_args__ = (
+        Index("idx_payments_paid_at", "paid_at"),
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
     invoice_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("invoices.id", ondelete="CASCADE"), nullable=False)
@@ -376,8 +395,44 @@ class Payment(Base):
     created_at: Mapped[object] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
 
     # Relaciones
-    invoice: Mapped["Invoice"] = relationship("Invoice", lazy="joined", overlaps="payments")
-    payment_method: Mapped["PaymentMethod"] = relationship("PaymentMethod", lazy="joined")
+    invoice: Mapped["Invoice"] = relationship("Invoice", lazy="raise", overlaps="payments")
+    payment_method: Mapped["PaymentMethod"] = relationship("PaymentMethod", lazy="raise")
+
+
+# Acumulados mensuales para /reports/revenue y /reports/sales. Los mantienen
+# triggers sobre invoices, invoice_items y payments (alembic/versions/0005_report_rollups.py)
+
+# Facturado por mes, moneda y estado
+class InvoiceMonthlyRollup(Base):
+    __tablename__ = "invoice_monthly_rollups"
+
+    month: Mapped[object] = mapped_column(Date, primary_key=True)
+    currency: Mapped[str] = mapped_column(String(10), primary_key=True)
+    status: Mapped[str] = mapped_column(String(20), primary_key=True)
+    invoices_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    invoiced_amount: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+
+
+# Pagado por mes (paid_at en UTC) y moneda de la factura
+class PaymentMonthlyRollup(Base):
+    __tablename__ = "payment_monthly_rollups"
+
+    month: Mapped[object] = mapped_column(Date, primary_key=True)
+    currency: Mapped[str] = mapped_column(String(10), primary_key=True)
+    payments_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    paid_amount: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+
+
+# Items por mes de la factura y servicio o producto
+class InvoiceItemMonthlyRollup(Base):
+    __tablename__ = "invoice_item_monthly_rollups"
+
+    month: Mapped[object] = mapped_column(Date, primary_key=True)
+    item_type: Mapped[str] = mapped_column(String(10), primary_key=True)  # SERVICE, PRODUCT
+    item_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    items_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    quantity: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    items_amount: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False, default=0)
 
 
 class PayrollPeriod(Base):
@@ -396,6 +451,9 @@ class PayrollPeriod(Base):
 
 class PayrollRecord(Base):
     __tablename__ = "payroll_records"
+    __table_args__ = (
+        UniqueConstraint("period_id", "employee_id", name="uq_payroll_period_employee"),
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
     employee_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("employees.id", ondelete="RESTRICT"), nullable=False)
@@ -415,3 +473,19 @@ class PayrollRecord(Base):
     employee: Mapped["Employee"] = relationship("Employee", back_populates="payroll_records")
     period: Mapped["PayrollPeriod"] = relationship("PayrollPeriod", back_populates="records")
 
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    to_email: Mapped[str] = mapped_column(String(255), nullable=False)
+    subject: Mapped[str] = mapped_column(String(255), nullable=False)
+    body_text: Mapped[str | None] = mapped_column(Text, nullable=True)
+    category: Mapped[str] = mapped_column(String(50), nullable=False, default="GENERAL")
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="PENDING")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[object] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    sent_at: Mapped[object | None] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    created_at: Mapped[object] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    updated_at: Mapped[object] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -0,0 +1,95 @@
+"""
+Paginación por cursor (keyset) para los listados.
+
+En lugar de OFFSET/LIMIT, cada página continúa desde el último elemento de la
+anterior usando la llave de orden (columna de orden, id):
+
+    WHERE (created_at, id) < (:created_at, :id)
+    ORDER BY created_at DESC, id DESC
+    LIMIT :limit + 1
+
+El costo no crece con la profundidad de la página y el COUNT(*) solo se
+ejecuta si se pide explícitamente (include_total=true).
+
+El cursor es opaco para el cliente: base64 (url-safe) de [valor_de_orden, id].
+
+En SQLite (pruebas y benchmarks) las fechas son texto y no siempre con el
+mismo formato: server_default=now() guarda 'YYYY-MM-DD HH:MM:SS' y
+SQLAlchemy envía el cursor como 'YYYY-MM-DD HH:MM:SS.000000'. Comparadas
+como texto, las filas del mismo segundo quedan antes del cursor y la página
+se repite, así que ahí el orden y la comparación usan strftime sobre ambos lados.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Select, func, literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    payload = json.dumps([sort_value.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Decodificar un cursor. Lanza ValueError si el cursor no es válido"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as exc:
+        raise ValueError("Cursor de paginación inválido") from exc
+
+
+def _sqlite_datetime(value):
+    """Fecha de SQLite en un solo formato de texto (milisegundos), comparable como texto"""
+    return func.strftime("%Y-%m-%d %H:%M:%f", value)
+
+
+async def paginate_by_cursor(
+    db: AsyncSession,
+    query: Select,
+    sort_column,
+    id_column,
+    cursor: Optional[str],
+    limit: int,
+    include_total: bool = False,
+) -> dict:
+    """
+    Ejecutar `query` (con filtros, sin paginar) como una página por cursor.
+    Un cursor vacío o None devuelve la primera página.
+
+    Devuelve {"data": [...], "meta": {"limit", "next_cursor"[, "total"]}}.
+    """
+    meta = {"limit": limit}
+
+    if include_total:
+        count_query = select(func.count()).select_from(query.order_by(None).subquery())
+        meta["total"] = (await db.execute(count_query)).scalar()
+
+    sort_key = _sqlite_datetime if db.get_bind().dialect.name == "sqlite" else (lambda value: value)
+    page_query = query.order_by(None).order_by(sort_key(sort_column).desc(), id_column.desc())
+
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        page_query = page_query.where(
+            tuple_(sort_key(sort_column), id_column)
+            < tuple_(sort_key(literal(sort_value, sort_column.type)), row_id)
+        )
+
+    # Se pide un elemento extra para saber si hay una página siguiente
+    result = await db.execute(page_query.limit(limit + 1))
+    items = list(result.unique().scalars().all())
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+
+    meta["next_cursor"] = next_cursor
+
+    return {"data": items, "meta": meta}
@@ -1,10 +1,58 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_, and_, text
-from app.db.models import Appointment, EmployeeAvailability, Employee, Specialty
-from datetime import datetime, date, time, timedelta, timezone
+from sqlalchemy import select, func, or_, and_, insert
+from sqlalchemy.exc import IntegrityError
+from app.db.models import Appointment, EmployeeAvailability
+from app.db.pagination import paginate_by_cursor
+from app.db.loader_profiles import loader_profile, reload_with_profile
+from app.services.availability.availability_engine import (
+    BLOCKING_STATUSES,
+    build_day_availability,
+    as_utc,
+    date_range,
+    day_of_week,
+    earliest_free_slots,
+    fits_availability,
+    recurring_intervals,
+)
+from app.services.availability.schedule_grid import schedule_grid
+from datetime import datetime, date, timedelta
 from typing import Optional
+from contextlib import asynccontextmanager
 import math
 
+# Restricción EXCLUDE de migrations/0003_appointments_no_overlap.sql
+OVERLAP_CONSTRAINT = "excl_appointments_professional_overlap"
+OVERLAP_MESSAGE = "El profesional ya tiene una cita agendada en ese horario"
+
+# Días de agenda que carga cada paso de la búsqueda del próximo slot libre
+NEXT_AVAILABLE_CHUNK_DAYS = 7
+
+
+def is_overlap_violation(error: IntegrityError) -> bool:
+    """True si el IntegrityError viene de la restricción de traslape (SQLSTATE 23P01)"""
+    return getattr(error.orig, "sqlstate", None) == "23P01" or OVERLAP_CONSTRAINT in str(error.orig)
+
+
+@asynccontextmanager
+async def overlap_guard(db: AsyncSession):
+    """
+    Traducir un traslape de horario a ValueError (con rollback) en las escrituras
+    del bloque: el INSERT/UPDATE o el commit, donde la restricción lo rechace.
+    """
+    try:
+        yield
+    except IntegrityError as error:
+        await db.rollback()
+        if is_overlap_violation(error):
+            raise ValueError(OVERLAP_MESSAGE) from error
+        raise
+
+
+async def commit_appointments(db: AsyncSession) -> None:
+    """Confirmar la transacción traduciendo un traslape de horario a ValueError"""
+    async with overlap_guard(db):
+        await db.commit()
+
 
 class AppointmentsRepository:
     """Repositorio para operaciones de citas"""
@@ -15,111 +63,112 @@ class AppointmentsRepository:
         target_date: date,
         specialty_id: Optional[int] = None,
         professional_id: Optional[int] = None,
+        slot_minutes: int = 60,
     ):
         """
         Verificar disponibilidad de citas en una fecha específica
         """
-        # Obtener día de la semana (0=Domingo, 6=Sábado)
-        day_of_week = target_date.weekday()
-        # Python usa 0=Lunes, ajustar a 0=Domingo
-        day_of_week = (day_of_week + 1) % 7
-
-        # Query base para disponibilidades
-        query = (
-            select(EmployeeAvailability)
-            .where(EmployeeAvailability.day_of_week == day_of_week)
-            .where(EmployeeAvailability.is_active == True)
+        result = await AppointmentsRepository.check_availability_range(
+            db,
+            from_date=target_date,
+            to_date=target_date,
+            specialty_id=specialty_id,
+            professional_id=professional_id,
+            slot_minutes=slot_minutes,
         )
+        return result["days"][0]
 
-        # Filtros opcionales
-        if specialty_id:
-            query = query.where(EmployeeAvailability.specialty_id == specialty_id)
-        
-        if professional_id:
-            query = query.where(EmployeeAvailability.employee_id == professional_id)
+    @staticmethod
+    async def check_availability_range(
+        db: AsyncSession,
+        from_date: date,
+        to_date: date,
+        specialty_id: Optional[int] = None,
+        professional_id: Optional[int] = None,
+        slot_minutes: int = 60,
+    ):
+        """
+        Verificar disponibilidad de citas para un rango de fechas.
+        Lee de la agenda precalculada (schedule_grid): solo consulta la base de
+        datos por los horarios o días que no estén cargados.
+        """
+        days = date_range(from_date, to_date)
+        days_of_week = {day_of_week(day) for day in days}
 
-        result = await db.execute(query)
-        availabilities = result.unique().scalars().all()
+        availabilities = [
+            avail
+            for avail in await schedule_grid.windows(db)
+            if avail.day_of_week in days_of_week
+            and (not specialty_id or avail.specialty_id == specialty_id)
+            and (not professional_id or avail.employee_id == professional_id)
+        ]
 
-        # Para cada disponibilidad, generar slots
-        all_slots = []
-        
-        for avail in availabilities:
-            # Obtener citas existentes del profesional en esa fecha
-            start_of_day = datetime.combine(target_date, time.min)
-            end_of_day = datetime.combine(target_date, time.max)
-            
-            existing_query = (
-                select(Appointment)
-                .where(Appointment.professional_id == avail.employee_id)
-                .where(Appointment.start_datetime >= start_of_day)
-                .where(Appointment.start_datetime <= end_of_day)
-                .where(Appointment.status.in_(["SCHEDULED", "COMPLETED"]))
-            )
-            
-            existing_result = await db.execute(existing_query)
-            existing_appointments = existing_result.unique().scalars().all()
-            
-            # Generar slots disponibles
-            slots = AppointmentsRepository._generate_time_slots(
-                avail.start_time,
-                avail.end_time,
-                existing_appointments,
-                target_date,
-            )
-            
-            all_slots.append({
-                "employee_id": avail.employee_id,
-                "employee_name": f"{avail.employee.first_name} {avail.employee.last_name}" if avail.employee else "N/A",
-                "specialty_id": avail.specialty_id,
-                "specialty_name": avail.specialty.name if avail.specialty else None,
-                "available_slots": slots,
-            })
+        busy_by_professional = {}
+        if availabilities:
+            busy_by_professional = await schedule_grid.busy(db, from_date, to_date)
+
+        slot_length = timedelta(minutes=slot_minutes)
 
         return {
-            "date": target_date.isoformat(),
-            "day_of_week": day_of_week,
-            "professionals": all_slots,
+            "from_date": from_date.isoformat(),
+            "to_date": to_date.isoformat(),
+            "slot_minutes": slot_minutes,
+            "days": [
+                build_day_availability(day, availabilities, busy_by_professional, slot_length)
+                for day in days
+            ],
         }
 
     @staticmethod
-    def _generate_time_slots(
-        start_time: time,
-        end_time: time,
-        existing_appointments: list[Appointment],
-        target_date: date,
-    ) -> list[dict]:
-        """Generar slots de 1 hora"""
+    async def find_next_available(
+        db: AsyncSession,
+        after: datetime,
+        horizon_days: int,
+        limit: int,
+        specialty_id: Optional[int] = None,
+        area_id: Optional[int] = None,
+        professional_id: Optional[int] = None,
+        slot_minutes: int = 60,
+    ) -> dict:
+        """
+        Primeros slots libres a partir de `after`, entre todos los profesionales
+        que cumplen los filtros. Avanza por semanas sobre la agenda precalculada
+        (una consulta como máximo por semana no cargada) y se detiene en cuanto
+        reúne `limit` slots o llega a `horizon_days`.
+        """
+        after = as_utc(after)
+        availabilities = [
+            avail
+            for avail in await schedule_grid.windows(db)
+            if (not specialty_id or avail.specialty_id == specialty_id)
+            and (not area_id or avail.area_id == area_id)
+            and (not professional_id or avail.employee_id == professional_id)
+        ]
+
+        last_day = after.date() + timedelta(days=horizon_days - 1)
+        slot_length = timedelta(minutes=slot_minutes)
         slots = []
-        
-        tzinfo = existing_appointments[0].start_datetime.tzinfo if existing_appointments else timezone.utc
-        current_datetime = datetime.combine(target_date, start_time).replace(tzinfo=tzinfo)
-        end_datetime = datetime.combine(target_date, end_time).replace(tzinfo=tzinfo)
-        
-        while current_datetime < end_datetime:
-            slot_end = current_datetime + timedelta(hours=1)
-            
-            if slot_end > end_datetime:
-                break
-            
-            # Verificar conflictos
-            has_conflict = False
-            for appt in existing_appointments:
-                if (current_datetime < appt.end_datetime and 
-                    slot_end > appt.start_datetime):
-                    has_conflict = True
-                    break
-            
-            if not has_conflict:
-                slots.append({
-                    "start": current_datetime.isoformat(),
-                    "end": slot_end.isoformat(),
-                    "available": True,
-                })
-            
-            current_datetime = slot_end
-        
-        return slots
+
+        chunk_start = after.date()
+        while availabilities and chunk_start <= last_day and len(slots) < limit:
+            chunk_end = min(chunk_start + timedelta(days=NEXT_AVAILABLE_CHUNK_DAYS - 1), last_day)
+            busy_by_professional = await schedule_grid.busy(db, chunk_start, chunk_end)
+            slots.extend(earliest_free_slots(
+                date_range(chunk_start, chunk_end),
+                availabilities,
+                busy_by_professional,
+                slot_length,
+                after,
+                limit - len(slots),
+            ))
+            chunk_start = chunk_end + timedelta(days=1)
+
+        return {
+            "after": after.isoformat(),
+            "until": last_day.isoformat(),
+            "slot_minutes": slot_minutes,
+            "slots": slots,
+        }
 
     @staticmethod
     async def create(db: AsyncSession, appointment_data: dict) -> Appointment:
@@ -131,23 +180,7 @@ class AppointmentsRepository:
         if end <= start:
             raise ValueError("end_datetime debe ser posterior a start_datetime")
         
-        # Verificar conflictos si hay profesional asignado
-        if appointment_data.get("professional_id"):
-            conflicts_query = (
-                select(Appointment)
-                .where(Appointment.professional_id == appointment_data["professional_id"])
-                .where(Appointment.start_datetime < end)
-                .where(Appointment.end_datetime > start)
-                .where(Appointment.status.in_(["SCHEDULED", "COMPLETED"]))
-            )
-            
-            result = await db.execute(conflicts_query)
-            conflicts = result.scalars().all()
-            
-            if conflicts:
-                raise ValueError("El profesional ya tiene una cita agendada en ese horario")
-        
-        # Crear cita
+        # Crear cita; los traslapes del profesional los rechaza la restricción EXCLUDE
         new_appointment = Appointment(
             patient_id=appointment_data["patient_id"],
             professional_id=appointment_data.get("professional_id"),
@@ -161,10 +194,127 @@ class AppointmentsRepository:
         )
         
         db.add(new_appointment)
-        await db.commit()
-        await db.refresh(new_appointment)
+        await commit_appointments(db)
+        schedule_grid.book(new_appointment.id, new_appointment.professional_id, start, end)
         
-        return new_appointment
+        return await reload_with_profile(db, Appointment, new_appointment.id)
+
+    @staticmethod
+    async def create_bulk(db: AsyncSession, bulk_data: dict, max_items: int) -> dict:
+        """
+        Crear varias citas (recurrencia o lista explícita) en una sola transacción.
+        Valida todos los horarios a la vez: una consulta de horarios del
+        profesional y una de citas que se traslapan con cualquiera de ellos.
+        Devuelve {"created": [...], "conflicts": [...]}; sin skip_conflicts, si
+        hay conflictos no se crea ninguna.
+        """
+        if bulk_data.get("recurrence"):
+            recurrence = bulk_data["recurrence"]
+            start = datetime.fromisoformat(bulk_data["start_datetime"].replace('Z', '+00:00'))
+            end = datetime.fromisoformat(bulk_data["end_datetime"].replace('Z', '+00:00'))
+            if end <= start:
+                raise ValueError("end_datetime debe ser posterior a start_datetime")
+            intervals = recurring_intervals(
+                start,
+                end,
+                recurrence["frequency"],
+                count=recurrence.get("count"),
+                until=recurrence.get("until"),
+                limit=max_items,
+            )
+        else:
+            intervals = []
+            for slot in bulk_data["slots"]:
+                start = datetime.fromisoformat(slot["start_datetime"].replace('Z', '+00:00'))
+                end = datetime.fromisoformat(slot["end_datetime"].replace('Z', '+00:00'))
+                if end <= start:
+                    raise ValueError("end_datetime debe ser posterior a start_datetime")
+                intervals.append((start, end))
+        if not intervals:
+            # Sin horarios, or_() de la consulta de citas no filtraría ninguna
+            raise ValueError("La solicitud no genera ninguna cita")
+
+        professional_id = bulk_data["professional_id"]
+        specialty_id = bulk_data.get("specialty_id")
+
+        # Horarios del profesional para los días de la semana involucrados
+        availability_query = (
+            select(EmployeeAvailability)
+            .where(EmployeeAvailability.employee_id == professional_id)
+            .where(EmployeeAvailability.day_of_week.in_({day_of_week(as_utc(start).date()) for start, _ in intervals}))
+            .where(EmployeeAvailability.is_active == True)
+        )
+        if specialty_id:
+            availability_query = availability_query.where(EmployeeAvailability.specialty_id == specialty_id)
+        availabilities = (await db.execute(availability_query)).scalars().all()
+
+        # Citas del profesional que chocan con alguno de los horarios pedidos
+        busy_result = await db.execute(
+            select(Appointment.id, Appointment.start_datetime, Appointment.end_datetime)
+            .where(Appointment.professional_id == professional_id)
+            .where(Appointment.status.in_(BLOCKING_STATUSES))
+            .where(or_(*(
+                and_(Appointment.start_datetime < end, Appointment.end_datetime > start)
+                for start, end in intervals
+            )))
+        )
+        busy = [(row.id, as_utc(row.start_datetime), as_utc(row.end_datetime)) for row in busy_result.all()]
+
+        conflicts = []
+        accepted: list[tuple[datetime, datetime]] = []
+        for index, (start, end) in enumerate(intervals):
+            conflict = {"index": index, "start_datetime": start, "end_datetime": end}
+            start_utc, end_utc = as_utc(start), as_utc(end)
+
+            if not fits_availability(start, end, availabilities):
+                conflicts.append({**conflict, "reason": "OUTSIDE_AVAILABILITY"})
+                continue
+
+            existing = next((item for item in busy if item[1] < end_utc and item[2] > start_utc), None)
+            if existing:
+                conflicts.append({**conflict, "reason": "OVERLAP", "conflicting_appointment_id": existing[0]})
+                continue
+
+            if any(other_start < end_utc and other_end > start_utc for other_start, other_end in accepted):
+                conflicts.append({**conflict, "reason": "DUPLICATE"})
+                continue
+
+            accepted.append((start_utc, end_utc))
+
+        if not accepted or (conflicts and not bulk_data.get("skip_conflicts")):
+            return {"created": [], "conflicts": conflicts}
+
+        # Un solo INSERT ... RETURNING para todas las citas (executemany)
+        rows = [
+            {
+                "patient_id": bulk_data["patient_id"],
+                "professional_id": professional_id,
+                "specialty_id": specialty_id,
+                "appointment_type": bulk_data.get("appointment_type"),
+                "start_datetime": start,
+                "end_datetime": end,
+                "status": "SCHEDULED",
+                "notes": bulk_data.get("notes"),
+            }
+            for start, end in accepted
+        ]
+        # Una reserva concurrente entre la validación y el INSERT la rechaza la
+        # restricción EXCLUDE, al ejecutar el INSERT (se ejecuta de inmediato) o en el commit
+        async with overlap_guard(db):
+            created_ids = (await db.scalars(insert(Appointment).returning(Appointment.id), rows)).all()
+            await db.commit()
+
+        created_result = await db.execute(
+            select(Appointment)
+            .options(*loader_profile(Appointment, "list"))
+            .where(Appointment.id.in_(created_ids))
+            .order_by(Appointment.start_datetime)
+        )
+        created = created_result.unique().scalars().all()
+        for appointment in created:
+            schedule_grid.book(appointment.id, appointment.professional_id, appointment.start_datetime, appointment.end_datetime)
+
+        return {"created": created, "conflicts": conflicts}
 
     @staticmethod
     async def find_all(
@@ -176,9 +326,15 @@ class AppointmentsRepository:
         status: Optional[str] = None,
         page: int = 1,
         limit: int = 20,
+        cursor: Optional[str] = None,
+        include_total: bool = False,
     ):
-        """Listar citas con filtros y paginación"""
-        query = select(Appointment)
+        """
+        Listar citas con filtros y paginación.
+        Si se envía `cursor` (vacío para la primera página) se usa paginación
+        por cursor (start_datetime, id) en lugar de page/limit.
+        """
+        query = select(Appointment).options(*loader_profile(Appointment, "list"))
         
         # Filtros
         if from_date:
@@ -200,6 +356,11 @@ class AppointmentsRepository:
         if status:
             query = query.where(Appointment.status == status)
         
+        if cursor is not None:
+            return await paginate_by_cursor(
+                db, query, Appointment.start_datetime, Appointment.id, cursor, limit, include_total
+            )
+
         # Orden descendente
         query = query.order_by(Appointment.start_datetime.desc())
         
@@ -230,6 +391,7 @@ class AppointmentsRepository:
         """Obtener citas de un paciente específico"""
         query = (
             select(Appointment)
+            .options(*loader_profile(Appointment, "list"))
             .where(Appointment.patient_id == patient_id)
             .order_by(Appointment.start_datetime.desc())
         )
@@ -242,6 +404,7 @@ class AppointmentsRepository:
         """Obtener citas de un profesional específico"""
         query = (
             select(Appointment)
+            .options(*loader_profile(Appointment, "list"))
             .where(Appointment.professional_id == professional_id)
             .order_by(Appointment.start_datetime.desc())
         )
@@ -253,7 +416,9 @@ class AppointmentsRepository:
     async def find_by_id(db: AsyncSession, appointment_id: int) -> Optional[Appointment]:
         """Obtener una cita por ID"""
         result = await db.execute(
-            select(Appointment).where(Appointment.id == appointment_id)
+            select(Appointment)
+            .options(*loader_profile(Appointment, "detail"))
+            .where(Appointment.id == appointment_id)
         )
         return result.unique().scalar_one_or_none()
 
@@ -269,6 +434,8 @@ class AppointmentsRepository:
         if not appointment:
             raise ValueError(f"Cita con ID {appointment_id} no encontrada")
         
+        previous = (appointment.professional_id, appointment.start_datetime, appointment.end_datetime)
+        
         # Validar fechas si se proporcionan
         if "start_datetime" in update_data or "end_datetime" in update_data:
             start = update_data.get("start_datetime")
@@ -287,25 +454,6 @@ class AppointmentsRepository:
             if end <= start:
                 raise ValueError("end_datetime debe ser posterior a start_datetime")
             
-            # Verificar conflictos
-            professional_id = update_data.get("professional_id", appointment.professional_id)
-            
-            if professional_id:
-                conflicts_query = (
-                    select(Appointment)
-                    .where(Appointment.professional_id == professional_id)
-                    .where(Appointment.id != appointment_id)
-                    .where(Appointment.start_datetime < end)
-                    .where(Appointment.end_datetime > start)
-                    .where(Appointment.status.in_(["SCHEDULED", "COMPLETED"]))
-                )
-                
-                result = await db.execute(conflicts_query)
-                conflicts = result.scalars().all()
-                
-                if conflicts:
-                    raise ValueError("El profesional ya tiene una cita agendada en ese horario")
-            
             update_data["start_datetime"] = start
             update_data["end_datetime"] = end
         
@@ -314,10 +462,14 @@ class AppointmentsRepository:
             if value is not None and hasattr(appointment, key):
                 setattr(appointment, key, value)
         
-        await db.commit()
-        await db.refresh(appointment)
+        # Un traslape (cambio de horario, de profesional o reactivación) lo rechaza la restricción EXCLUDE
+        await commit_appointments(db)
         
-        return appointment
+        schedule_grid.release(appointment.id, *previous)
+        if appointment.status in BLOCKING_STATUSES:
+            schedule_grid.book(appointment.id, appointment.professional_id, appointment.start_datetime, appointment.end_datetime)
+        
+        return await reload_with_profile(db, Appointment, appointment.id)
 
     @staticmethod
     async def cancel(db: AsyncSession, appointment_id: int) -> Appointment:
@@ -336,9 +488,9 @@ class AppointmentsRepository:
         appointment.status = "CANCELLED"
         
         await db.commit()
-        await db.refresh(appointment)
+        schedule_grid.release(appointment.id, appointment.professional_id, appointment.start_datetime, appointment.end_datetime)
         
-        return appointment
+        return await reload_with_profile(db, Appointment, appointment.id)
 
     @staticmethod
     async def complete(db: AsyncSession, appointment_id: int) -> Appointment:
@@ -356,7 +508,9 @@ class AppointmentsRepository:
         
         appointment.status = "COMPLETED"
         
-        await db.commit()
-        await db.refresh(appointment)
+        # NO_SHOW -> COMPLETED vuelve a ocupar el horario: puede chocar con otra cita
+        await commit_appointments(db)
+        # COMPLETED sigue ocupando el horario (también si venía de NO_SHOW)
+        schedule_grid.book(appointment.id, appointment.professional_id, appointment.start_datetime, appointment.end_datetime)
         
-        return appointment
+        return await reload_with_profile(db, Appointment, appointment.id)
@@ -1,7 +1,9 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, or_
-from sqlalchemy.orm import joinedload
 from app.db.models import Employee, User
+from app.db.loader_profiles import loader_profile
+from app.db.pagination import paginate_by_cursor
+from app.services.auth.principal_cache import principal_cache
 import math
 
 
@@ -24,13 +26,19 @@ class EmployeesRepo:
         status: str | None = None,
         role_id: int | None = None,
         search: str | None = None,
+        cursor: str | None = None,
+        include_total: bool = False,
     ):
+        """
+        Listar empleados. Si se envía `cursor` (vacío para la primera página)
+        se usa paginación por cursor (created_at, id) en lugar de page/limit.
+        """
         offset = (page - 1) * limit
 
         # Base query
         query = (
             select(Employee)
-            .options(joinedload(Employee.user).joinedload(User.role))
+            .options(*loader_profile(Employee, "list"))
             .order_by(Employee.created_at.desc())
         )
 
@@ -55,6 +63,11 @@ class EmployeesRepo:
                 )
             )
 
+        if cursor is not None:
+            return await paginate_by_cursor(
+                self.db, query, Employee.created_at, Employee.id, cursor, limit, include_total
+            )
+
         # Contar total
         count_query = select(func.count()).select_from(query.subquery())
         total_result = await self.db.execute(count_query)
@@ -80,13 +93,10 @@ class EmployeesRepo:
     async def find_by_id(self, employee_id: int):
         result = await self.db.execute(
             select(Employee)
-            .options(
-                joinedload(Employee.user).joinedload(User.role),
-                joinedload(Employee.area),
-                joinedload(Employee.specialties),
-                joinedload(Employee.availability)
-            )
+            .options(*loader_profile(Employee, "detail"))
             .where(Employee.id == employee_id)
+            # Se usa también para recargar después de un commit
+            .execution_options(populate_existing=True)
         )
         return result.scalars().unique().one_or_none()
 
@@ -102,5 +112,7 @@ class EmployeesRepo:
             setattr(employee, key, value)
 
         await self.db.commit()
+        # El empleado se expone dentro del usuario autenticado (/auth/me)
+        principal_cache.invalidate(employee.user_id)
         await self.db.refresh(employee)
         return employee
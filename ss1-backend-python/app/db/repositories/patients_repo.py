@@ -1,7 +1,15 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_
+from sqlalchemy import select, func, or_, literal_column
 from app.db.models import Patient
+from app.db.pagination import paginate_by_cursor
+from app.services.auth.principal_cache import principal_cache
 from typing import Optional
+import re
+
+
+# Columnas generadas por migrations/0001_patient_search.sql (solo existen en PostgreSQL)
+search_document = literal_column("patients.search_document")
+search_vector = literal_column("patients.search_vector")
 
 
 class PatientsRepo:
@@ -21,12 +29,10 @@ class PatientsRepo:
         )
         return result.scalar_one_or_none()
 
-    async def find_all(
+    def _filtered_query(
         self,
         search: Optional[str] = None,
         status: Optional[str] = None,
-        page: int = 1,
-        limit: int = 10,
     ):
         query = select(Patient).order_by(Patient.created_at.desc())
 
@@ -46,6 +52,17 @@ class PatientsRepo:
         if status:
             query = query.where(Patient.status == status)
 
+        return query
+
+    async def find_all(
+        self,
+        search: Optional[str] = None,
+        status: Optional[str] = None,
+        page: int = 1,
+        limit: int = 10,
+    ):
+        query = self._filtered_query(search=search, status=status)
+
         # Contar total
         count_query = select(func.count()).select_from(query.subquery())
         total_result = await self.db.execute(count_query)
@@ -60,6 +77,59 @@ class PatientsRepo:
 
         return patients, total
 
+    async def find_all_by_cursor(
+        self,
+        cursor: Optional[str],
+        limit: int = 10,
+        include_total: bool = False,
+        search: Optional[str] = None,
+        status: Optional[str] = None,
+    ):
+        """Listar pacientes con paginación por cursor (created_at, id)"""
+        query = self._filtered_query(search=search, status=status)
+        return await paginate_by_cursor(
+            self.db, query, Patient.created_at, Patient.id, cursor, limit, include_total
+        )
+
+    async def search(self, term: str, limit: int = 20):
+        """
+        Búsqueda ordenada por relevancia sobre nombre, apellido, email y teléfono.
+        - Prefijos por palabra sobre el nombre completo ("jos per" -> "José Pérez")
+        - Coincidencia parcial y por similitud (trigramas) sobre todo el documento
+        Sin distinción de mayúsculas ni acentos.
+        """
+        words = re.findall(r"\w+", term.lower())
+        if not words:
+            raise ValueError("El término de búsqueda debe contener letras o números")
+
+        normalized = func.immutable_unaccent(" ".join(words))
+        prefix_query = func.to_tsquery(
+            "simple", func.immutable_unaccent(" & ".join(f"{word}:*" for word in words))
+        )
+        literal_term = re.sub(r"([\\%_])", r"\\\1", term.strip().lower())
+        pattern = func.immutable_unaccent(f"%{literal_term}%")
+
+        query = (
+            select(Patient)
+            .where(
+                or_(
+                    search_vector.op("@@")(prefix_query),
+                    search_document.like(pattern),
+                    search_document.op("%")(normalized),
+                )
+            )
+            .order_by(
+                func.ts_rank(search_vector, prefix_query).desc(),
+                func.similarity(search_document, normalized).desc(),
+                Patient.last_name,
+                Patient.first_name,
+            )
+            .limit(limit)
+        )
+
+        result = await self.db.execute(query)
+        return result.scalars().all()
+
     async def update(self, patient_id: int, patient_data: dict):
         result = await self.db.execute(
             select(Patient).where(Patient.id == patient_id)
@@ -73,6 +143,8 @@ class PatientsRepo:
                 setattr(patient, key, value)
 
         await self.db.commit()
+        # El paciente se expone dentro del usuario autenticado (/auth/me)
+        principal_cache.invalidate(patient.user_id)
         await self.db.refresh(patient)
         return patient
 
@@ -1,6 +1,8 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete
 from app.db.models import Role, Permission, role_permissions
+from app.db.loader_profiles import loader_profile
+from app.services.auth.principal_cache import principal_cache
 
 
 class RolesRepo:
@@ -21,7 +23,10 @@ class RolesRepo:
 
     async def get_role_permissions(self, role_id: int):
         result = await self.db.execute(
-            select(Role).where(Role.id == role_id)
+            select(Role)
+            .where(Role.id == role_id)
+            .options(*loader_profile(Role, "detail"))
+            .execution_options(populate_existing=True)
         )
         role = result.unique().scalar_one_or_none()
         return role
@@ -43,6 +48,7 @@ class RolesRepo:
             await self.db.execute(role_permissions.insert(), values)
 
         await self.db.commit()
+        principal_cache.invalidate_role(role_id)
 
         # Retornar el rol actualizado con sus permisos
         return await self.get_role_permissions(role_id)
@@ -3,6 +3,7 @@ from sqlalchemy import select, func
 from sqlalchemy.exc import IntegrityError
 from app.db.models import Specialty
 from app.api.routes.specialties_schemas import SpecialtyCreate, SpecialtyUpdate
+from app.services.availability.schedule_grid import schedule_grid
 from typing import List, Optional
 
 
@@ -58,6 +59,7 @@ class SpecialtiesRepository:
 
         try:
             await db.commit()
+            schedule_grid.invalidate_windows()
             await db.refresh(specialty)
             return specialty
         except IntegrityError:
@@ -1,7 +1,9 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, or_, update, func
-from sqlalchemy.orm import joinedload
 from app.db.models import User
+from app.db.pagination import paginate_by_cursor
+from app.db.loader_profiles import loader_profile
+from app.services.auth.principal_cache import principal_cache
 from typing import Optional
 
 class UsersRepo:
@@ -12,7 +14,9 @@ class UsersRepo:
         res = await self.db.execute(
             select(User)
             .where(User.id == user_id)
-            .options(joinedload(User.role), joinedload(User.employee), joinedload(User.patient))
+            .options(*loader_profile(User, "principal"))
+            # Se usa también para recargar después de un commit
+            .execution_options(populate_existing=True)
         )
         return res.unique().scalar_one_or_none()
 
@@ -20,7 +24,7 @@ class UsersRepo:
         res = await self.db.execute(
             select(User)
             .where(or_(User.email == email_or_username, User.username == email_or_username))
-            .options(joinedload(User.role), joinedload(User.employee), joinedload(User.patient))
+            .options(*loader_profile(User, "principal"))
         )
         return res.unique().scalar_one_or_none()
 
@@ -36,22 +40,13 @@ class UsersRepo:
         )
         return res.scalar_one_or_none()
 
-    async def find_all(
+    def _filtered_query(
         self,
-        page: int = 1,
-        limit: int = 10,
         role_id: Optional[int] = None,
         is_active: Optional[bool] = None,
         search: Optional[str] = None,
     ):
-        offset = (page - 1) * limit
-
-        # Construir query
-        query = select(User).options(
-            joinedload(User.role),
-            joinedload(User.employee),
-            joinedload(User.patient)
-        )
+        query = select(User).options(*loader_profile(User, "list"))
 
         # Aplicar filtros
         if role_id is not None:
@@ -68,6 +63,21 @@ class UsersRepo:
                 )
             )
 
+        return query
+
+    async def find_all(
+        self,
+        page: int = 1,
+        limit: int = 10,
+        role_id: Optional[int] = None,
+        is_active: Optional[bool] = None,
+        search: Optional[str] = None,
+    ):
+        offset = (page - 1) * limit
+
+        # Construir query
+        query = self._filtered_query(role_id=role_id, is_active=is_active, search=search)
+
         # Obtener total
         count_query = select(func.count()).select_from(query.subquery())
         total_result = await self.db.execute(count_query)
@@ -82,6 +92,21 @@ class UsersRepo:
 
         return users, total
 
+    async def find_all_by_cursor(
+        self,
+        cursor: Optional[str],
+        limit: int = 10,
+        include_total: bool = False,
+        role_id: Optional[int] = None,
+        is_active: Optional[bool] = None,
+        search: Optional[str] = None,
+    ):
+        """Listar usuarios con paginación por cursor (created_at, id)"""
+        query = self._filtered_query(role_id=role_id, is_active=is_active, search=search)
+        return await paginate_by_cursor(
+            self.db, query, User.created_at, User.id, cursor, limit, include_total
+        )
+
     async def update(self, user_id: int, user_data: dict):
         result = await self.db.execute(select(User).where(User.id == user_id))
         user = result.scalar_one_or_none()
@@ -92,6 +117,7 @@ class UsersRepo:
             setattr(user, key, value)
 
         await self.db.commit()
+        principal_cache.invalidate(user_id)
         await self.db.refresh(user)
         return await self.find_by_id(user_id)
 
@@ -105,4 +131,5 @@ class UsersRepo:
     async def patch_user(self, user_id: int, patch: dict) -> User | None:
         await self.db.execute(update(User).where(User.id == user_id).values(**patch))
         await self.db.commit()
+        principal_cache.invalidate(user_id)
         return await self.find_by_id(user_id)
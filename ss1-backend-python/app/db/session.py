@@ -1,11 +1,174 @@
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event, exc
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.db.slow_queries import slow_query_log
 
 if not settings.DATABASE_URL:
     raise RuntimeError("DATABASE_URL no está configurado en .env")
 
-engine = create_async_engine(settings.DATABASE_URL, pool_pre_ping=True)
-SessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+
+class PoolStats:
+    """Tiempos de checkout del pool (espera + conexión nueva + pre-ping)"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checkout_seconds_sum = 0.0
+        self.checkout_seconds_max = 0.0
+        self.timeouts = 0
+
+    def observe(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.checkout_seconds_sum += seconds
+        self.checkout_seconds_max = max(self.checkout_seconds_max, seconds)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool que mide cuánto tarda cada checkout y cuenta los timeouts"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self):
+        # engine.dispose() reemplaza el pool: conservar las métricas acumuladas
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            self.stats.observe(time.perf_counter() - start)
+
+
+def _create_engine(url: str):
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+
+
+class PrimarySession(Session):
+    """Sesión de la base primaria: sus commits activan read-your-writes"""
+
+
+engine = _create_engine(settings.DATABASE_URL)
+SessionLocal = async_sessionmaker(
+    bind=engine, expire_on_commit=False, class_=AsyncSession, sync_session_class=PrimarySession
+)
+
+# Réplica de lectura opcional (READ_DATABASE_URL). Sin réplica, las lecturas van a la primaria
+if settings.READ_DATABASE_URL:
+    read_engine = _create_engine(settings.READ_DATABASE_URL)
+    ReadSessionLocal = async_sessionmaker(bind=read_engine, expire_on_commit=False, class_=AsyncSession)
+else:
+    read_engine = engine
+    ReadSessionLocal = SessionLocal
+
+
+# Cookie con la hora (epoch) del último commit del cliente en la primaria.
+# La lleva el cliente, así que vale en cualquier worker o réplica de la API
+READ_AFTER_WRITE_COOKIE = "ss1_last_write"
+
+
+class WriteMarker:
+    """Hora del último commit en la primaria durante un request"""
+
+    __slots__ = ("committed_at",)
+
+    def __init__(self):
+        self.committed_at: Optional[float] = None
+
+
+# Marcador del request en curso (lo fija ReadYourWritesMiddleware)
+request_write_marker: ContextVar[Optional[WriteMarker]] = ContextVar("request_write_marker", default=None)
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def _mark_primary_write(_session) -> None:
+    marker = request_write_marker.get()
+    if marker is not None:
+        marker.committed_at = time.time()
+
+
+def reads_own_writes(last_write: Optional[str]) -> bool:
+    """
+    True si el cliente escribió en la primaria hace menos de
+    READ_AFTER_WRITE_SECONDS (valor de la cookie READ_AFTER_WRITE_COOKIE): sus
+    lecturas van a la primaria para no ver datos anteriores a su propio cambio
+    mientras la réplica se pone al día.
+    """
+    if not last_write:
+        return False
+    try:
+        elapsed = time.time() - float(last_write)
+    except ValueError:
+        return False
+    # El valor lo envía el cliente: una hora futura no lo deja en la primaria para siempre
+    return 0 <= elapsed < settings.READ_AFTER_WRITE_SECONDS
+
+
+class QueryStats:
+    """Sentencias SQL ejecutadas y tiempo acumulado durante un request"""
+
+    __slots__ = ("statements", "seconds", "scope")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.statements = 0
+        self.seconds = 0.0
+        # Scope ASGI del request: la ruta y el handler se resuelven al enrutar
+        self.scope = scope
+
+    def origin(self) -> tuple[Optional[str], Optional[str]]:
+        """(plantilla de la ruta, handler) que está ejecutando la consulta"""
+        if self.scope is None:
+            return None, None
+        route = self.scope.get("route")
+        endpoint = self.scope.get("endpoint")
+        handler = f"{endpoint.__module__}.{endpoint.__qualname__}" if endpoint else None
+        return getattr(route, "path", None), handler
+
+
+# Estadísticas del request en curso (las fija RequestTimingMiddleware)
+request_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def _before_cursor_execute(_conn, _cursor, _statement, _parameters, context, _executemany) -> None:
+    context._query_start_time = time.perf_counter()
+
+
+def _after_cursor_execute(_conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - context._query_start_time
+    stats = request_query_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.seconds += elapsed
+
+    if slow_query_log.enabled and elapsed >= slow_query_log.threshold_seconds:
+        route, handler = stats.origin() if stats is not None else (None, None)
+        slow_query_log.record(statement, parameters, executemany, elapsed, cursor.rowcount, route, handler)
+
+
+for _engine in {engine, read_engine}:
+    event.listen(_engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(_engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
 
 async def get_db() -> AsyncSession:
     async with SessionLocal() as session:
@@ -0,0 +1,109 @@
+"""
+Registro de consultas lentas.
+
+Los hooks de cursor de app/db/session.py registran aquí cada sentencia que
+supera SLOW_QUERY_THRESHOLD_MS, con el SQL, los parámetros, la duración, las
+filas y la ruta/handler que la originó. Con SLOW_QUERY_LOG_PARAMETERS se
+guardan también los parámetros, sin el contenido de textos ni binarios: ahí
+van cuerpos de correo (contraseñas temporales, códigos 2FA), hashes,
+tokens y notas clínicas. Se conservan las últimas
+SLOW_QUERY_LOG_SIZE en memoria (por proceso) y se consultan en
+GET /admin/slow-queries.
+"""
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Largo máximo del texto de parámetros guardado por consulta
+MAX_PARAMETERS_LENGTH = 2000
+
+
+class _Redacted:
+    """Marcador de un texto o binario oculto: solo tipo y largo"""
+
+    __slots__ = ("kind", "length")
+
+    def __init__(self, value):
+        self.kind = type(value).__name__
+        self.length = len(value)
+
+    def __repr__(self) -> str:
+        return f"<{self.kind} len={self.length}>"
+
+
+def _redact(value):
+    """Reemplaza textos y binarios (también dentro de listas, tuplas y dicts); conserva números, fechas y NULL"""
+    if isinstance(value, (str, bytes, bytearray, memoryview)):
+        return _Redacted(value)
+    if isinstance(value, (list, tuple)):
+        return type(value)(_redact(item) for item in value)
+    if isinstance(value, dict):
+        return {key: _redact(item) for key, item in value.items()}
+    return value
+
+
+def _format_parameters(parameters, executemany: bool) -> Optional[str]:
+    if not settings.SLOW_QUERY_LOG_PARAMETERS:
+        return None
+    if executemany:
+        parameters = list(parameters)
+        text = f"{len(parameters)} sets, first: {_redact(parameters[0])!r}" if parameters else "[]"
+    else:
+        text = repr(_redact(parameters))
+    if len(text) > MAX_PARAMETERS_LENGTH:
+        text = text[:MAX_PARAMETERS_LENGTH] + "…"
+    return text
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float, max_entries: int):
+        self.threshold_seconds = threshold_ms / 1000
+        self._entries: deque[dict] = deque(maxlen=max_entries)
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_seconds > 0
+
+    @property
+    def capacity(self) -> int:
+        return self._entries.maxlen
+
+    def record(
+        self,
+        statement: str,
+        parameters,
+        executemany: bool,
+        duration_seconds: float,
+        row_count: int,
+        route: Optional[str],
+        handler: Optional[str],
+    ) -> None:
+        entry = {
+            "executed_at": datetime.now(timezone.utc),
+            "duration_ms": round(duration_seconds * 1000, 3),
+            "statement": statement,
+            "parameters": _format_parameters(parameters, executemany),
+            "row_count": row_count if row_count is not None and row_count >= 0 else None,
+            "route": route,
+            "handler": handler,
+        }
+        self._entries.append(entry)
+        logger.warning(
+            "Consulta lenta (%.1f ms, %s filas) en %s: %s",
+            entry["duration_ms"], entry["row_count"], route or "-", " ".join(statement.split())[:500],
+        )
+
+    def entries(self, limit: int) -> list[dict]:
+        """Las consultas más recientes primero"""
+        return list(reversed(self._entries))[:limit]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+slow_query_log = SlowQueryLog(settings.SLOW_QUERY_THRESHOLD_MS, settings.SLOW_QUERY_LOG_SIZE)
@@ -16,9 +16,28 @@ from app.api.routes.confidential_notes import router as confidential_notes_route
 from app.api.routes.sessions import router as sessions_router
 from app.api.routes.reports import router as reports_router
 from app.api.routes.payroll import router as payroll_router
+from app.api.routes.metrics import router as metrics_router
+from app.api.routes.slow_queries import router as slow_queries_router
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+from app.api.responses import ORJSONResponse
+from app.core.read_your_writes import ReadYourWritesMiddleware
+from app.core.request_timing import RequestTimingMiddleware
+from app.core.security import HashingPoolBusyError
+from app.services.container import ServiceContainer
 
-app = FastAPI(title="PsiFirm API (Python)")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Servicios de alcance de aplicación (cliente de correo, outbox)
+    services = ServiceContainer()
+    await services.startup()
+    app.state.services = services
+    yield
+    await services.shutdown()
+
+
+app = FastAPI(title="PsiFirm API (Python)", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Manejador de HTTPException para formato consistente
 @app.exception_handler(HTTPException)
@@ -31,6 +50,18 @@ async def http_exception_handler(_request: Request, exc: HTTPException):
         },
     )
 
+# Manejador de saturación del pool de hashing (back-pressure)
+@app.exception_handler(HashingPoolBusyError)
+async def hashing_pool_busy_handler(_request: Request, exc: HashingPoolBusyError):
+    return JSONResponse(
+        status_code=503,
+        content={
+            "message": str(exc),
+            "statusCode": 503,
+        },
+        headers={"Retry-After": "1"},
+    )
+
 # Manejador de errores de validación (formato compatible con NestJS)
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(_request: Request, exc: RequestValidationError):
@@ -90,8 +121,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Con réplica de lectura: cookie de read-your-writes tras un commit en la primaria
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Latencia y sentencias SQL por ruta (GET /metrics, encabezado Server-Timing)
+app.add_middleware(RequestTimingMiddleware)
+
 app.include_router(auth_router)
 app.include_router(users_router)
 app.include_router(roles_router)
@@ -107,4 +145,6 @@ app.include_router(confidential_notes_router)
 app.include_router(sessions_router)
 app.include_router(reports_router)
 app.include_router(payroll_router)
+app.include_router(metrics_router)
+app.include_router(slow_queries_router)
 
@@ -2,8 +2,8 @@ from datetime import datetime, timedelta, timezone
 from secrets import randbelow
 from app.core.config import settings
 from app.core.security import (
-    verify_hash,
-    hash_value,
+    verify_hash_async,
+    hash_value_async,
     create_access_token,
     create_2fa_challenge,
     decode_2fa_challenge,
@@ -26,7 +26,7 @@ class AuthService:
         user = await self.users.find_by_email_or_username(email_or_username)
         if not user or not user.is_active:
             return None
-        if not verify_hash(password, user.password_hash):
+        if not await verify_hash_async(password, user.password_hash):
             return None
         return user
 
@@ -63,7 +63,7 @@ class AuthService:
         await self.users.patch_user(
             user_id,
             {
-                "two_fa_secret": hash_value(code),
+                "two_fa_secret": await hash_value_async(code),
                 "two_fa_expires_at": expires_at,
                 "two_fa_attempts": 0,
             },
@@ -77,13 +77,14 @@ class AuthService:
         }
         subject = subject_map.get(purpose, "Código de verificación")
         text = f"Tu código es: {code}\n\nEste código expira en pocos minutos."
-        self.mail.send_text_email(to=to, subject=subject, text=text)
+        self.mail.send_text_email(to=to, subject=subject, text=text, category="2FA")
 
     async def start_twofa(self, user_id: int, purpose: str) -> str:
         user = await self.users.find_by_id(user_id)
         code = _gen_6_digit_code()
-        await self._store_twofa_code(user_id, code)
+        # El correo se encola antes: se confirma en el mismo commit que el código
         await self._send_twofa_email(user.email, code, purpose)
+        await self._store_twofa_code(user_id, code)
 
         return create_2fa_challenge(
             user_id=user_id,
@@ -111,7 +112,7 @@ class AuthService:
         if attempts >= MAX_2FA_ATTEMPTS:
             return {"ok": False, "reason": "Demasiados intentos. Solicita un nuevo código."}
 
-        if not verify_hash(code, user.two_fa_secret or ""):
+        if not await verify_hash_async(code, user.two_fa_secret or ""):
             await self.users.patch_user(user.id, {"two_fa_attempts": attempts + 1})
             return {"ok": False, "reason": "Código inválido"}
 
@@ -141,7 +142,7 @@ class AuthService:
         if attempts >= MAX_2FA_ATTEMPTS:
             return {"ok": False, "reason": "Demasiados intentos. Solicita un nuevo código."}
 
-        if not verify_hash(code, user.two_fa_secret or ""):
+        if not await verify_hash_async(code, user.two_fa_secret or ""):
             await self.users.patch_user(user.id, {"two_fa_attempts": attempts + 1})
             return {"ok": False, "reason": "Código inválido"}
 
@@ -167,20 +168,22 @@ class AuthService:
         code = _gen_6_digit_code()
         expires_at = datetime.now(timezone.utc) + timedelta(minutes=15)
 
+        # El correo se encola antes: se confirma en el mismo commit que el código
+        self.mail.send_text_email(
+            to=user.email,
+            subject="Código de recuperación de contraseña",
+            text=f"Tu código de recuperación es: {code}\n\nEste código expira en 15 minutos.",
+            category="PASSWORD_RESET",
+        )
+
         await self.users.patch_user(
             user.id,
             {
-                "password_reset_token": hash_value(code),
+                "password_reset_token": await hash_value_async(code),
                 "password_reset_expires": expires_at,
             },
         )
 
-        self.mail.send_text_email(
-            to=user.email,
-            subject="Código de recuperación de contraseña",
-            text=f"Tu código de recuperación es: {code}\n\nEste código expira en 15 minutos.",
-        )
-
     async def reset_password(self, email: str, code: str, new_password: str):
         """Resetea la contraseña usando el código enviado"""
         user = await self.users.find_by_email_or_username(email)
@@ -193,11 +196,11 @@ class AuthService:
         if datetime.now(timezone.utc) > user.password_reset_expires:
             return {"ok": False, "reason": "Código expirado"}
 
-        if not verify_hash(code, user.password_reset_token):
+        if not await verify_hash_async(code, user.password_reset_token):
             return {"ok": False, "reason": "Código inválido"}
 
         # Hash de la nueva contraseña
-        password_hash = hash_value(new_password)
+        password_hash = await hash_value_async(new_password)
 
         # Actualizar contraseña y limpiar token
         await self.users.patch_user(
@@ -218,11 +221,11 @@ class AuthService:
             return {"ok": False, "reason": "Usuario inválido"}
 
         # Verificar que la contraseña actual sea correcta
-        if not verify_hash(current_password, user.password_hash):
+        if not await verify_hash_async(current_password, user.password_hash):
             return {"ok": False, "reason": "Contraseña actual incorrecta"}
 
         # Hash de la nueva contraseña
-        password_hash = hash_value(new_password)
+        password_hash = await hash_value_async(new_password)
 
         # Actualizar contraseña
         await self.users.patch_user(
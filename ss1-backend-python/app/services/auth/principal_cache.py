@@ -0,0 +1,76 @@
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from app.core.config import settings
+
+
+class PrincipalCache:
+    """
+    Caché en memoria (por proceso) del usuario autenticado, indexada por user_id.
+    Evita repetir la consulta de usuario + rol + permisos + empleado + paciente
+    en cada request protegido.
+
+    - Las entradas expiran después de `ttl_seconds`.
+    - Se limita a `max_size` entradas (se descarta la menos usada).
+    - Se invalida explícitamente cuando cambian el usuario o los permisos del rol.
+
+    Nota: con varios workers de uvicorn cada proceso tiene su propia caché,
+    por lo que un cambio hecho en otro worker se refleja a más tardar al expirar el TTL.
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, tuple[float, Any]]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def get(self, user_id: int) -> Optional[Any]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(user_id, None)
+            return None
+
+        self._entries.move_to_end(user_id)
+        return user
+
+    def set(self, user_id: int, user: Any) -> None:
+        if not self.enabled:
+            return
+
+        self._entries[user_id] = (time.monotonic() + self.ttl_seconds, user)
+        self._entries.move_to_end(user_id)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: Optional[int]) -> None:
+        if user_id is None:
+            return
+        self._entries.pop(user_id, None)
+
+    def invalidate_role(self, role_id: int) -> None:
+        """Elimina todos los usuarios en caché que pertenecen al rol indicado"""
+        stale = [
+            user_id
+            for user_id, (_, user) in self._entries.items()
+            if getattr(user, "role_id", None) == role_id
+        ]
+        for user_id in stale:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+)
@@ -0,0 +1,248 @@
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable
+
+
+# Estados que ocupan el horario del profesional
+BLOCKING_STATUSES = ("SCHEDULED", "COMPLETED")
+
+Interval = tuple[datetime, datetime]
+
+
+@dataclass(frozen=True)
+class AvailabilityWindow:
+    """Horario semanal de un profesional, independiente de la sesión de base de datos"""
+
+    employee_id: int
+    employee_name: str
+    area_id: int | None
+    specialty_id: int | None
+    specialty_name: str | None
+    day_of_week: int
+    start_time: time
+    end_time: time
+
+    @classmethod
+    def from_model(cls, avail) -> "AvailabilityWindow":
+        """Desde un EmployeeAvailability cargado con su perfil "detail" (empleado y especialidad)"""
+        return cls(
+            employee_id=avail.employee_id,
+            employee_name=f"{avail.employee.first_name} {avail.employee.last_name}" if avail.employee else "N/A",
+            area_id=avail.employee.area_id if avail.employee else None,
+            specialty_id=avail.specialty_id,
+            specialty_name=avail.specialty.name if avail.specialty else None,
+            day_of_week=avail.day_of_week,
+            start_time=avail.start_time,
+            end_time=avail.end_time,
+        )
+
+
+def day_of_week(target_date: date) -> int:
+    """Día de la semana con 0=Domingo, 6=Sábado (Python usa 0=Lunes)"""
+    return (target_date.weekday() + 1) % 7
+
+
+def date_range(from_date: date, to_date: date) -> list[date]:
+    return [from_date + timedelta(days=n) for n in range((to_date - from_date).days + 1)]
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> list[Interval]:
+    """Ordenar y fusionar intervalos traslapados o contiguos"""
+    merged: list[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def as_utc(value: datetime) -> datetime:
+    """Los timestamps sin zona horaria se interpretan como UTC"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def free_slots(
+    window_start: datetime,
+    window_end: datetime,
+    busy: list[Interval],
+    slot_length: timedelta,
+) -> list[dict]:
+    """
+    Generar los slots libres de una ventana de disponibilidad.
+    `busy` debe venir ordenado y fusionado (merge_intervals), de modo que el
+    recorrido es lineal: un solo puntero avanza sobre los intervalos ocupados.
+    """
+    slots = []
+
+    # Primer intervalo ocupado que termina después del inicio de la ventana
+    # (al estar fusionados, los fines también quedan ordenados)
+    index = bisect_right(busy, window_start, key=lambda interval: interval[1])
+
+    current = window_start
+    while current + slot_length <= window_end:
+        slot_end = current + slot_length
+
+        while index < len(busy) and busy[index][1] <= current:
+            index += 1
+
+        has_conflict = index < len(busy) and busy[index][0] < slot_end
+        if not has_conflict:
+            slots.append({
+                "start": current.isoformat(),
+                "end": slot_end.isoformat(),
+                "available": True,
+            })
+
+        current = slot_end
+
+    return slots
+
+
+def build_day_availability(
+    target_date: date,
+    availabilities: list[AvailabilityWindow],
+    busy_by_professional: dict[int, list[Interval]],
+    slot_length: timedelta,
+) -> dict:
+    """Construir la respuesta de disponibilidad de un día a partir de datos ya cargados"""
+    weekday = day_of_week(target_date)
+    professionals = []
+
+    for avail in availabilities:
+        if avail.day_of_week != weekday:
+            continue
+
+        window_start = datetime.combine(target_date, avail.start_time, tzinfo=timezone.utc)
+        window_end = datetime.combine(target_date, avail.end_time, tzinfo=timezone.utc)
+
+        professionals.append({
+            "employee_id": avail.employee_id,
+            "employee_name": avail.employee_name,
+            "specialty_id": avail.specialty_id,
+            "specialty_name": avail.specialty_name,
+            "available_slots": free_slots(
+                window_start,
+                window_end,
+                busy_by_professional.get(avail.employee_id, []),
+                slot_length,
+            ),
+        })
+
+    return {
+        "date": target_date.isoformat(),
+        "day_of_week": weekday,
+        "professionals": professionals,
+    }
+
+
+def earliest_free_slots(
+    days: list[date],
+    availabilities: list[AvailabilityWindow],
+    busy_by_professional: dict[int, list[Interval]],
+    slot_length: timedelta,
+    after: datetime,
+    limit: int,
+) -> list[dict]:
+    """
+    Primeros `limit` slots libres (de cualquier profesional) que inician en o
+    después de `after`, recorriendo los días en orden; se detiene en cuanto
+    los encuentra.
+    """
+    found: list[dict] = []
+
+    for target_date in days:
+        weekday = day_of_week(target_date)
+        day_slots = []
+
+        for avail in availabilities:
+            if avail.day_of_week != weekday:
+                continue
+
+            window_start = datetime.combine(target_date, avail.start_time, tzinfo=timezone.utc)
+            window_end = datetime.combine(target_date, avail.end_time, tzinfo=timezone.utc)
+            if window_end <= after:
+                continue
+
+            for slot in free_slots(window_start, window_end, busy_by_professional.get(avail.employee_id, []), slot_length):
+                start = datetime.fromisoformat(slot["start"])
+                if start < after:
+                    continue
+                day_slots.append((start, avail.employee_id, {
+                    "start": slot["start"],
+                    "end": slot["end"],
+                    "employee_id": avail.employee_id,
+                    "employee_name": avail.employee_name,
+                    "specialty_id": avail.specialty_id,
+                    "specialty_name": avail.specialty_name,
+                }))
+
+        # Entre profesionales, primero el horario más temprano
+        day_slots.sort(key=lambda item: (item[0], item[1]))
+        found.extend(slot for _, _, slot in day_slots[:limit - len(found)])
+        if len(found) >= limit:
+            break
+
+    return found
+
+
+def range_bounds(from_date: date, to_date: date) -> Interval:
+    """Inicio y fin (exclusivo) en UTC de un rango de días"""
+    return (
+        datetime.combine(from_date, time.min, tzinfo=timezone.utc),
+        datetime.combine(to_date + timedelta(days=1), time.min, tzinfo=timezone.utc),
+    )
+
+
+# Días entre sesiones según la frecuencia de una recurrencia
+RECURRENCE_STEP_DAYS = {"WEEKLY": 7, "BIWEEKLY": 14}
+
+
+def recurring_intervals(
+    start: datetime,
+    end: datetime,
+    frequency: str,
+    count: int | None = None,
+    until: date | None = None,
+    limit: int | None = None,
+) -> list[Interval]:
+    """
+    Expandir una recurrencia a partir de la primera sesión (start, end).
+    Termina tras `count` sesiones o con la última sesión que inicia en `until`
+    (inclusive); `limit` acota el total para recurrencias demasiado largas.
+    """
+    if count is None and until is None:
+        raise ValueError("La recurrencia debe indicar 'count' o 'until'")
+
+    step = timedelta(days=RECURRENCE_STEP_DAYS[frequency])
+    intervals: list[Interval] = []
+
+    current_start, current_end = start, end
+    while count is None or len(intervals) < count:
+        if until is not None and current_start.date() > until:
+            break
+        if limit is not None and len(intervals) >= limit:
+            raise ValueError(f"La recurrencia genera más de {limit} citas")
+        intervals.append((current_start, current_end))
+        current_start, current_end = current_start + step, current_end + step
+
+    return intervals
+
+
+def fits_availability(start: datetime, end: datetime, availabilities: list) -> bool:
+    """True si (start, end) cae completo dentro de un horario del profesional de ese día"""
+    start, end = as_utc(start), as_utc(end)
+    target_date = start.date()
+    weekday = day_of_week(target_date)
+
+    for avail in availabilities:
+        if avail.day_of_week != weekday:
+            continue
+        window_start = datetime.combine(target_date, avail.start_time, tzinfo=timezone.utc)
+        window_end = datetime.combine(target_date, avail.end_time, tzinfo=timezone.utc)
+        if window_start <= start and end <= window_end:
+            return True
+
+    return False
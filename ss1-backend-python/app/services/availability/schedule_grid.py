@@ -0,0 +1,203 @@
+import time
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.loader_profiles import loader_profile
+from app.db.models import Appointment, EmployeeAvailability
+from app.services.availability.availability_engine import (
+    BLOCKING_STATUSES,
+    AvailabilityWindow,
+    Interval,
+    as_utc,
+    date_range,
+    merge_intervals,
+    range_bounds,
+)
+
+# Citas de un día: professional_id -> {appointment_id: (inicio, fin)}
+DaySchedule = dict[int, dict[int, Interval]]
+
+
+class ScheduleGrid:
+    """
+    Agenda precalculada en memoria (por proceso) para GET /appointments/availability.
+
+    - Horarios semanales activos de todos los profesionales (AvailabilityWindow).
+    - Por día (UTC), las citas que ocupan el horario de cada profesional.
+
+    Una consulta de disponibilidad solo va a la base de datos por los días que
+    no están cargados (una consulta para todo el rango faltante); una semana ya
+    cargada se resuelve sin consultas.
+
+    - Las escrituras de citas actualizan los días cargados (book / release).
+    - Los cambios de horario o de datos de un empleado invalidan los horarios.
+    - Las escrituras recientes se vuelven a aplicar al cargar días, por si la
+      réplica de lectura todavía no las refleja.
+
+    Nota: como PrincipalCache, con varios workers de uvicorn cada proceso tiene
+    su propia agenda; un cambio hecho en otro worker (o desde ss1-backend-node)
+    se refleja a más tardar al expirar el TTL.
+    """
+
+    def __init__(self, ttl_seconds: float, max_days: int, replay_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.max_days = max_days
+        self.replay_seconds = replay_seconds
+        self._windows: Optional[tuple[float, list[AvailabilityWindow]]] = None
+        self._days: "OrderedDict[date, tuple[float, DaySchedule]]" = OrderedDict()
+        # appointment_id -> (momento, (professional_id, inicio, fin) o None si ya no ocupa horario)
+        self._recent: dict[int, tuple[float, Optional[tuple[int, datetime, datetime]]]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_days > 0
+
+    async def windows(self, db: AsyncSession) -> list[AvailabilityWindow]:
+        """Horarios semanales activos de todos los profesionales"""
+        if self._windows is not None and self._windows[0] > time.monotonic():
+            return self._windows[1]
+
+        result = await db.execute(
+            select(EmployeeAvailability)
+            .options(*loader_profile(EmployeeAvailability, "detail"))
+            .where(EmployeeAvailability.is_active == True)
+            .order_by(EmployeeAvailability.employee_id, EmployeeAvailability.start_time)
+        )
+        windows = [AvailabilityWindow.from_model(avail) for avail in result.unique().scalars().all()]
+
+        if self.enabled:
+            self._windows = (time.monotonic() + self.ttl_seconds, windows)
+        return windows
+
+    async def busy(self, db: AsyncSession, from_date: date, to_date: date) -> dict[int, list[Interval]]:
+        """Intervalos ocupados (ordenados y fusionados) por profesional en el rango de días"""
+        days = date_range(from_date, to_date)
+        now = time.monotonic()
+
+        schedules: dict[date, DaySchedule] = {}
+        missing = []
+        for day in days:
+            entry = self._days.get(day)
+            if entry is not None and entry[0] > now:
+                self._days.move_to_end(day)
+                schedules[day] = entry[1]
+            else:
+                missing.append(day)
+
+        if missing:
+            schedules.update(await self._load_days(db, missing[0], missing[-1]))
+
+        grouped: dict[int, list[Interval]] = defaultdict(list)
+        for day in days:
+            for professional_id, appointments in schedules[day].items():
+                grouped[professional_id].extend(appointments.values())
+
+        # Una cita que cruza la medianoche aparece en ambos días; merge_intervals la une
+        return {professional_id: merge_intervals(intervals) for professional_id, intervals in grouped.items()}
+
+    async def _load_days(self, db: AsyncSession, from_date: date, to_date: date) -> dict[date, DaySchedule]:
+        range_start, range_end = range_bounds(from_date, to_date)
+        result = await db.execute(
+            select(
+                Appointment.id,
+                Appointment.professional_id,
+                Appointment.start_datetime,
+                Appointment.end_datetime,
+            )
+            .where(Appointment.professional_id.is_not(None))
+            .where(Appointment.status.in_(BLOCKING_STATUSES))
+            .where(Appointment.start_datetime < range_end)
+            .where(Appointment.end_datetime > range_start)
+        )
+
+        schedules: dict[date, DaySchedule] = {day: {} for day in date_range(from_date, to_date)}
+        for appointment_id, professional_id, start, end in result.all():
+            _place(schedules, appointment_id, professional_id, as_utc(start), as_utc(end))
+
+        # Escrituras de este proceso que la réplica podría no reflejar todavía
+        self._prune_recent()
+        for appointment_id, (_, booking) in self._recent.items():
+            for appointments_by_professional in schedules.values():
+                for appointments in appointments_by_professional.values():
+                    appointments.pop(appointment_id, None)
+            if booking is not None:
+                _place(schedules, appointment_id, *booking)
+
+        if self.enabled:
+            expires_at = time.monotonic() + self.ttl_seconds
+            for day, schedule in schedules.items():
+                self._days[day] = (expires_at, schedule)
+                self._days.move_to_end(day)
+            while len(self._days) > self.max_days:
+                self._days.popitem(last=False)
+
+        return schedules
+
+    def book(self, appointment_id: int, professional_id: Optional[int], start: datetime, end: datetime) -> None:
+        """Registrar una cita confirmada que ocupa el horario del profesional"""
+        if professional_id is None:
+            return
+        booking = (professional_id, as_utc(start), as_utc(end))
+        self._remember(appointment_id, booking)
+        _place(self._loaded_schedules(), appointment_id, *booking)
+
+    def release(self, appointment_id: int, professional_id: Optional[int], start: datetime, end: datetime) -> None:
+        """Liberar el horario de una cita (cancelada, movida o reasignada)"""
+        if professional_id is None:
+            return
+        self._remember(appointment_id, None)
+        for day in _days_touched(as_utc(start), as_utc(end)):
+            entry = self._days.get(day)
+            if entry is not None:
+                entry[1].get(professional_id, {}).pop(appointment_id, None)
+
+    def invalidate_windows(self) -> None:
+        self._windows = None
+
+    def clear(self) -> None:
+        self._windows = None
+        self._days.clear()
+        self._recent.clear()
+
+    def _loaded_schedules(self) -> dict[date, DaySchedule]:
+        return {day: schedule for day, (_, schedule) in self._days.items()}
+
+    def _remember(self, appointment_id: int, booking: Optional[tuple[int, datetime, datetime]]) -> None:
+        if self.replay_seconds > 0:
+            self._recent[appointment_id] = (time.monotonic(), booking)
+        self._prune_recent()
+
+    def _prune_recent(self) -> None:
+        cutoff = time.monotonic() - self.replay_seconds
+        stale = [appointment_id for appointment_id, (recorded_at, _) in self._recent.items() if recorded_at <= cutoff]
+        for appointment_id in stale:
+            del self._recent[appointment_id]
+
+
+def _days_touched(start: datetime, end: datetime) -> list[date]:
+    """Días (UTC) que ocupa el intervalo [start, end)"""
+    return date_range(start.date(), (end - timedelta(microseconds=1)).date())
+
+
+def _place(
+    schedules: dict[date, DaySchedule],
+    appointment_id: int,
+    professional_id: int,
+    start: datetime,
+    end: datetime,
+) -> None:
+    for day in _days_touched(start, end):
+        if day in schedules:
+            schedules[day].setdefault(professional_id, {})[appointment_id] = (start, end)
+
+
+schedule_grid = ScheduleGrid(
+    ttl_seconds=settings.SCHEDULE_GRID_TTL_SECONDS,
+    max_days=settings.SCHEDULE_GRID_MAX_DAYS,
+    replay_seconds=settings.READ_AFTER_WRITE_SECONDS,
+)
@@ -0,0 +1,47 @@
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.repositories.users_repo import UsersRepo
+from app.services.auth.auth_service import AuthService
+from app.services.mail_outbox import OutboxDispatcher, OutboxMailer, outbox_dispatcher
+from app.services.mail_transports import build_transport
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """
+    Servicios de alcance de aplicación. Se crea una sola vez en el lifespan
+    (app.state.services) y las rutas lo obtienen con las dependencias de
+    app.api.deps (get_services, get_mailer, get_auth_service).
+
+    Conserva el transporte de correo (un solo cliente con sus conexiones) y
+    el despachador del outbox; los servicios por request solo envuelven la
+    sesión de base de datos.
+    """
+
+    def __init__(self, dispatcher: OutboxDispatcher = outbox_dispatcher):
+        self.mail_transport = None
+        self.outbox_dispatcher = dispatcher
+
+    async def startup(self) -> None:
+        if not settings.MAIL_OUTBOX_ENABLED:
+            return
+        try:
+            self.mail_transport = build_transport()
+        except RuntimeError as exc:
+            # Sin transporte los correos quedan en PENDING hasta el próximo arranque
+            logger.error("Outbox de correos deshabilitado: %s", exc)
+            return
+        self.outbox_dispatcher.start(self.mail_transport)
+
+    async def shutdown(self) -> None:
+        await self.outbox_dispatcher.stop()
+
+    def mailer(self, db: AsyncSession) -> OutboxMailer:
+        return OutboxMailer(db)
+
+    def auth_service(self, db: AsyncSession) -> AuthService:
+        return AuthService(UsersRepo(db), self.mailer(db))
@@ -14,18 +14,21 @@ class MailService:
             raise RuntimeError("MAIL_FROM no está configurado")
         
         self.client = mt.MailtrapClient(token=self.api_token)
+        # MailtrapClient.send crea un cliente HTTP (requests.Session) nuevo en cada
+        # llamada; se conserva uno para reutilizar las conexiones (keep-alive)
+        self.sending_api = self.client.sending_api
 
-    def send_text_email(self, to: str, subject: str, text: str) -> None:
+    def send_text_email(self, to: str, subject: str, text: str, category: str = "2FA") -> None:
         try:
             mail = mt.Mail(
                 sender=mt.Address(email=self.from_email, name=self.from_name),
                 to=[mt.Address(email=to)],
                 subject=subject,
                 text=text,
-                category="2FA",
+                category=category,
             )
             
-            response = self.client.send(mail)
+            response = self.sending_api.send(mail)
             return response
         except Exception as e:
             raise RuntimeError(f"Error al enviar correo: {str(e)}")
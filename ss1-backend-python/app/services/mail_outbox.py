@@ -0,0 +1,193 @@
+"""
+Outbox de correos.
+
+Los handlers no envían correos: los encolan en la tabla email_outbox dentro de
+la misma transacción que el cambio que los origina (OutboxMailer). Si la
+transacción se revierte, el correo tampoco sale.
+
+OutboxDispatcher es una tarea asyncio que vive junto a la aplicación (lifespan):
+- toma lotes de correos pendientes con FOR UPDATE SKIP LOCKED (varias réplicas
+  pueden despachar en paralelo sin enviar dos veces el mismo correo),
+- los envía concurrentemente con el transporte configurado (MAIL_TRANSPORT),
+- registra el resultado: SENT, o reintento con backoff exponencial hasta
+  MAIL_OUTBOX_MAX_ATTEMPTS, después FAILED.
+
+Un correo en SENDING cuyo plazo (lease) venció se vuelve a tomar: cubre el caso
+de un proceso que murió a mitad del envío.
+"""
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import EmailOutbox
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Estados de email_outbox.status
+STATUS_PENDING = "PENDING"
+STATUS_SENDING = "SENDING"
+STATUS_SENT = "SENT"
+STATUS_FAILED = "FAILED"
+
+# Tiempo que un lote tomado queda reservado para el proceso que lo envía
+SENDING_LEASE_SECONDS = 300
+
+# Tope del backoff entre reintentos
+MAX_RETRY_DELAY_SECONDS = 3600
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff exponencial con jitter: base * 2^(intentos-1), con tope"""
+    delay = min(settings.MAIL_OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), MAX_RETRY_DELAY_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+class OutboxMailer:
+    """
+    Reemplazo de MailService para los handlers: misma firma de send_text_email,
+    pero solo agrega el correo a la sesión. Se persiste con el commit del
+    handler y el dispatcher se despierta al confirmarse la transacción.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def send_text_email(self, to: str, subject: str, text: str, category: str = "GENERAL") -> None:
+        self.db.add(EmailOutbox(to_email=to, subject=subject, body_text=text, category=category))
+
+        sync_session = self.db.sync_session
+        if not event.contains(sync_session, "after_commit", _wake_dispatcher):
+            event.listen(sync_session, "after_commit", _wake_dispatcher, once=True)
+
+
+def _wake_dispatcher(_session) -> None:
+    outbox_dispatcher.wake()
+
+
+class OutboxDispatcher:
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.transport = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def start(self, transport) -> None:
+        if self._task is not None:
+            return
+        self.transport = transport
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="email-outbox-dispatcher")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+    def wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                processed = await self.dispatch_once()
+            except Exception:
+                logger.exception("Error al despachar el outbox de correos")
+                processed = 0
+
+            # Lote completo: probablemente quedan más pendientes
+            if processed >= settings.MAIL_OUTBOX_BATCH_SIZE:
+                continue
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.MAIL_OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _claim_batch(self) -> list[EmailOutbox]:
+        """Tomar y reservar (SENDING + lease) un lote de correos vencidos"""
+        now = datetime.now(timezone.utc)
+
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(EmailOutbox)
+                .where(
+                    EmailOutbox.status.in_([STATUS_PENDING, STATUS_SENDING]),
+                    EmailOutbox.next_attempt_at <= now,
+                )
+                .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+                .limit(settings.MAIL_OUTBOX_BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+            )
+            batch = list(result.scalars().all())
+
+            for message in batch:
+                message.status = STATUS_SENDING
+                message.next_attempt_at = now + timedelta(seconds=SENDING_LEASE_SECONDS)
+
+            await session.commit()
+            return batch
+
+    async def _send(self, message: EmailOutbox) -> Optional[str]:
+        """Enviar un correo. Devuelve el error o None si se envió"""
+        try:
+            await asyncio.to_thread(
+                self.transport.send,
+                message.to_email,
+                message.subject,
+                message.body_text or "",
+                message.category,
+            )
+            return None
+        except Exception as exc:
+            return str(exc) or exc.__class__.__name__
+
+    async def dispatch_once(self) -> int:
+        """Despachar un lote. Devuelve cuántos correos se procesaron"""
+        batch = await self._claim_batch()
+        if not batch:
+            return 0
+
+        errors = await asyncio.gather(*(self._send(message) for message in batch))
+        now = datetime.now(timezone.utc)
+
+        async with self.session_factory() as session:
+            for message, error in zip(batch, errors):
+                message = await session.merge(message, load=False)
+                message.attempts += 1
+
+                if error is None:
+                    message.status = STATUS_SENT
+                    message.sent_at = now
+                    message.last_error = None
+                    # El cuerpo puede contener códigos 2FA o contraseñas temporales
+                    message.body_text = None
+                elif message.attempts >= settings.MAIL_OUTBOX_MAX_ATTEMPTS:
+                    message.status = STATUS_FAILED
+                    message.last_error = error
+                    logger.error("Correo %s descartado tras %s intentos: %s", message.id, message.attempts, error)
+                else:
+                    message.status = STATUS_PENDING
+                    message.last_error = error
+                    message.next_attempt_at = now + retry_delay(message.attempts)
+                    logger.warning("Correo %s falló (intento %s): %s", message.id, message.attempts, error)
+
+            await session.commit()
+
+        return len(batch)
+
+
+outbox_dispatcher = OutboxDispatcher()
@@ -0,0 +1,69 @@
+import secrets
+import smtplib
+from datetime import datetime, timezone
+from email.message import EmailMessage
+from pathlib import Path
+
+from app.core.config import settings
+
+
+class MailtrapTransport:
+    """Envío real a través de la API de Mailtrap (MailService)"""
+
+    def __init__(self):
+        # Import diferido: MailService valida el token al construirse
+        from app.services.mail_mailtrap import MailService
+
+        self.mail = MailService()
+
+    def send(self, to: str, subject: str, text: str, category: str) -> None:
+        self.mail.send_text_email(to=to, subject=subject, text=text, category=category)
+
+
+def _build_message(to: str, subject: str, text: str, category: str) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = f"{settings.MAIL_FROM_NAME} <{settings.MAIL_FROM or 'no-reply@localhost'}>"
+    message["To"] = to
+    message["Subject"] = subject
+    message["X-Category"] = category
+    message.set_content(text)
+    return message
+
+
+class SmtpTransport:
+    """
+    Envío por SMTP sin autenticación, pensado para un servidor local de pruebas
+    (MailHog, Mailpit, `python -m aiosmtpd -n`) en MAIL_SMTP_HOST:MAIL_SMTP_PORT.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+
+    def send(self, to: str, subject: str, text: str, category: str) -> None:
+        with smtplib.SMTP(self.host, self.port, timeout=10) as client:
+            client.send_message(_build_message(to, subject, text, category))
+
+
+class FileTransport:
+    """Escribe cada correo como un archivo .eml en MAIL_FILE_DIR (desarrollo sin red)"""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def send(self, to: str, subject: str, text: str, category: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        path = self.directory / f"{stamp}_{secrets.token_hex(4)}_{category.lower()}.eml"
+        path.write_bytes(bytes(_build_message(to, subject, text, category)))
+
+
+def build_transport():
+    """Construir el transporte configurado en MAIL_TRANSPORT (mailtrap | smtp | file)"""
+    if settings.MAIL_TRANSPORT == "file":
+        return FileTransport(settings.MAIL_FILE_DIR)
+    if settings.MAIL_TRANSPORT == "smtp":
+        return SmtpTransport(settings.MAIL_SMTP_HOST, settings.MAIL_SMTP_PORT)
+    if settings.MAIL_TRANSPORT == "mailtrap":
+        return MailtrapTransport()
+    raise RuntimeError(f"MAIL_TRANSPORT no soportado: {settings.MAIL_TRANSPORT}")
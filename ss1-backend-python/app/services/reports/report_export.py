@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import AsyncIterator
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+
+# Formatos de exportación soportados por los reportes (además de "json")
+EXPORT_FORMATS = ("csv", "ndjson")
+
+# Filas que se traen del cursor del servidor en cada lote
+EXPORT_BATCH_SIZE = 1000
+
+_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+async def _stream_rows(
+    session_factory: async_sessionmaker[AsyncSession],
+    statements: tuple[Select, ...],
+    export_format: str,
+) -> AsyncIterator[str]:
+    """
+    Ejecutar cada consulta con un cursor del lado del servidor y producir el
+    resultado por lotes, sin construir el reporte completo en memoria.
+    Todas las consultas deben seleccionar las mismas columnas (mismas etiquetas).
+
+    Abre su propia sesión con `session_factory` (la de get_read_session_factory,
+    para respetar read-your-writes): la sesión de get_read_db se cierra antes de
+    que StreamingResponse termine de enviar el cuerpo.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    async with session_factory() as session:
+        for index, stmt in enumerate(statements):
+            result = await session.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            columns = list(result.keys())
+
+            if export_format == "csv" and index == 0:
+                writer.writerow(columns)
+
+            async for rows in result.partitions():
+                for row in rows:
+                    if export_format == "csv":
+                        writer.writerow(row)
+                    else:
+                        buffer.write(json.dumps(
+                            {column: _json_value(value) for column, value in zip(columns, row)},
+                            ensure_ascii=False,
+                        ))
+                        buffer.write("\n")
+
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+    # Sin filas: el CSV todavía debe llevar el encabezado
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_response(
+    session_factory: async_sessionmaker[AsyncSession],
+    export_format: str,
+    filename: str,
+    *statements: Select,
+) -> StreamingResponse:
+    """Respuesta en streaming (csv | ndjson) para una o más consultas de reporte"""
+    return StreamingResponse(
+        _stream_rows(session_factory, statements, export_format),
+        media_type=_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
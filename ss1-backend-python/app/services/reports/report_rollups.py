@@ -0,0 +1,157 @@
+from calendar import monthrange
+from datetime import date
+from decimal import Decimal
+from typing import Optional, Sequence
+
+from sqlalchemy import Date, case, delete, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import (
+    Invoice,
+    InvoiceItem,
+    InvoiceItemMonthlyRollup,
+    InvoiceMonthlyRollup,
+    Payment,
+    PaymentMonthlyRollup,
+)
+
+
+def whole_months(start_date: date, end_date: date) -> Optional[tuple[date, date]]:
+    """
+    Primer y último mes (día 1) si el rango cubre meses completos, del día 1 de
+    un mes al último día de otro; None si no, o si los acumulados están desactivados.
+    """
+    if not settings.REPORT_ROLLUPS_ENABLED or start_date.day != 1 or start_date > end_date:
+        return None
+    if end_date.day != monthrange(end_date.year, end_date.month)[1]:
+        return None
+    return start_date, end_date.replace(day=1)
+
+
+async def invoiced_by_month(
+    db: AsyncSession,
+    first_month: date,
+    last_month: date,
+    currency: str,
+    statuses: Sequence[str],
+) -> list[tuple[date, Decimal, int]]:
+    """(mes, facturado, facturas) por mes, desde invoice_monthly_rollups"""
+    invoices_count = func.sum(InvoiceMonthlyRollup.invoices_count)
+    result = await db.execute(
+        select(InvoiceMonthlyRollup.month, func.sum(InvoiceMonthlyRollup.invoiced_amount), invoices_count)
+        .where(
+            InvoiceMonthlyRollup.month.between(first_month, last_month),
+            InvoiceMonthlyRollup.currency == currency,
+            InvoiceMonthlyRollup.status.in_(statuses),
+        )
+        .group_by(InvoiceMonthlyRollup.month)
+        # Meses cuyas facturas se borraron todas quedan con 0
+        .having(invoices_count > 0)
+    )
+    return result.all()
+
+
+async def paid_by_month(
+    db: AsyncSession,
+    first_month: date,
+    last_month: date,
+    currency: str,
+) -> list[tuple[date, Decimal, int]]:
+    """(mes, pagado, pagos) por mes, desde payment_monthly_rollups"""
+    result = await db.execute(
+        select(PaymentMonthlyRollup.month, PaymentMonthlyRollup.paid_amount, PaymentMonthlyRollup.payments_count)
+        .where(
+            PaymentMonthlyRollup.month.between(first_month, last_month),
+            PaymentMonthlyRollup.currency == currency,
+            PaymentMonthlyRollup.payments_count > 0,
+        )
+    )
+    return result.all()
+
+
+async def sales_summary(db: AsyncSession, first_month: date, last_month: date) -> dict:
+    """Resumen de /reports/sales (todas las monedas y estados) desde los acumulados"""
+    total_sales, invoices_count = (
+        await db.execute(
+            select(
+                func.coalesce(func.sum(InvoiceMonthlyRollup.invoiced_amount), 0),
+                func.coalesce(func.sum(InvoiceMonthlyRollup.invoices_count), 0),
+            ).where(InvoiceMonthlyRollup.month.between(first_month, last_month))
+        )
+    ).one()
+
+    items_result = await db.execute(
+        select(
+            InvoiceItemMonthlyRollup.item_type,
+            func.sum(InvoiceItemMonthlyRollup.items_count),
+            func.sum(InvoiceItemMonthlyRollup.items_amount),
+        )
+        .where(InvoiceItemMonthlyRollup.month.between(first_month, last_month))
+        .group_by(InvoiceItemMonthlyRollup.item_type)
+    )
+    items = {item_type: (count, amount) for item_type, count, amount in items_result.all()}
+    services_count, services_amount = items.get("SERVICE", (0, 0))
+    products_count, products_amount = items.get("PRODUCT", (0, 0))
+
+    return {
+        "total_sales": float(total_sales),
+        "invoices_count": int(invoices_count),
+        "services_count": int(services_count),
+        "services_amount": float(services_amount),
+        "products_count": int(products_count),
+        "products_amount": float(products_amount),
+    }
+
+
+async def rebuild_report_rollups(db: AsyncSession) -> None:
+    """
+    Recalcular los acumulados desde invoices, invoice_items y payments: reparación
+    (p. ej. tras un TRUNCATE, que no dispara los triggers) o bases creadas sin la
+    migración 0005, como las de benchmarks.
+    En PostgreSQL las escrituras de facturación esperan hasta el commit; las lecturas no.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(text("LOCK TABLE invoices, invoice_items, payments IN SHARE MODE"))
+
+    for model in (InvoiceMonthlyRollup, PaymentMonthlyRollup, InvoiceItemMonthlyRollup):
+        await db.execute(delete(model))
+
+    invoice_month = func.date(func.date_trunc("month", Invoice.invoice_date), type_=Date)
+    await db.execute(
+        insert(InvoiceMonthlyRollup).from_select(
+            ["month", "currency", "status", "invoices_count", "invoiced_amount"],
+            select(invoice_month, Invoice.currency, Invoice.status, func.count(), func.sum(Invoice.total_amount))
+            .group_by(invoice_month, Invoice.currency, Invoice.status),
+        )
+    )
+
+    payment_month = func.date(func.date_trunc("month", func.timezone("UTC", Payment.paid_at)), type_=Date)
+    await db.execute(
+        insert(PaymentMonthlyRollup).from_select(
+            ["month", "currency", "payments_count", "paid_amount"],
+            select(payment_month, Invoice.currency, func.count(), func.sum(Payment.amount))
+            .join(Invoice, Invoice.id == Payment.invoice_id)
+            .group_by(payment_month, Invoice.currency),
+        )
+    )
+
+    item_type = case((InvoiceItem.service_id.isnot(None), "SERVICE"), else_="PRODUCT")
+    item_id = func.coalesce(InvoiceItem.service_id, InvoiceItem.product_id)
+    await db.execute(
+        insert(InvoiceItemMonthlyRollup).from_select(
+            ["month", "item_type", "item_id", "items_count", "quantity", "items_amount"],
+            select(
+                invoice_month,
+                item_type,
+                item_id,
+                func.count(),
+                func.sum(InvoiceItem.quantity),
+                func.sum(InvoiceItem.total_amount),
+            )
+            .join(Invoice, Invoice.id == InvoiceItem.invoice_id)
+            .group_by(invoice_month, item_type, item_id),
+        )
+    )
+
+    await db.commit()
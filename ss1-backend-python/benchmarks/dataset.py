@@ -0,0 +1,294 @@
+"""
+Generador determinista de datos para los benchmarks.
+
+Con la misma semilla y los mismos tamaños produce exactamente los mismos
+datos: pacientes, empleados con especialidad y horarios, citas, facturas con
+pagos, un período de nómina y (opcionalmente) historias clínicas con sesiones. Las fechas son fijas (no dependen de hoy).
+
+Funciona sobre PostgreSQL y, para pruebas rápidas, sobre SQLite
+(sqlite+aiosqlite:///archivo.db): en ese caso se registran equivalentes
+mínimos de date_trunc()/timezone() y BIGINT se compila como INTEGER para que
+los ids sean autoincrementales.
+
+Debe usarse sobre una base de datos DESECHABLE.
+"""
+import random
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import BigInteger, event, func, insert, select
+from sqlalchemy.ext.compiler import compiles
+
+from app.core.security import hash_value
+from app.db import models
+from app.services.availability.availability_engine import day_of_week
+from app.services.reports.report_rollups import rebuild_report_rollups
+
+# Ventana de fechas de los datos generados
+DATA_START = date(2025, 1, 1)
+DATA_END = date(2025, 3, 31)
+
+# Período de nómina generado
+PAYROLL_START = date(2025, 1, 1)
+PAYROLL_END = date(2025, 1, 31)
+
+ADMIN_EMAIL = "bench-admin@example.com"
+ADMIN_PASSWORD = "bench-password"
+
+BATCH_SIZE = 5000
+
+FIRST_NAMES = (
+    "José", "María", "Juan", "Ana", "Luis", "Lucía", "Carlos", "Sofía", "Jorge", "Valeria",
+    "Andrés", "Camila", "Miguel", "Fernanda", "Diego", "Gabriela", "Pedro", "Daniela", "Raúl", "Inés",
+)
+LAST_NAMES = (
+    "Pérez", "López", "García", "Hernández", "Martínez", "González", "Rodríguez", "Morales",
+    "Ramírez", "Castillo", "Méndez", "Ortiz", "Cruz", "Reyes", "Juárez", "Monzón", "Barrios", "Véliz",
+)
+SPECIALTIES = ("Psicología clínica", "Psiquiatría", "Terapia familiar")
+
+# Horarios de lunes a viernes
+WORKDAY_BLOCKS = ((time(8), time(12)), (time(14), time(18)))
+
+
+@dataclass
+class Dataset:
+    """Ids y valores que necesitan los escenarios de carga"""
+
+    admin_user_id: int
+    admin_email: str
+    admin_password: str
+    period_id: int
+    specialty_ids: list[int]
+    employee_ids: list[int]
+    patient_ids: list[int] = field(default_factory=list)
+    clinical_record_ids: list[int] = field(default_factory=list)
+    search_terms: list[str] = field(default_factory=list)
+    data_start: date = DATA_START
+    data_end: date = DATA_END
+
+
+@compiles(BigInteger, "sqlite")
+def _sqlite_bigint(_type, _compiler, **_kw):
+    # En SQLite solo INTEGER PRIMARY KEY es autoincremental
+    return "INTEGER"
+
+
+def _sqlite_date_trunc(unit: str, value):
+    if value is None:
+        return None
+    if unit == "month":
+        return value[:7] + "-01 00:00:00"
+    return value
+
+
+def enable_sqlite_support(engine) -> None:
+    """Funciones de PostgreSQL que usan los reportes, en versión mínima para SQLite"""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _register_functions(dbapi_connection, _record):
+        dbapi_connection.create_function("date_trunc", 2, _sqlite_date_trunc)
+        dbapi_connection.create_function("timezone", 2, lambda _zone, value: value)
+
+
+async def _insert_batches(db, model, rows: list[dict]) -> None:
+    for offset in range(0, len(rows), BATCH_SIZE):
+        await db.execute(insert(model), rows[offset:offset + BATCH_SIZE])
+
+
+async def generate(
+    engine,
+    session_factory,
+    *,
+    patients: int,
+    employees: int,
+    appointments: int,
+    invoices: int,
+    clinical_records: int = 0,
+    sessions_per_record: int = 8,
+    seed: int = 42,
+    reset: bool = False,
+) -> Dataset:
+    """Crear las tablas (o recrearlas con reset) y cargar los datos"""
+    rng = random.Random(seed)
+    enable_sqlite_support(engine)
+
+    async with engine.begin() as conn:
+        if reset:
+            await conn.run_sync(models.Base.metadata.drop_all)
+        await conn.run_sync(models.Base.metadata.create_all)
+
+    async with session_factory() as db:
+        if await db.scalar(select(func.count(models.Patient.id))):
+            raise SystemExit("La base de datos ya tiene datos; use --reset sobre una base desechable")
+
+        role = models.Role(name="SUPER_ADMIN", label="Super administrador")
+        area = models.Area(name="Clínica")
+        specialty_rows = [models.Specialty(name=name) for name in SPECIALTIES]
+        payment_method = models.PaymentMethod(name="Efectivo")
+        db.add_all([role, area, payment_method, *specialty_rows])
+        await db.flush()
+
+        admin = models.User(
+            email=ADMIN_EMAIL,
+            username="bench-admin",
+            password_hash=hash_value(ADMIN_PASSWORD),
+            role_id=role.id,
+            is_active=True,
+        )
+        period = models.PayrollPeriod(period_start=PAYROLL_START, period_end=PAYROLL_END, status="OPEN")
+        db.add_all([admin, period])
+        await db.flush()
+
+        specialty_ids = [specialty.id for specialty in specialty_rows]
+
+        # Empleados, cada uno con una especialidad y horario de lunes a viernes
+        await _insert_batches(db, models.Employee, [
+            {
+                "first_name": rng.choice(FIRST_NAMES),
+                "last_name": f"{rng.choice(LAST_NAMES)} {n}",
+                "area_id": area.id,
+                "base_salary": rng.choice((4000, 5000, 6500)),
+                "session_rate": rng.choice((150, 200, 250)),
+                "igss_percentage": 4.83,
+                "status": "ACTIVE",
+            }
+            for n in range(employees)
+        ])
+        employee_ids = list((await db.scalars(select(models.Employee.id).order_by(models.Employee.id))).all())
+        employee_specialty = {employee_id: rng.choice(specialty_ids) for employee_id in employee_ids}
+
+        await db.execute(
+            insert(models.employee_specialties),
+            [{"employee_id": employee_id, "specialty_id": specialty_id}
+             for employee_id, specialty_id in employee_specialty.items()],
+        )
+
+        monday = DATA_START + timedelta(days=(7 - DATA_START.weekday()) % 7)
+        workdays = [day_of_week(monday + timedelta(days=n)) for n in range(5)]
+        await _insert_batches(db, models.EmployeeAvailability, [
+            {
+                "employee_id": employee_id,
+                "day_of_week": weekday,
+                "start_time": start,
+                "end_time": end,
+                "specialty_id": specialty_id,
+                "is_active": True,
+            }
+            for employee_id, specialty_id in employee_specialty.items()
+            for weekday in workdays
+            for start, end in WORKDAY_BLOCKS
+        ])
+
+        # Pacientes
+        patient_rows = []
+        for n in range(patients):
+            first_name = rng.choice(FIRST_NAMES)
+            last_name = rng.choice(LAST_NAMES)
+            patient_rows.append({
+                "first_name": first_name,
+                "last_name": f"{last_name} {rng.choice(LAST_NAMES)}",
+                "email": f"paciente{n}@example.com",
+                "phone": f"5{n:07d}",
+                "status": "ACTIVE",
+            })
+        await _insert_batches(db, models.Patient, patient_rows)
+        patient_ids = list((await db.scalars(select(models.Patient.id).order_by(models.Patient.id))).all())
+
+        # Citas de una hora dentro de los bloques de horario, en días hábiles
+        window_days = [
+            DATA_START + timedelta(days=n)
+            for n in range((DATA_END - DATA_START).days + 1)
+            if (DATA_START + timedelta(days=n)).weekday() < 5
+        ]
+        slot_hours = [hour for start, end in WORKDAY_BLOCKS for hour in range(start.hour, end.hour)]
+        appointment_rows = []
+        for _ in range(appointments):
+            professional_id = rng.choice(employee_ids)
+            start = datetime.combine(rng.choice(window_days), time(rng.choice(slot_hours)), tzinfo=timezone.utc)
+            appointment_rows.append({
+                "patient_id": rng.choice(patient_ids),
+                "professional_id": professional_id,
+                "specialty_id": employee_specialty[professional_id],
+                "start_datetime": start,
+                "end_datetime": start + timedelta(hours=1),
+                "status": rng.choices(("COMPLETED", "SCHEDULED", "CANCELLED"), (7, 2, 1))[0],
+            })
+        await _insert_batches(db, models.Appointment, appointment_rows)
+
+        # Facturas; la mayoría con un pago
+        invoice_rows = []
+        for n in range(invoices):
+            invoice_rows.append({
+                "invoice_number": f"B-{n:08d}",
+                "patient_id": rng.choice(patient_ids),
+                "invoice_date": rng.choice(window_days),
+                "currency": "GTQ",
+                "total_amount": rng.choice((150, 200, 250, 300, 450)),
+                "status": "ISSUED",
+            })
+        await _insert_batches(db, models.Invoice, invoice_rows)
+
+        invoice_result = await db.execute(
+            select(models.Invoice.id, models.Invoice.invoice_date, models.Invoice.total_amount)
+            .order_by(models.Invoice.id)
+        )
+        payment_rows = []
+        for invoice_id, invoice_date, total_amount in invoice_result.all():
+            if rng.random() < 0.8:
+                paid_at = datetime.combine(invoice_date, time(rng.randrange(8, 18)), tzinfo=timezone.utc)
+                payment_rows.append({
+                    "invoice_id": invoice_id,
+                    "payment_method_id": payment_method.id,
+                    "amount": total_amount,
+                    "paid_at": paid_at + timedelta(days=rng.randrange(0, 10)),
+                })
+        await _insert_batches(db, models.Payment, payment_rows)
+
+        # Historias clínicas con sesiones semanales
+        await _insert_batches(db, models.ClinicalRecord, [
+            {
+                "patient_id": rng.choice(patient_ids),
+                "responsible_employee_id": rng.choice(employee_ids),
+                "opening_date": rng.choice(window_days),
+                "status": "ACTIVE",
+            }
+            for _ in range(clinical_records)
+        ])
+        clinical_record_ids = list(
+            (await db.scalars(select(models.ClinicalRecord.id).order_by(models.ClinicalRecord.id))).all()
+        )
+        session_rows = []
+        for clinical_record_id in clinical_record_ids:
+            first_session = datetime.combine(rng.choice(window_days), time(rng.choice(slot_hours)), tzinfo=timezone.utc)
+            session_rows.extend(
+                {
+                    "clinical_record_id": clinical_record_id,
+                    "professional_id": rng.choice(employee_ids),
+                    "session_datetime": first_session + timedelta(weeks=n),
+                    "session_number": n + 1,
+                    "attended": rng.random() < 0.9,
+                }
+                for n in range(sessions_per_record)
+            )
+        await _insert_batches(db, models.Session, session_rows)
+
+        await db.commit()
+
+        # create_all no instala los triggers de los acumulados de reportes
+        await rebuild_report_rollups(db)
+
+        return Dataset(
+            admin_user_id=admin.id,
+            admin_email=ADMIN_EMAIL,
+            admin_password=ADMIN_PASSWORD,
+            period_id=period.id,
+            specialty_ids=specialty_ids,
+            employee_ids=employee_ids,
+            patient_ids=patient_ids,
+            clinical_record_ids=clinical_record_ids,
+            # Prefijos de apellidos (con y sin acento) y un email
+            search_terms=["pér", "lopez", "gonz", "mor", "paciente1"],
+        )
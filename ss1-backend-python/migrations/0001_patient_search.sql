@@ -0,0 +1,35 @@
+-- ==========================================
+-- 0001 - Búsqueda de pacientes (GET /patients/search)
+-- ==========================================
+-- - pg_trgm: similitud y coincidencias parciales (errores de tipeo, emails, teléfonos)
+-- - unaccent: "jose" encuentra "José", "perez" encuentra "Pérez"
+-- - search_document / search_vector: columnas generadas, indexadas con GIN
+-- ==========================================
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() es STABLE; las columnas generadas e índices requieren IMMUTABLE.
+-- Se fija el diccionario explícitamente para que el resultado no dependa del search_path.
+CREATE OR REPLACE FUNCTION immutable_unaccent(text)
+  RETURNS text
+  LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+
+ALTER TABLE patients
+  ADD COLUMN IF NOT EXISTS search_document TEXT GENERATED ALWAYS AS (
+    immutable_unaccent(lower(
+      first_name || ' ' || last_name
+      || ' ' || coalesce(email, '')
+      || ' ' || coalesce(phone, '')
+    ))
+  ) STORED,
+  ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS (
+    to_tsvector('simple', immutable_unaccent(lower(first_name || ' ' || last_name)))
+  ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_patients_search_trgm ON patients USING GIN (search_document gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_patients_search_vector ON patients USING GIN (search_vector);
+
+COMMIT;
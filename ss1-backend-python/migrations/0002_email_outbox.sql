@@ -0,0 +1,31 @@
+-- ==========================================
+-- 0002 - Outbox de correos (app/services/mail_outbox.py)
+-- ==========================================
+-- Los handlers solo insertan aquí (en la misma transacción que su cambio);
+-- un despachador en segundo plano envía, reintenta y registra el estado.
+-- ==========================================
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS email_outbox (
+  id BIGSERIAL PRIMARY KEY,
+  to_email VARCHAR(255) NOT NULL,
+  subject VARCHAR(255) NOT NULL,
+  body_text TEXT,
+  -- se limpia al enviarse (puede contener contraseñas temporales o códigos 2FA)
+  category VARCHAR(50) NOT NULL DEFAULT 'GENERAL',
+  status VARCHAR(20) NOT NULL DEFAULT 'PENDING',
+  -- PENDING, SENDING, SENT, FAILED
+  attempts INTEGER NOT NULL DEFAULT 0,
+  next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  last_error TEXT,
+  sent_at TIMESTAMPTZ,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  CONSTRAINT chk_email_outbox_status CHECK (status IN ('PENDING', 'SENDING', 'SENT', 'FAILED'))
+);
+
+-- Cola de trabajo: solo las filas que el despachador todavía debe procesar
+CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON email_outbox(next_attempt_at)
+  WHERE status IN ('PENDING', 'SENDING');
+
+COMMIT;
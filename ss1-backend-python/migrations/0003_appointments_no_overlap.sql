@@ -0,0 +1,27 @@
+-- ==========================================
+-- 0003 - Citas sin traslape por profesional (POST/PUT /appointments)
+-- ==========================================
+-- La base de datos rechaza dos citas activas (SCHEDULED/COMPLETED) del mismo
+-- profesional cuyos horarios se traslapan; reemplaza la consulta previa de
+-- conflictos y es segura con reservas concurrentes.
+-- - btree_gist: permite "professional_id WITH =" dentro de un índice GiST
+-- - tstzrange(start, end) usa límites [): una cita que termina a las 10:00
+--   no choca con otra que empieza a las 10:00
+-- ==========================================
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+-- Si hay traslapes existentes la restricción no se puede crear; para listarlos:
+--   SELECT a.id, b.id FROM appointments a JOIN appointments b
+--     ON a.professional_id = b.professional_id AND a.id < b.id
+--    AND tstzrange(a.start_datetime, a.end_datetime) && tstzrange(b.start_datetime, b.end_datetime)
+--    WHERE a.status IN ('SCHEDULED', 'COMPLETED') AND b.status IN ('SCHEDULED', 'COMPLETED');
+ALTER TABLE appointments
+  ADD CONSTRAINT excl_appointments_professional_overlap
+  EXCLUDE USING gist (
+    professional_id WITH =,
+    tstzrange(start_datetime, end_datetime) WITH &&
+  ) WHERE (status IN ('SCHEDULED', 'COMPLETED'));
+
+COMMIT;
@@ -0,0 +1,77 @@
+"""
+Pruebas de la API en proceso (httpx.ASGITransport) sobre SQLite.
+
+La base se genera una vez por sesión con el dataset determinista de
+benchmarks.dataset. DATABASE_URL se fija antes de importar la aplicación;
+no se usa la base de .env. Con TEST_DATABASE_URL (una base PostgreSQL
+DESECHABLE: se eliminan y recrean todas las tablas) se usa esa base en
+lugar de SQLite y corren también las pruebas solo de PostgreSQL.
+"""
+import os
+import tempfile
+
+_DB_DIR = tempfile.mkdtemp(prefix="ss1-tests-")
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL") or f"sqlite+aiosqlite:///{_DB_DIR}/test.db"
+os.environ["READ_DATABASE_URL"] = ""
+os.environ["MAIL_OUTBOX_ENABLED"] = "false"
+os.environ.setdefault("JWT_ACCESS_SECRET", "test-secret")
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.session import SessionLocal, engine
+from app.main import app
+from app.services.auth.principal_cache import principal_cache
+from app.services.availability.schedule_grid import schedule_grid
+from benchmarks.dataset import Dataset, generate
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def dataset() -> Dataset:
+    dataset = await generate(
+        engine,
+        SessionLocal,
+        patients=60,
+        employees=6,
+        appointments=300,
+        invoices=200,
+        clinical_records=10,
+        sessions_per_record=4,
+        reset=True,
+    )
+    yield dataset
+    await engine.dispose()
+
+
+@pytest.fixture(scope="session")
+async def app_services(dataset):
+    """Lifespan de la aplicación: app.state.services (correo, AuthService)"""
+    async with app.router.lifespan_context(app):
+        yield app.state.services
+
+
+@pytest.fixture
+async def client(app_services):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+def admin_headers(dataset) -> dict:
+    token = create_access_token(subject=str(dataset.admin_user_id), secret=settings.JWT_ACCESS_SECRET, expires_in="1h")
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(autouse=True)
+def cold_caches():
+    """Cada prueba empieza sin usuario ni agenda en memoria"""
+    principal_cache.clear()
+    schedule_grid.clear()
@@ -0,0 +1,74 @@
+"""
+POST /appointments/bulk cuando la restricción EXCLUDE rechaza el INSERT.
+
+SQLite no tiene EXCLUDE: un trigger hace el papel de una reserva concurrente
+que ocupa el horario después de la validación de create_bulk. El trigger
+aborta con el mismo mensaje que PostgreSQL, que is_overlap_violation reconoce.
+"""
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, select, text
+
+from app.db.models import Appointment
+from app.db.repositories.appointments_repo import OVERLAP_CONSTRAINT, OVERLAP_MESSAGE
+from app.db.session import SessionLocal, engine
+
+pytestmark = pytest.mark.anyio
+
+# El trigger que simula la restricción EXCLUDE es de SQLite
+sqlite_only = pytest.mark.skipif(engine.dialect.name != "sqlite", reason="trigger de SQLite")
+
+CONCURRENT_NOTES = "reserva concurrente"
+
+
+@pytest.fixture
+async def concurrent_booking(dataset):
+    async with engine.begin() as connection:
+        await connection.execute(text(f"""
+            CREATE TRIGGER concurrent_booking BEFORE INSERT ON appointments
+            WHEN NEW.notes = '{CONCURRENT_NOTES}'
+            BEGIN
+                SELECT RAISE(ABORT, 'conflicting key value violates exclusion constraint "{OVERLAP_CONSTRAINT}"');
+            END
+        """))
+    yield
+    async with engine.begin() as connection:
+        await connection.execute(text("DROP TRIGGER concurrent_booking"))
+
+
+@sqlite_only
+async def test_bulk_insert_overlap_is_400(client, admin_headers, dataset, concurrent_booking):
+    # Lunes sin citas del dataset, dentro del horario de los profesionales
+    monday = dataset.data_end + timedelta(days=7 - dataset.data_end.weekday())
+    payload = {
+        "patient_id": dataset.patient_ids[0],
+        "professional_id": dataset.employee_ids[0],
+        "notes": CONCURRENT_NOTES,
+        "start_datetime": f"{monday}T09:00:00Z",
+        "end_datetime": f"{monday}T10:00:00Z",
+        "recurrence": {"frequency": "WEEKLY", "count": 3},
+    }
+
+    response = await client.post("/appointments/bulk", json=payload, headers=admin_headers)
+
+    assert response.status_code == 400
+    assert response.json()["message"] == OVERLAP_MESSAGE
+    async with SessionLocal() as db:
+        created = await db.scalar(select(func.count()).where(Appointment.notes == CONCURRENT_NOTES))
+    assert created == 0
+
+
+async def test_bulk_until_before_first_session_is_rejected(client, admin_headers, dataset):
+    payload = {
+        "patient_id": dataset.patient_ids[0],
+        "professional_id": dataset.employee_ids[0],
+        "start_datetime": f"{dataset.data_start}T09:00:00Z",
+        "end_datetime": f"{dataset.data_start}T10:00:00Z",
+        "recurrence": {"frequency": "WEEKLY", "until": str(dataset.data_start - timedelta(days=1))},
+    }
+
+    response = await client.post("/appointments/bulk", json=payload, headers=admin_headers)
+
+    assert response.status_code == 400
+    assert response.json()["message"] == ["'until' no puede ser anterior a la primera sesión"]
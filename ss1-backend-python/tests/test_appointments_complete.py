@@ -0,0 +1,78 @@
+"""
+POST /appointments/{id}/complete de una cita NO_SHOW cuyo horario ya ocupa otra.
+
+NO_SHOW no bloquea el horario, así que se puede agendar otra cita encima; al
+completarla la restricción EXCLUDE rechaza el UPDATE. En SQLite un trigger
+hace el papel de la restricción, con el mismo mensaje que PostgreSQL.
+"""
+import pytest
+from sqlalchemy import delete, select, text, update
+
+from app.db.models import Appointment
+from app.db.repositories.appointments_repo import OVERLAP_CONSTRAINT, OVERLAP_MESSAGE
+from app.db.session import SessionLocal, engine
+
+pytestmark = pytest.mark.anyio
+
+# El trigger que simula la restricción EXCLUDE es de SQLite
+sqlite_only = pytest.mark.skipif(engine.dialect.name != "sqlite", reason="trigger de SQLite")
+
+
+@pytest.fixture
+async def overlap_constraint(dataset):
+    async with engine.begin() as connection:
+        await connection.execute(text(f"""
+            CREATE TRIGGER overlap_constraint BEFORE UPDATE OF status ON appointments
+            WHEN NEW.status IN ('SCHEDULED', 'COMPLETED') AND EXISTS (
+                SELECT 1 FROM appointments a
+                WHERE a.id <> NEW.id
+                  AND a.professional_id = NEW.professional_id
+                  AND a.status IN ('SCHEDULED', 'COMPLETED')
+                  AND a.start_datetime < NEW.end_datetime
+                  AND a.end_datetime > NEW.start_datetime
+            )
+            BEGIN
+                SELECT RAISE(ABORT, 'conflicting key value violates exclusion constraint "{OVERLAP_CONSTRAINT}"');
+            END
+        """))
+    yield
+    async with engine.begin() as connection:
+        await connection.execute(text("DROP TRIGGER overlap_constraint"))
+
+
+@pytest.fixture
+async def no_show_taken_over(overlap_constraint):
+    """(cita NO_SHOW, cita SCHEDULED en el mismo horario)"""
+    async with SessionLocal() as db:
+        original = await db.scalar(
+            select(Appointment).where(Appointment.status == "SCHEDULED").order_by(Appointment.id).limit(1)
+        )
+        original.status = "NO_SHOW"
+        replacement = Appointment(
+            patient_id=original.patient_id,
+            professional_id=original.professional_id,
+            specialty_id=original.specialty_id,
+            start_datetime=original.start_datetime,
+            end_datetime=original.end_datetime,
+            status="SCHEDULED",
+        )
+        db.add(replacement)
+        await db.commit()
+        ids = (original.id, replacement.id)
+    yield ids
+    async with SessionLocal() as db:
+        await db.execute(delete(Appointment).where(Appointment.id == ids[1]))
+        await db.execute(update(Appointment).where(Appointment.id == ids[0]).values(status="SCHEDULED"))
+        await db.commit()
+
+
+@sqlite_only
+async def test_complete_no_show_overlap_is_400(client, admin_headers, no_show_taken_over):
+    no_show_id, _ = no_show_taken_over
+
+    response = await client.post(f"/appointments/{no_show_id}/complete", headers=admin_headers)
+
+    assert response.status_code == 400
+    assert response.json()["message"] == OVERLAP_MESSAGE
+    async with SessionLocal() as db:
+        assert await db.scalar(select(Appointment.status).where(Appointment.id == no_show_id)) == "NO_SHOW"
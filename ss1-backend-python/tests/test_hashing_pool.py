@@ -0,0 +1,74 @@
+"""Contabilidad de HashingPool y sus métricas en GET /metrics."""
+import asyncio
+import threading
+
+import pytest
+
+from app.core.security import HashingPool, HashingPoolBusyError
+
+pytestmark = pytest.mark.anyio
+
+
+async def _settle(pool: HashingPool) -> None:
+    """Esperar a que el event loop procese la liberación enviada desde el hilo"""
+    for _ in range(100):
+        if pool.stats()["in_flight"] == 0:
+            return
+        await asyncio.sleep(0.01)
+
+
+async def test_cancelled_operation_holds_worker_until_thread_finishes():
+    pool = HashingPool(max_workers=1, max_queue=0)
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_hash():
+        started.set()
+        release.wait(5)
+        return "hash"
+
+    task = asyncio.ensure_future(pool.run(slow_hash))
+    await asyncio.to_thread(started.wait, 5)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    # El hilo sigue ocupado: la siguiente operación se rechaza
+    assert pool.stats()["in_flight"] == 1
+    with pytest.raises(HashingPoolBusyError):
+        await pool.run(slow_hash)
+
+    release.set()
+    await _settle(pool)
+    assert pool.stats() == {
+        "max_workers": 1,
+        "max_queue": 0,
+        "in_flight": 0,
+        "queued": 0,
+        "completed": 0,
+        "rejected": 1,
+    }
+
+
+async def test_only_successful_operations_count_as_completed():
+    pool = HashingPool(max_workers=2, max_queue=2)
+
+    def broken_hash():
+        raise ValueError("hash inválido")
+
+    assert await pool.run(str.upper, "ok") == "OK"
+    with pytest.raises(ValueError):
+        await pool.run(broken_hash)
+    await _settle(pool)
+
+    assert pool.stats()["completed"] == 1
+    assert pool.stats()["in_flight"] == 0
+
+
+async def test_metrics_include_hashing_pool(client):
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    for family in ("hashing_pool_in_flight", "hashing_pool_queued",
+                   "hashing_pool_completed_total", "hashing_pool_rejected_total"):
+        assert f"# TYPE {family} " in response.text
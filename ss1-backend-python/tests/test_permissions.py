@@ -0,0 +1,59 @@
+"""
+Máscara de permisos de require_permissions.
+
+La máscara se guarda con el usuario en principal_cache: un cambio de permisos
+hecho por otro proceso (otro worker, ss1-backend-node) se refleja cuando
+expira esa entrada, sin una caché por rol que lo retenga.
+"""
+import pytest
+from sqlalchemy import delete
+
+from app.core.config import settings
+from app.core.permissions import Permission as PermissionCode
+from app.core.security import create_access_token
+from app.db.models import Permission, Role, User, role_permissions
+from app.db.session import SessionLocal
+from app.services.auth.principal_cache import principal_cache
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def receptionist(dataset):
+    """(role_id, permission_id, encabezados) de un usuario con solo VIEW_PATIENTS"""
+    async with SessionLocal() as db:
+        role = Role(name="TEST_RECEPTION")
+        permission = Permission(code=PermissionCode.VIEW_PATIENTS.value)
+        db.add_all([role, permission])
+        await db.flush()
+        await db.execute(role_permissions.insert(), {"role_id": role.id, "permission_id": permission.id})
+        user = User(email="recepcion@example.com", password_hash="-", role_id=role.id, is_active=True)
+        db.add(user)
+        await db.commit()
+        ids = (role.id, permission.id, user.id)
+
+    token = create_access_token(subject=str(ids[2]), secret=settings.JWT_ACCESS_SECRET, expires_in="1h")
+    yield ids[0], ids[1], {"Authorization": f"Bearer {token}"}
+
+    async with SessionLocal() as db:
+        await db.execute(delete(User).where(User.id == ids[2]))
+        await db.execute(delete(role_permissions).where(role_permissions.c.role_id == ids[0]))
+        await db.execute(delete(Role).where(Role.id == ids[0]))
+        await db.execute(delete(Permission).where(Permission.id == ids[1]))
+        await db.commit()
+
+
+async def test_revoked_permission_applies_when_principal_expires(client, receptionist):
+    role_id, permission_id, headers = receptionist
+    assert (await client.get("/patients", headers=headers)).status_code == 200
+
+    # Otro proceso revoca el permiso; aquí solo expira la entrada de principal_cache
+    async with SessionLocal() as db:
+        await db.execute(
+            delete(role_permissions)
+            .where(role_permissions.c.role_id == role_id, role_permissions.c.permission_id == permission_id)
+        )
+        await db.commit()
+    principal_cache.clear()
+
+    assert (await client.get("/patients", headers=headers)).status_code == 403
@@ -0,0 +1,171 @@
+"""
+Sentencias SQL por endpoint (encabezado Server-Timing de RequestTimingMiddleware).
+
+Las relaciones de los modelos son lazy="raise": un perfil de carga
+(app.db.loader_profiles) al que le falta una relación responde 500, y uno que
+la carga fila por fila dispara el número de sentencias. Cada endpoint tiene un
+máximo fijo, que no depende de cuántas filas devuelve. Los conteos son en
+frío: sin usuario autenticado ni agenda en memoria (ver conftest.cold_caches).
+
+Las escrituras (WRITE_STEPS) se recorren en orden, como un flujo de alta:
+cada paso usa los ids creados por los anteriores.
+"""
+import re
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.db.models import ClinicalRecord, Role
+from app.db.session import SessionLocal
+from app.services.auth.principal_cache import principal_cache
+from app.services.availability.schedule_grid import schedule_grid
+
+pytestmark = pytest.mark.anyio
+
+STATEMENTS = re.compile(r'desc="(\d+) statements"')
+
+# (url, máximo de sentencias); {week_start}, {employee}, ... salen de url_values
+ENDPOINTS = [
+    ("/users?limit=50", 4),
+    ("/users/{user}", 4),
+    ("/patients?limit=50", 4),
+    ("/patients/{patient}", 3),
+    ("/employees", 6),
+    ("/employees/{employee}", 5),
+    ("/specialties", 1),
+    ("/areas", 1),
+    ("/roles", 3),
+    ("/appointments?limit=50", 4),
+    ("/appointments?professionalId={employee}&from={week_start}&to={week_end}", 4),
+    ("/appointments?patientId={patient}", 4),
+    ("/appointments/availability?date={week_start}", 4),
+    ("/appointments/availability?from={week_start}&to={week_end}", 4),
+    ("/appointments/next-available?after={week_start}&specialtyId={specialty}", 4),
+    ("/clinical-records?limit=50", 4),
+    ("/clinical-records?patientId={record_patient}", 4),
+    ("/clinical-records/{record}", 3),
+    ("/clinical-records/{record}/sessions", 4),
+    ("/payroll/periods", 3),
+    ("/reports/revenue?start_date={week_start}&end_date={week_end}", 2),
+    ("/reports/revenue?start_date=2025-01-01&end_date=2025-03-31", 2),
+    ("/reports/sales?start_date={week_start}&end_date={week_end}", 2),
+    ("/reports/sales?start_date=2025-01-01&end_date=2025-03-31&summary_only=true", 2),
+    ("/reports/payroll?start_date=2025-01-01&end_date=2025-03-31", 1),
+    ("/reports/patients-per-specialty?start_date=2025-01-01&end_date=2025-03-31", 1),
+]
+
+
+@pytest.fixture
+async def url_values(dataset) -> dict:
+    async with SessionLocal() as db:
+        record_patient = await db.scalar(
+            select(ClinicalRecord.patient_id).where(ClinicalRecord.id == dataset.clinical_record_ids[0])
+        )
+    week_start = dataset.data_start + timedelta(days=14)
+    return {
+        "user": dataset.admin_user_id,
+        "patient": dataset.patient_ids[len(dataset.patient_ids) // 2],
+        "employee": dataset.employee_ids[0],
+        "specialty": dataset.specialty_ids[0],
+        "record": dataset.clinical_record_ids[0],
+        "record_patient": record_patient,
+        "week_start": week_start,
+        "week_end": week_start + timedelta(days=6),
+    }
+
+
+@pytest.mark.parametrize("url, max_statements", ENDPOINTS)
+async def test_statements_per_endpoint(client, admin_headers, url_values, url, max_statements):
+    response = await client.get(url.format(**url_values), headers=admin_headers)
+
+    assert response.status_code == 200, response.text
+    count = int(STATEMENTS.search(response.headers["server-timing"]).group(1))
+    assert count <= max_statements, f"{count} sentencias (máximo {max_statements})"
+
+
+# (id que se guarda, método, url, cuerpo, máximo de sentencias); los textos
+# "{nombre}" del cuerpo se reemplazan por el id guardado con ese nombre
+WRITE_STEPS = [
+    (None, "POST", "/auth/login", {"emailOrUsername": "{admin_email}", "password": "{admin_password}"}, 5),
+    ("user", "POST", "/users", {"email": "nuevo.usuario@example.com", "role_id": "{admin_role}"}, 8),
+    (None, "PATCH", "/users/{user}", {"username": "nuevo.usuario"}, 8),
+    ("patient", "POST", "/patients", {"first_name": "Ana", "last_name": "Pérez", "email": "ana.perez@example.com"}, 11),
+    (None, "PATCH", "/patients/{patient}", {"phone": "55550000"}, 6),
+    ("employee", "POST", "/employees", {
+        "email": "eva.lopez@example.com",
+        "role_id": "{admin_role}",
+        "first_name": "Eva",
+        "last_name": "López",
+        "specialty_ids": ["{specialty}"],
+        "availability": [{"day_of_week": 1, "start_time": "08:00", "end_time": "12:00", "specialty_id": "{specialty}"}],
+    }, 15),
+    (None, "PATCH", "/employees/{employee}", {"session_rate": 150}, 13),
+    ("appointment", "POST", "/appointments", {
+        "patient_id": "{patient}",
+        "professional_id": "{employee}",
+        "specialty_id": "{specialty}",
+        "start_datetime": "{monday}T09:00:00Z",
+        "end_datetime": "{monday}T10:00:00Z",
+    }, 4),
+    (None, "PATCH", "/appointments/{appointment}", {"notes": "Primera consulta"}, 5),
+    ("record", "POST", "/clinical-records", {"patient_id": "{patient}", "responsible_employee_id": "{employee}"}, 6),
+    (None, "PATCH", "/clinical-records/{record}", {"chief_complaint": "Ansiedad"}, 5),
+    ("session", "POST", "/clinical-records/{record}/sessions", {
+        "session_datetime": "{monday}T09:00:00Z",
+        "professional_id": "{employee}",
+        "appointment_id": "{appointment}",
+    }, 6),
+    (None, "PATCH", "/clinical-sessions/{session}", {"topics": "Respiración"}, 5),
+    ("task", "POST", "/patients/{patient}/tasks", {"title": "Registro diario", "clinical_record_id": "{record}"}, 6),
+    (None, "PATCH", "/patients/tasks/{task}", {"status": "COMPLETED"}, 5),
+    (None, "POST", "/clinical-records/{record}/confidential-notes", {"content": "Nota"}, 5),
+]
+
+
+def _fill(value, values: dict):
+    """Reemplazar "{nombre}" (valor completo) por el valor guardado, conservando su tipo"""
+    if isinstance(value, dict):
+        return {key: _fill(item, values) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_fill(item, values) for item in value]
+    if isinstance(value, str):
+        if value.startswith("{") and value.endswith("}") and value[1:-1] in values:
+            return values[value[1:-1]]
+        return value.format(**values)
+    return value
+
+
+@pytest.fixture
+async def write_values(dataset) -> dict:
+    async with SessionLocal() as db:
+        admin_role = await db.scalar(select(Role.id).where(Role.name == "SUPER_ADMIN"))
+        # Los pacientes con email reciben un usuario con el rol PATIENT
+        if await db.scalar(select(Role.id).where(Role.name == "PATIENT")) is None:
+            db.add(Role(name="PATIENT", label="Paciente"))
+            await db.commit()
+    return {
+        "admin_email": dataset.admin_email,
+        "admin_password": dataset.admin_password,
+        "admin_role": admin_role,
+        "specialty": dataset.specialty_ids[0],
+        # Lunes posterior al dataset: sin citas que choquen
+        "monday": dataset.data_end + timedelta(days=7 - dataset.data_end.weekday()),
+    }
+
+
+async def test_statements_per_write(client, admin_headers, write_values):
+    values = dict(write_values)
+    for saved_as, method, url, body, max_statements in WRITE_STEPS:
+        # Cada paso en frío, igual que las lecturas
+        principal_cache.clear()
+        schedule_grid.clear()
+
+        url = _fill(url, values)
+        response = await client.request(method, url, json=_fill(body, values), headers=admin_headers)
+
+        assert 200 <= response.status_code < 300, f"{method} {url}: {response.text}"
+        count = int(STATEMENTS.search(response.headers["server-timing"]).group(1))
+        assert count <= max_statements, f"{method} {url}: {count} sentencias (máximo {max_statements})"
+        if saved_as:
+            values[saved_as] = response.json()["id"]
@@ -0,0 +1,111 @@
+"""
+Planes de consulta de los endpoints más usados (solo PostgreSQL).
+
+Cada SELECT que emite un endpoint se vuelve a ejecutar con EXPLAIN (FORMAT
+JSON) y los mismos parámetros. Falla si algún plan recorre secuencialmente
+(Seq Scan) una tabla de CHECKED_TABLES, es decir, si a una consulta le falta
+el índice que corresponde a su forma (alembic/versions/0004_query_indexes.py).
+
+El dataset de pruebas es pequeño y con tablas chicas el planificador prefiere
+Seq Scan aunque exista el índice; con enable_seqscan = off solo queda Seq
+Scan donde ningún índice sirve.
+
+Se omite sobre SQLite: correr con TEST_DATABASE_URL=postgresql+asyncpg://...
+(ver conftest.py).
+"""
+import json
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import event, text
+
+from app.db.session import engine
+
+pytestmark = [
+    pytest.mark.anyio,
+    pytest.mark.skipif(engine.dialect.name != "postgresql", reason="EXPLAIN requiere PostgreSQL (TEST_DATABASE_URL)"),
+]
+
+# Tablas que crecen con el uso. Las tablas de catálogo (roles, áreas,
+# especialidades...) se leen completas a propósito, igual que
+# employee_availability al cargar los horarios de la agenda precalculada.
+# payroll_records queda fuera: el dataset tiene un solo período, así que
+# "registros del período" es la tabla entera.
+CHECKED_TABLES = {"appointments", "clinical_records", "sessions", "invoices", "payments"}
+
+# (nombre, url); los valores salen de url_values
+ENDPOINTS = [
+    ("availability", "/appointments/availability?from={week_start}&to={week_end}"),
+    ("next_available", "/appointments/next-available?after={week_start}&specialtyId={specialty}"),
+    ("professional_appointments", "/appointments?professionalId={employee}&from={week_start}&to={week_end}"),
+    ("patient_appointments", "/appointments?patientId={patient}"),
+    ("clinical_records", "/clinical-records?patientId={patient}"),
+    ("sessions", "/clinical-records/{record}/sessions"),
+    ("revenue", "/reports/revenue?start_date={week_start}&end_date={week_end}"),
+    ("sales", "/reports/sales?start_date={week_start}&end_date={week_end}"),
+]
+
+
+def _seq_scans(plan: dict) -> list[str]:
+    """Tablas de CHECKED_TABLES recorridas con Seq Scan en un plan (recursivo)"""
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in CHECKED_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(_seq_scans(child))
+    return found
+
+
+@pytest.fixture(scope="module")
+async def analyzed(dataset):
+    async with engine.begin() as conn:
+        await conn.execute(text("ANALYZE"))
+
+
+@pytest.fixture
+def url_values(dataset) -> dict:
+    week_start = dataset.data_start + timedelta(days=14)
+    return {
+        "week_start": week_start,
+        "week_end": week_start + timedelta(days=6),
+        "patient": dataset.patient_ids[len(dataset.patient_ids) // 2],
+        "employee": dataset.employee_ids[0],
+        "specialty": dataset.specialty_ids[0],
+        "record": dataset.clinical_record_ids[0],
+    }
+
+
+@pytest.fixture
+def captured_selects():
+    """SELECT emitidos por el engine de la aplicación durante la prueba"""
+    captured: list[tuple[str, object]] = []
+
+    def capture(_conn, _cursor, statement, parameters, _context, _executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            captured.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    yield captured
+    event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+
+@pytest.mark.parametrize("name, url", ENDPOINTS)
+async def test_no_seq_scan_on_large_tables(client, admin_headers, analyzed, url_values, captured_selects, name, url):
+    response = await client.get(url.format(**url_values), headers=admin_headers)
+    assert response.status_code == 200, response.text
+    statements = list(captured_selects)
+    assert statements
+
+    failures = []
+    async with engine.connect() as conn:
+        await conn.exec_driver_sql("SET enable_seqscan = off")
+        for statement, parameters in statements:
+            result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            plan = result.scalar()
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            tables = _seq_scans(plan[0]["Plan"])
+            if tables:
+                failures.append(f"Seq Scan en {', '.join(sorted(set(tables)))}: {' '.join(statement.split())}")
+        await conn.rollback()
+
+    assert not failures, "\n".join(failures)
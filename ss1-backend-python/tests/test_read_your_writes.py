@@ -0,0 +1,72 @@
+"""
+Read-your-writes con réplica de lectura: tras un commit en la primaria la
+respuesta trae la cookie READ_AFTER_WRITE_COOKIE y get_read_db manda a la
+primaria las lecturas que la traen, incluido el streaming de los exports.
+
+Las pruebas corren sin réplica; aquí se simula una y se registra qué
+lecturas la usan.
+"""
+import time
+
+import pytest
+
+from app.api import deps
+from app.db import session as db_session
+from app.db.session import READ_AFTER_WRITE_COOKIE, SessionLocal, reads_own_writes
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def replica_reads(monkeypatch) -> list:
+    """Una entrada por sesión abierta en la "réplica" (en realidad, la primaria)"""
+    reads = []
+
+    def replica_session():
+        reads.append(1)
+        return SessionLocal()
+
+    monkeypatch.setattr(db_session, "read_engine", object())
+    monkeypatch.setattr(deps, "ReadSessionLocal", replica_session)
+    return reads
+
+
+async def test_write_sets_cookie_and_reads_stay_on_primary(client, admin_headers, replica_reads):
+    response = await client.get("/appointments?limit=5", headers=admin_headers)
+    assert response.status_code == 200
+    assert READ_AFTER_WRITE_COOKIE not in response.cookies
+    assert len(replica_reads) == 1
+
+    response = await client.post("/areas", json={"name": "Área read-your-writes"}, headers=admin_headers)
+    assert response.status_code == 201
+    assert READ_AFTER_WRITE_COOKIE in response.cookies
+
+    # El cliente reenvía la cookie: la lectura va a la primaria
+    response = await client.get("/appointments?limit=5", headers=admin_headers)
+    assert response.status_code == 200
+    assert len(replica_reads) == 1
+
+
+async def test_export_follows_read_session_routing(client, admin_headers, dataset, replica_reads):
+    url = f"/reports/payroll?start_date={dataset.data_start}&end_date={dataset.data_end}&format=csv"
+
+    response = await client.get(url, headers=admin_headers)
+    assert response.status_code == 200
+    # get_read_db y el streaming del export abren cada uno su sesión en la réplica
+    assert len(replica_reads) == 2
+
+    client.cookies.set(READ_AFTER_WRITE_COOKIE, f"{time.time() - 1:.3f}")
+    response = await client.get(url, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert len(replica_reads) == 2
+
+
+def test_reads_own_writes_window():
+    assert reads_own_writes(f"{time.time() - 1:.3f}")
+    assert not reads_own_writes(f"{time.time() - 3600:.3f}")
+    assert not reads_own_writes(f"{time.time() + 60:.3f}")
+    assert not reads_own_writes("99999999999")
+    assert not reads_own_writes("nan")
+    assert not reads_own_writes(None)
+    assert not reads_own_writes("no-es-una-hora")
@@ -0,0 +1,28 @@
+"""Parámetros del registro de consultas lentas: nunca guarda textos ni binarios."""
+from datetime import date
+
+from app.core.config import settings
+from app.db.slow_queries import SlowQueryLog, _format_parameters
+
+
+def test_parameters_are_not_logged_by_default():
+    assert settings.SLOW_QUERY_LOG_PARAMETERS is False
+    assert _format_parameters(("Contraseña temporal: abc123",), False) is None
+
+
+def test_strings_are_redacted(monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_QUERY_LOG_PARAMETERS", True)
+
+    text = _format_parameters(("Contraseña temporal: abc123", b"\x00\x01", 42, None, date(2025, 1, 6)), False)
+
+    assert "abc123" not in text
+    assert text == "(<str len=27>, <bytes len=2>, 42, None, datetime.date(2025, 1, 6))"
+
+
+def test_executemany_redacts_first_set(monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_QUERY_LOG_PARAMETERS", True)
+    log = SlowQueryLog(threshold_ms=1, max_entries=5)
+
+    log.record("INSERT INTO email_outbox ...", [("$2b$12$hash", 1), ("otro", 2)], True, 0.5, 2, "/users", None)
+
+    assert log.entries(1)[0]["parameters"] == "2 sets, first: (<str len=11>, 1)"